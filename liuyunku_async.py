@@ -0,0 +1,587 @@
+# 溜云库导航爬取异步引擎：基于 playwright.async_api，独立读取并发执行，截图写盘与下一次点击重叠
+#
+# 这是部分引擎：只实现 连接 → 读取导航 → 下钻 → 点击 → 截图（写入池 + 感知哈希去重）的主流程，
+# 没有 liuyunku_final_v2.py 的检查点/断点续爬、流式JSONL、阶段计时、Locator注册表、分类模式和素材接口捕获，
+# 需要这些功能时使用 liuyunku_final_v2.py
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List, Dict, Optional
+from playwright.async_api import async_playwright, ElementHandle
+from liuyunku_config import BROWSER_CONFIG, OUTPUT_CONFIG
+from liuyunku_capture import capture_async, get_profile
+from liuyunku_screenshots import ScreenshotWriterPool, open_pool
+from liuyunku_phash import ScreenshotStore
+from liuyunku_cdp import find_live_port, cdp_endpoint
+from liuyunku_targets import PagePool, rank_pages_async
+from liuyunku_final_v2 import LiuYunKuNavigationAutomator, TARGET_ORDER, is_skipped_category
+from liuyunku_snapshot import (
+    SNAPSHOT_SELECTORS, snapshot_dropdown_async, get_categories, to_subcategories,
+    find_subdivision_items, item_locator, snapshot_navigation_async, build_nav_index,
+    resolve_nav_targets, with_nav_locators,
+)
+from liuyunku_waits import AsyncPageWaiter
+from liuyunku_selectors import SelectorRegistry, has_class_prefix
+from liuyunku_logging import get_logger, setup_logging, shutdown_logging
+
+logger = get_logger(__name__)
+
+
+class AsyncLiuYunKuNavigationAutomator:
+    """溜云库导航自动化器 - 异步引擎（接口与 LiuYunKuNavigationAutomator 的浏览器部分一致）"""
+
+    def __init__(self, use_snapshot: bool = True):
+        self.use_snapshot = use_snapshot
+        self.playwright = None
+        self.browser = None
+        self.page = None
+        self.cdp_url = None
+        self.dropdown_snapshot = None
+        self.waiter = None
+        self.nav_index = None
+        self.selectors = SelectorRegistry()
+        self.page_pool = None
+        self.screenshot_pool: Optional[ScreenshotWriterPool] = None
+        self.screenshot_store: Optional[ScreenshotStore] = None
+        self.screenshot_tasks = set()  # 尚未完成的截图提交任务（哈希去重 + 写入池），关闭前全部等待
+        self.capture_profile = get_profile()
+
+    async def connect_to_browser(self, max_retries=3) -> bool:
+        """连接到溜云库内的浏览器"""
+        try:
+            logger.info("🌐 尝试连接到浏览器...")
+
+            self.playwright = await async_playwright().start()
+
+            for attempt in range(max_retries):
+                # 在线程中并发探测所有端口，只连接存活的端口
+                live = await asyncio.to_thread(find_live_port, BROWSER_CONFIG["cdp_ports"])
+                if live:
+                    try:
+                        self.browser = await self.playwright.chromium.connect_over_cdp(cdp_endpoint(live))
+                        self.cdp_url = f"http://localhost:{live['port']}"
+                        logger.info("✅ 成功连接到浏览器: %s", self.cdp_url)
+
+                        # 并发探测所有页面，选出溜云库页面
+                        self.page_pool = PagePool(await rank_pages_async(self.browser))
+                        self.page_pool.print_summary()
+                        self.page = self.page_pool.acquire() or await self.browser.new_page()
+
+                        self.page.set_default_timeout(BROWSER_CONFIG["page_timeout"])
+                        self.page.set_default_navigation_timeout(BROWSER_CONFIG["page_timeout"])
+
+                        logger.info("✅ 获取页面成功")
+                        return True
+
+                    except Exception as e:
+                        logger.info("端口 %s 连接失败: %s", live['port'], e)
+
+                logger.warning("⚠️  第 %s 次尝试失败，等待重试...", attempt + 1)
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(BROWSER_CONFIG["probe_retry_delay"])
+
+            logger.error("❌ 所有连接尝试都失败了")
+            return False
+
+        except Exception as e:
+            logger.error("❌ 连接浏览器失败: %s", e)
+            return False
+
+    async def get_waiter(self) -> AsyncPageWaiter:
+        """获取当前页面的事件等待器（页面切换后重新安装）"""
+        if self.waiter is None or self.waiter.page is not self.page:
+            self.waiter = AsyncPageWaiter(self.page)
+            await self.waiter.install()
+        return self.waiter
+
+    def report_wait(self, result: Dict, indent: str = "      "):
+        """打印一次等待的实际耗时"""
+        status = "✅" if result["ok"] else "⚠️  超时"
+        logger.info("%s⏱️  等待 %s: %.2fs %s", indent, result['name'], result['waited'], status)
+
+    async def get_main_navigation_items(self) -> List[Dict]:
+        """获取主导航项（按指定顺序）：一次evaluate读取全部导航项，再按索引解析目标"""
+        try:
+            if not self.page:
+                logger.error("❌ 页面未初始化")
+                return []
+
+            logger.info("🔍 获取主导航项...")
+
+            await self.page.wait_for_selector(self.selectors["main_nav_container"], timeout=10000)
+            await self.selectors.validate_async(self.page)
+            self.nav_index = build_nav_index(await snapshot_navigation_async(self.page))
+            resolution = resolve_nav_targets(self.nav_index, TARGET_ORDER)
+
+            main_navs = []
+            for record in resolution["found"]:
+                main_navs.append(with_nav_locators(self.page, record))
+                logger.info("  ✅ %s (类型: %s, 激活: %s)", record['text'], record['data_type'], record['is_active'])
+            for missing in resolution["missing"]:
+                logger.warning("  ⚠️  未找到主导航项: %s", missing['target'])
+
+            logger.info("✅ 找到 %s 个主导航项", len(main_navs))
+            return main_navs
+
+        except Exception as e:
+            logger.error("❌ 获取主导航项失败: %s", e)
+            return []
+
+    async def open_dropdown_menu(self, nav_item: Dict) -> bool:
+        """打开下拉菜单"""
+        try:
+            if not self.page:
+                return False
+
+            logger.info("📂 打开下拉菜单: %s", nav_item['text'])
+
+            await nav_item["text_element"].click()
+
+            result = await (await self.get_waiter()).wait_for_dropdown(timeout=7000)
+            self.report_wait(result, indent="")
+            if result["ok"]:
+                logger.info("✅ 下拉菜单已打开")
+                return True
+
+            logger.error("❌ 无法定位下拉菜单")
+            return False
+
+        except Exception as e:
+            logger.error("❌ 打开下拉菜单失败: %s", e)
+            return False
+
+    async def close_dropdown_menu(self):
+        """按 Escape 关闭下拉菜单并等待其消失"""
+        await self.page.keyboard.press("Escape")
+        self.report_wait(await (await self.get_waiter()).wait_for_dropdown_closed(), indent="  ")
+
+    async def get_all_categories_from_dropdown(self) -> List[Dict]:
+        """从下拉菜单中获取所有大类"""
+        try:
+            logger.info("📋 从下拉菜单获取所有大类...")
+
+            self.dropdown_snapshot = await self._read_dropdown()
+            if not self.dropdown_snapshot:
+                logger.error("❌ 未找到可见的下拉菜单")
+                return []
+
+            categories = get_categories(self.dropdown_snapshot)
+
+            for category in categories:
+                logger.info("  📁 %s", category['title'])
+
+            logger.info("✅ 找到 %s 个大类", len(categories))
+            return categories
+
+        except Exception as e:
+            logger.error("❌ 获取大类失败: %s", e)
+            return []
+
+    async def _read_items(self, container: ElementHandle) -> List[Dict]:
+        """并发读取容器内所有项的文本、激活状态和关闭按钮（与快照项格式一致）"""
+        items = await container.query_selector_all(SNAPSHOT_SELECTORS["item"])
+
+        async def read(idx: int, item: ElementHandle) -> Dict:
+            text_elem, class_name, close_btn = await asyncio.gather(
+                item.query_selector(SNAPSHOT_SELECTORS["item_text"]),
+                item.get_attribute("class"),
+                item.query_selector(SNAPSHOT_SELECTORS["close"]),
+            )
+            text = await text_elem.text_content() if text_elem else ""
+            return {
+                "index": idx,
+                "text": (text or "").strip(),
+                "has_text": text_elem is not None,
+                "is_active": has_class_prefix(class_name, SNAPSHOT_SELECTORS["active"]),
+                "has_close_btn": close_btn is not None,
+            }
+
+        return list(await asyncio.gather(*(read(idx, item) for idx, item in enumerate(items))))
+
+    async def _read_dropdown(self) -> Optional[Dict]:
+        """读取当前下拉菜单结构（快照模式一次evaluate，句柄模式并发读取）"""
+        if self.use_snapshot:
+            return await snapshot_dropdown_async(self.page)
+
+        dropdown = await self.page.query_selector(
+            f"{SNAPSHOT_SELECTORS['dropdown']}:not([style*='display: none'])"
+        )
+        if not dropdown:
+            return None
+        containers = await dropdown.query_selector_all(SNAPSHOT_SELECTORS["container"])
+        title_elems = await asyncio.gather(*(
+            container.query_selector(SNAPSHOT_SELECTORS["title"]) for container in containers
+        ))
+        titles = await asyncio.gather(*(
+            elem.text_content() if elem else asyncio.sleep(0, result="") for elem in title_elems
+        ))
+        item_lists = await asyncio.gather(*(self._read_items(container) for container in containers))
+        return {
+            "containers": [
+                {"index": idx, "title": (title or "").strip(), "is_subdivision": "细分" in (title or ""), "items": items}
+                for idx, (title, items) in enumerate(zip(titles, item_lists))
+            ]
+        }
+
+    async def click_category_and_get_subcategories(self, category: Dict, max_wait_time: float = 5.0) -> List[Dict]:
+        """点击大类触发细分项菜单，并获取细分项"""
+        try:
+            logger.info("    🖱️  点击大类触发细分项: %s", category['title'])
+
+            container_index = category["container_index"]
+            if not category["items"]:
+                logger.error("    ❌ 未找到可点击项")
+                return []
+
+            before = self.dropdown_snapshot or await self._read_dropdown()
+            before_count = len(before["containers"]) if before else 0
+            waiter = await self.get_waiter()
+
+            for item in category["items"]:
+                try:
+                    await item_locator(self.page, container_index, item["index"]).click()
+                    wait = await waiter.wait_for_subdivision_panel(before_count, timeout=int(max_wait_time * 1000))
+                    self.report_wait(wait)
+
+                    self.dropdown_snapshot = await self._read_dropdown()
+                    if not self.dropdown_snapshot:
+                        continue
+
+                    after_count = len(self.dropdown_snapshot["containers"])
+                    if after_count > before_count:
+                        subcategories = find_subdivision_items(self.dropdown_snapshot, before_count)
+                        if subcategories:
+                            return subcategories
+
+                    if container_index < after_count:
+                        container = self.dropdown_snapshot["containers"][container_index]
+                        subcategories = to_subcategories(container, skip_first=True)
+                        if subcategories:
+                            return subcategories
+
+                except Exception as e:
+                    logger.error("      ❌ 点击第 %s 项失败: %s", item['index'] + 1, e)
+                    continue
+
+            logger.error("    ❌ 所有点击尝试都未找到细分项")
+            return []
+
+        except Exception as e:
+            logger.error("❌ 点击大类失败: %s", e)
+            return []
+
+    async def click_subcategory_and_screenshot(self, subcategory: Dict, nav_text: str, category_title: str) -> bool:
+        """点击细分项并截图；截图字节交给后台任务写盘，不阻塞下一次点击"""
+        try:
+            if not self.page:
+                return False
+
+            text = subcategory["text"]
+            logger.info("      🖱️  点击细分项: %s", text)
+
+            waiter = await self.get_waiter()
+            await item_locator(self.page, subcategory["container_index"], subcategory["index"]).click()
+            active_wait = await waiter.wait_for_active_item(subcategory["container_index"], subcategory["index"])
+            self.report_wait(active_wait)
+            # 激活样式没有移动到该项：结果区仍是上一个细分项的，不截图
+            if not active_wait["ok"]:
+                logger.warning("      ⚠️  细分项未激活，跳过截图: %s", text)
+                return False
+
+            self.report_wait(await waiter.wait_for_result_ready())
+
+            image, extension = await capture_async(self.page, self.capture_profile)
+            if not image:
+                logger.warning("      ⚠️  截图失败，但点击成功")
+                return True
+            name = f"{nav_text}_{category_title}_{text}"
+            self.submit_screenshot(name, image, extension)
+            logger.info("      📸 截图已提交: %s", name)
+            return True
+
+        except Exception as e:
+            logger.error("      ❌ 点击细分项失败: %s", e)
+            return False
+
+    def get_screenshot_pool(self) -> ScreenshotWriterPool:
+        """获取截图写入池（与同步引擎相同：安全文件名、同名追加序号、有界队列）"""
+        if self.screenshot_pool is None:
+            self.screenshot_pool = open_pool()
+        return self.screenshot_pool
+
+    def submit_screenshot(self, name: str, image: bytes, extension: str) -> asyncio.Task:
+        """
+        提交截图：开启去重时存入去重截图库，否则交给写入池
+
+        哈希计算和入队（队列已满时会阻塞）放到线程中的后台任务里执行，不等待完成即可进行下一次点击；
+        任务保存在 screenshot_tasks 中，由 flush_screenshots / close_screenshot_pool 等待
+        """
+        pool = self.get_screenshot_pool()
+        if not OUTPUT_CONFIG["screenshot_dedup"]:
+            work = asyncio.to_thread(pool.submit, name, image, extension=extension)
+        else:
+            if self.screenshot_store is None:
+                self.screenshot_store = ScreenshotStore(pool, os.path.join(OUTPUT_CONFIG["screenshot_dir"], "store"),
+                                                        threshold=OUTPUT_CONFIG["dedup_threshold"])
+            work = asyncio.to_thread(self.screenshot_store.add, image, extension)
+
+        task = asyncio.create_task(work)
+        self.screenshot_tasks.add(task)
+        task.add_done_callback(lambda done: self._screenshot_done(name, done))
+        return task
+
+    def _screenshot_done(self, name: str, task: asyncio.Task):
+        self.screenshot_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("      ❌ 截图保存失败 %s: %s", name, task.exception())
+
+    async def wait_screenshot_tasks(self):
+        """等待所有截图提交任务完成"""
+        if self.screenshot_tasks:
+            await asyncio.gather(*list(self.screenshot_tasks), return_exceptions=True)
+
+    async def flush_screenshots(self):
+        """等待截图提交任务完成，并等待写入池中的截图全部写完"""
+        await self.wait_screenshot_tasks()
+        if self.screenshot_pool is not None:
+            await asyncio.to_thread(self.screenshot_pool.flush)
+
+    async def close_screenshot_pool(self):
+        """等待截图提交任务，保存去重索引，写完剩余截图并停止写入池"""
+        await self.wait_screenshot_tasks()
+        if self.screenshot_store is not None:
+            await asyncio.to_thread(self.screenshot_store.save_index)
+            self.screenshot_store.print_summary()
+            self.screenshot_store = None
+        if self.screenshot_pool is not None:
+            await asyncio.to_thread(self.screenshot_pool.close)
+            self.screenshot_pool.print_summary()
+            self.screenshot_pool = None
+
+    async def process_category(self, nav_item: Dict, category: Dict) -> Optional[Dict]:
+        """处理单个大类：触发细分项菜单，逐个点击细分项并截图"""
+        try:
+            if is_skipped_category(nav_item['text'], category['title']):
+                logger.warning("  ⚠️  跳过特殊处理的大类: %s - %s", nav_item['text'], category['title'])
+                return None
+
+            subcategories = await self.click_category_and_get_subcategories(category)
+            if not subcategories:
+                logger.warning("    ⚠️  未找到细分项，跳过此大类")
+                return None
+
+            category_data = {"title": category["title"], "subcategories": []}
+
+            for sub_idx, subcategory in enumerate(subcategories):
+                logger.info("    🎯 [%s/%s] 细分项: %s", sub_idx + 1, len(subcategories), subcategory['text'])
+                category_data["subcategories"].append({
+                    "text": subcategory["text"],
+                    "is_active": subcategory["is_active"],
+                    "has_close_btn": subcategory["has_close_btn"]
+                })
+                await self.click_subcategory_and_screenshot(subcategory, nav_item['text'], category['title'])
+
+            return category_data
+
+        except Exception as e:
+            logger.error("❌ 处理大类 %s 时出错: %s", category['title'], e)
+            return None
+
+    async def process_navigation(self, nav_item: Dict) -> Optional[Dict]:
+        """处理单个主导航项"""
+        try:
+            nav_data = {
+                "text": nav_item["text"],
+                "data_id": nav_item["data_id"],
+                "data_type": nav_item["data_type"],
+                "is_active": nav_item["is_active"],
+                "categories": []
+            }
+
+            if not await self.open_dropdown_menu(nav_item):
+                logger.error("❌ 无法打开 %s 的下拉菜单，跳过", nav_item['text'])
+                return None
+
+            categories = await self.get_all_categories_from_dropdown()
+            if not categories:
+                logger.warning("⚠️  未找到大类，跳过 %s", nav_item['text'])
+                return None
+
+            for cat_idx, category in enumerate(categories):
+                logger.info("\n  📁 [%s/%s] 大类: %s", cat_idx + 1, len(categories), category['title'])
+                category_data = await self.process_category(nav_item, category)
+                if category_data is not None:
+                    nav_data["categories"].append(category_data)
+
+            logger.info("\n  ✅ 完成主导航 '%s' 的所有大类处理", nav_item['text'])
+            await self.close_dropdown_menu()
+            return nav_data
+
+        except Exception as e:
+            logger.error("❌ 处理主导航 %s 时出错: %s", nav_item['text'], e)
+            return None
+
+    async def process_all_navigations_in_order(self) -> Dict:
+        """按指定顺序处理所有导航"""
+        try:
+            logger.info("🚀 开始按序处理所有导航（异步引擎）...")
+
+            navigation_data = {
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "main_navigation": []
+            }
+
+            main_navs = await self.get_main_navigation_items()
+            if not main_navs:
+                logger.error("❌ 未找到任何主导航项")
+                return navigation_data
+
+            for nav_idx, nav_item in enumerate(main_navs):
+                logger.info("\n%s", '='*80)
+                logger.info("📂 [%s/%s] 处理主导航: %s", nav_idx + 1, len(main_navs), nav_item['text'])
+                logger.info("%s", '='*80)
+
+                nav_data = await self.process_navigation(nav_item)
+                if nav_data is not None:
+                    navigation_data["main_navigation"].append(nav_data)
+
+            await self.flush_screenshots()
+            logger.info("\n✅ 按序处理完成，共处理 %s 个主导航项", len(navigation_data['main_navigation']))
+            return navigation_data
+
+        except Exception as e:
+            logger.error("❌ 按序处理失败: %s", e)
+            return {}
+
+    async def save_navigation_data(self, data: Dict, filename: str = "liuyunku_navigation_final_v2.json") -> bool:
+        """保存导航数据到文件"""
+        def write():
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+        try:
+            await asyncio.to_thread(write)
+            logger.info("✅ 导航数据已保存到: %s", filename)
+            return True
+        except Exception as e:
+            logger.error("❌ 保存数据失败: %s", e)
+            return False
+
+    async def take_initial_screenshot(self) -> bool:
+        """拍摄初始页面截图"""
+        try:
+            image, extension = await capture_async(self.page, get_profile(OUTPUT_CONFIG["initial_capture_profile"]))
+            await asyncio.to_thread(self.get_screenshot_pool().submit, "initial_page", image, extension=extension)
+            return True
+        except Exception as e:
+            logger.error("❌ 初始截图失败: %s", e)
+            return False
+
+    async def close(self):
+        """关闭页面、浏览器和Playwright"""
+        await self.close_screenshot_pool()
+
+        try:
+            if self.browser:
+                await self.browser.close()
+                logger.info("✅ 浏览器已关闭")
+        except:
+            pass
+
+        try:
+            if self.playwright:
+                await self.playwright.stop()
+                logger.info("✅ Playwright已停止")
+        except:
+            pass
+
+
+class SyncNavigationAutomator(LiuYunKuNavigationAutomator):
+    """
+    同步薄封装
+
+    窗口相关操作（启动、在线素材导航）沿用 LiuYunKuNavigationAutomator，
+    浏览器部分全部委托给 AsyncLiuYunKuNavigationAutomator，在私有事件循环上运行
+    """
+
+    def __init__(self, exe_path=r"D:\LiuYunKu4\LiuYunKu.exe", use_snapshot: bool = True):
+        super().__init__(exe_path, use_snapshot)
+        self.loop = asyncio.new_event_loop()
+        self.engine = AsyncLiuYunKuNavigationAutomator(use_snapshot)
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def connect_to_browser(self, max_retries=3) -> bool:
+        connected = self._run(self.engine.connect_to_browser(max_retries))
+        self.cdp_url = self.engine.cdp_url
+        return connected
+
+    def get_main_navigation_items(self) -> List[Dict]:
+        return self._run(self.engine.get_main_navigation_items())
+
+    def process_all_navigations_in_order(self) -> Dict:
+        return self._run(self.engine.process_all_navigations_in_order())
+
+    def take_initial_screenshot(self) -> bool:
+        return self._run(self.engine.take_initial_screenshot())
+
+    def save_navigation_data(self, data: Dict, filename: str = "liuyunku_navigation_final_v2.json") -> bool:
+        return self._run(self.engine.save_navigation_data(data, filename))
+
+    def disconnect(self):
+        """断开浏览器连接，保持溜云库运行"""
+        self._run(self.engine.close())
+
+    def close(self):
+        self.disconnect()
+        super().close()
+        self.loop.close()
+
+
+def main():
+    """主函数 - 异步引擎"""
+    argparse.ArgumentParser(
+        description="溜云库导航自动化器（异步引擎）",
+        epilog="部分引擎：不支持检查点/--resume、流式JSONL、阶段计时、分类模式和素材接口捕获，"
+               "需要这些功能时使用 liuyunku_final_v2.py",
+    ).parse_args()
+    setup_logging()
+    automator = SyncNavigationAutomator()
+
+    try:
+        logger.info("🚀 启动溜云库导航自动化器（异步引擎）")
+
+        if not automator.start_application():
+            logger.error("❌ 应用启动失败")
+            return
+
+        if not automator.navigate_to_online_material():
+            logger.error("❌ 无法导航到在线素材")
+            return
+
+        if not automator.connect_to_browser():
+            logger.error("❌ 无法连接到浏览器")
+            return
+
+        automator.take_initial_screenshot()
+        navigation_data = automator.process_all_navigations_in_order()
+
+        if navigation_data.get("main_navigation"):
+            automator.save_navigation_data(navigation_data)
+
+        logger.info("\n✅ 自动化测试完成!")
+
+    except Exception as e:
+        logger.error("❌ 主程序执行失败: %s", e)
+
+    finally:
+        automator.disconnect()
+        automator.loop.close()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
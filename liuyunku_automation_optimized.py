@@ -1,10 +1,13 @@
 import time
 import json
-import os
 from typing import List, Dict, Optional
-from playwright.sync_api import sync_playwright, Browser, Page, ElementHandle
+from playwright.sync_api import sync_playwright, ElementHandle
 from pywinauto import Application, Desktop
 import psutil
+from liuyunku_snapshot import snapshot_navigation, build_nav_index, lookup_nav, with_nav_locators
+from liuyunku_routing import TaxonomyMode
+from liuyunku_config import SELECTOR_CONFIG
+from liuyunku_selectors import has_class_prefix
 class LiuYunKuNavigationAutomator:
     """溜云库导航自动化器 - 优化版"""
     
@@ -15,6 +18,8 @@ class LiuYunKuNavigationAutomator:
         self.playwright = None
         self.browser = None
         self.page = None
+        self.nav_index = None  # 主导航索引（build_nav_index）
+        self.taxonomy = None  # 完整遍历时的请求拦截（TaxonomyMode），只需要分类结构
         self.navigation_data = {}
         
     def start_application(self, timeout=30) -> bool:
@@ -224,7 +229,7 @@ class LiuYunKuNavigationAutomator:
             return False
     
     def get_main_navigation_items(self) -> List[Dict]:
-        """获取主导航项"""
+        """获取主导航项（一次evaluate读取全部导航项并建立索引）"""
         try:
             if not self.page:
                 print("❌ 页面未初始化")
@@ -235,38 +240,12 @@ class LiuYunKuNavigationAutomator:
             # 等待导航加载
             self.page.wait_for_selector("ul[data-rfd-droppable-id='nav-list']", timeout=10000)
             
-            nav_items = self.page.query_selector_all("ul[data-rfd-droppable-id='nav-list'] li")
+            self.nav_index = build_nav_index(snapshot_navigation(self.page))
             
             main_navs = []
-            
-            for idx, item in enumerate(nav_items):
-                try:
-                    text_elem = item.query_selector("p")
-                    if not text_elem:
-                        continue
-                    
-                    text = text_elem.text_content()
-                    if not text:
-                        continue
-                    
-                    data_id = item.get_attribute("data-rfd-draggable-id")
-                    data_type = text_elem.get_attribute("datatype")
-                    is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
-                    
-                    main_navs.append({
-                        "index": idx,
-                        "text": text.strip(),
-                        "data_id": data_id,
-                        "data_type": data_type,
-                        "is_active": is_active,
-                        "element": item
-                    })
-                    
-                    print(f"  {idx + 1}. {text.strip()} (类型: {data_type}, 激活: {is_active})")
-                    
-                except Exception as e:
-                    print(f"解析第 {idx} 个主导航项时出错: {e}")
-                    continue
+            for record in self.nav_index["records"]:
+                main_navs.append(with_nav_locators(self.page, record))
+                print(f"  {record['index'] + 1}. {record['text']} (类型: {record['data_type']}, 激活: {record['is_active']})")
             
             print(f"✅ 找到 {len(main_navs)} 个主导航项")
             return main_navs
@@ -275,6 +254,16 @@ class LiuYunKuNavigationAutomator:
             print(f"❌ 获取主导航项失败: {e}")
             return []
     
+    def find_main_navigation(self, text: Optional[str] = None, data_type: Optional[str] = None,
+                             data_id: Optional[str] = None) -> Optional[Dict]:
+        """按文本、datatype 或 data-rfd-draggable-id 直接取得主导航项，索引已建立时不再扫描页面"""
+        if self.nav_index is None:
+            self.page.wait_for_selector("ul[data-rfd-droppable-id='nav-list']", timeout=10000)
+            self.nav_index = build_nav_index(snapshot_navigation(self.page))
+        
+        record = lookup_nav(self.nav_index, text, data_type, data_id)
+        return with_nav_locators(self.page, record) if record else None
+    
     def open_dropdown_menu(self, nav_item: Dict) -> Optional[ElementHandle]:
         """打开下拉菜单 - 优化版（只使用备用方式）"""
         try:
@@ -283,12 +272,8 @@ class LiuYunKuNavigationAutomator:
             
             print(f"📂 打开下拉菜单: {nav_item['text']}")
             
-            text_elem = nav_item["element"].query_selector("p")
-            if not text_elem:
-                return None
-            
             # 点击打开下拉菜单
-            text_elem.click()
+            nav_item["text_element"].click()
             
             # 优化：直接使用备用方式，等待2秒确保加载完成
             print("⏳ 等待下拉菜单加载...")
@@ -358,8 +343,8 @@ class LiuYunKuNavigationAutomator:
                             if not text:
                                 continue
                             
-                            is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
-                            has_close_btn = item.query_selector("span[class*='maxClassList_close__']") is not None
+                            is_active = has_class_prefix(item.get_attribute("class"), SELECTOR_CONFIG["active_class"])
+                            has_close_btn = item.query_selector(SELECTOR_CONFIG["close_button"]) is not None
                             
                             first_level_subcategories.append({
                                 "text": text.strip(),
@@ -441,8 +426,8 @@ class LiuYunKuNavigationAutomator:
                             if not text:
                                 continue
                             
-                            is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
-                            has_close_btn = item.query_selector("span[class*='maxClassList_close__']") is not None
+                            is_active = has_class_prefix(item.get_attribute("class"), SELECTOR_CONFIG["active_class"])
+                            has_close_btn = item.query_selector(SELECTOR_CONFIG["close_button"]) is not None
                             
                             second_level_subcategories.append({
                                 "text": text.strip(),
@@ -512,8 +497,8 @@ class LiuYunKuNavigationAutomator:
                             if not text:
                                 continue
                             
-                            is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
-                            has_close_btn = item.query_selector("span[class*='maxClassList_close__']") is not None
+                            is_active = has_class_prefix(item.get_attribute("class"), SELECTOR_CONFIG["active_class"])
+                            has_close_btn = item.query_selector(SELECTOR_CONFIG["close_button"]) is not None
                             
                             second_level_subcategories.append({
                                 "text": text.strip(),
@@ -538,11 +523,14 @@ class LiuYunKuNavigationAutomator:
             print(f"❌ 点击第一级细分项失败: {e}")
             return []
     
-    def scrape_all_navigation(self) -> Dict:
-        """完整遍历所有导航结构（包含三级结构）"""
+    def scrape_all_navigation(self, block_api: Optional[bool] = None) -> Dict:
+        """完整遍历所有导航结构（包含三级结构），遍历期间拦截图片、字体、媒体请求"""
         try:
             print("🚀 开始完整导航遍历...")
             
+            self.taxonomy = TaxonomyMode(self.page, block_api)
+            self.taxonomy.enable()
+            
             navigation_data = {
                 "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
                 "main_navigation": []
@@ -620,24 +608,23 @@ class LiuYunKuNavigationAutomator:
         except Exception as e:
             print(f"❌ 完整遍历失败: {e}")
             return {}
+        
+        finally:
+            if self.taxonomy is not None:
+                self.taxonomy.disable()
+                self.taxonomy.print_summary()
     
-    def test_specific_navigation(self, main_nav_text: str, first_level_text: str, second_level_text: str = None) -> bool:
-        """测试特定导航路径（支持三级）"""
+    def test_specific_navigation(self, main_nav_text: str, first_level_text: str, second_level_text: str = None,
+                                 data_type: str = None, data_id: str = None) -> bool:
+        """测试特定导航路径（支持三级），主导航也可以按 datatype / data-rfd-draggable-id 定位"""
         try:
             if second_level_text:
                 print(f"\n🎯 测试导航路径: {main_nav_text} > {first_level_text} > {second_level_text}")
             else:
                 print(f"\n🎯 测试导航路径: {main_nav_text} > {first_level_text}")
             
-            # 获取主导航
-            main_navs = self.get_main_navigation_items()
-            
-            # 找到目标主导航
-            target_nav = None
-            for nav in main_navs:
-                if nav["text"] == main_nav_text:
-                    target_nav = nav
-                    break
+            # 通过主导航索引直接定位目标
+            target_nav = self.find_main_navigation(main_nav_text, data_type, data_id)
             
             if not target_nav:
                 print(f"❌ 未找到主导航: {main_nav_text}")
@@ -729,6 +716,8 @@ class LiuYunKuNavigationAutomator:
     def take_screenshot(self, filename: str = "screenshot.png") -> bool:
         """截图"""
         try:
+            if self.taxonomy is not None:
+                self.taxonomy.disable()
             if self.page:
                 self.page.screenshot(path=filename)
                 print(f"📸 截图已保存: {filename}")
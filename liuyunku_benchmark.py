@@ -0,0 +1,586 @@
+# 溜云库爬虫基准测试：基于本地HTML夹具，无需溜云库应用
+import argparse
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Dict, Optional
+from playwright.sync_api import sync_playwright
+from liuyunku_final_v2 import LiuYunKuNavigationAutomator, TARGET_ORDER
+from liuyunku_replica import load_replica_model, write_replica, scale_delays, DEFAULT_SUBDIVISIONS
+from liuyunku_screenshots import open_pool
+from liuyunku_phash import ScreenshotStore
+from liuyunku_config import OUTPUT_CONFIG
+from liuyunku_logging import setup_logging
+from liuyunku_har import open_replay, load_manifest
+from liuyunku_windows import FakeDesktop, AttachCache, WindowAttacher
+from liuyunku_uia import FakeElement, FakeUiaBackend, UiaLocator
+from liuyunku_cdp import probe_ports, pick_live_port, find_live_port
+from liuyunku_stream import NavigationStreamWriter, rebuild_navigation
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class RpcCounter:
+    """统计经过代理对象发出的Playwright调用次数"""
+
+    # 只在本地构造Locator、不产生CDP往返的方法
+    LOCAL_METHODS = {"locator", "nth", "filter", "on", "once", "remove_listener"}
+
+    def __init__(self):
+        self.calls = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def reset(self):
+        self.calls.clear()
+
+    def wrap(self, obj):
+        """包装Playwright对象（列表逐个包装），其余值原样返回"""
+        if isinstance(obj, list):
+            return [self.wrap(item) for item in obj]
+        if type(obj).__module__.startswith("playwright"):
+            return _CountingProxy(obj, self)
+        return obj
+
+
+class _CountingProxy:
+    """转发属性访问，并为每次方法调用计数"""
+
+    def __init__(self, target, counter: RpcCounter):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_counter", counter)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return self._counter.wrap(attr)
+
+        def call(*args, **kwargs):
+            if name not in RpcCounter.LOCAL_METHODS:
+                self._counter.calls[name] += 1
+            return self._counter.wrap(attr(*args, **kwargs))
+
+        return call
+
+
+def bench_dropdown_rpc(headless: bool = True) -> Dict:
+    """对比句柄模式与快照模式下，处理一个下拉菜单所需的RPC次数"""
+    fixture_url = "file://" + os.path.join(FIXTURE_DIR, "hovercard_dropdown.html")
+    results = {}
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless)
+        page = browser.new_page()
+
+        for mode, use_snapshot in (("handles", False), ("snapshot", True)):
+            page.goto(fixture_url)
+            counter = RpcCounter()
+
+            automator = LiuYunKuNavigationAutomator(use_snapshot=use_snapshot)
+            automator.page = counter.wrap(page)
+
+            start = time.perf_counter()
+            categories = automator.get_all_categories_from_dropdown()
+            category_rpc = counter.total
+            subcategories = automator.click_category_and_get_subcategories(categories[0]) if categories else []
+
+            results[mode] = {
+                "categories": len(categories),
+                "subcategories": len(subcategories),
+                "category_rpc": category_rpc,
+                "total_rpc": counter.total,
+                "seconds": time.perf_counter() - start,
+                "calls": dict(counter.calls),
+            }
+
+        browser.close()
+
+    print("\n📊 下拉菜单RPC对比（夹具: hovercard_dropdown.html）")
+    for mode, result in results.items():
+        print(f"  {mode:<9} 大类: {result['categories']}  细分项: {result['subcategories']}  "
+              f"大类RPC: {result['category_rpc']}  总RPC: {result['total_rpc']}  "
+              f"耗时: {result['seconds']:.2f}s")
+        print(f"            {result['calls']}")
+    return results
+
+
+def bench_attach(enumeration_delay: float = 0.3, decoys: int = 40) -> Dict:
+    """在假桌面上对比首次连接（枚举进程和窗口）与按缓存连接的耗时和枚举次数"""
+    desktop = FakeDesktop(enumeration_delay=enumeration_delay)
+    for i in range(decoys):
+        desktop.add_process(f"app{i}.exe", f"窗口 {i}")
+    desktop.add_process("LiuYunKu.exe", "溜云库 - 在线素材")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "attach.json")
+        for run in ("cold", "cached", "stale"):
+            if run == "stale":
+                # 进程重启后PID和句柄都变了，缓存校验失败，回退到枚举
+                pid = desktop.find_process("LiuYunKu.exe")
+                desktop.kill(pid)
+                desktop.add_process("LiuYunKu.exe", "溜云库 - 在线素材")
+            before = dict(desktop.calls)
+            attacher = WindowAttacher(desktop, AttachCache(cache_path))
+            window = attacher.attach(r"D:\LiuYunKu4\LiuYunKu.exe", timeout=5)
+            results[run] = dict(
+                attacher.last_attach,
+                title=window.window_text() if window else None,
+                calls={k: v - before[k] for k, v in desktop.calls.items() if v - before[k]},
+            )
+
+    print(f"\n📊 窗口连接对比（假桌面: {decoys + 1} 个窗口, 每次枚举 {enumeration_delay:.1f}s）")
+    for run, result in results.items():
+        print(f"  {run:<7} 方式: {result['method']:<9} 耗时: {result['seconds']:.3f}s  {result['calls']}")
+    return results
+
+
+def build_fake_uia_tree(panels: int = 40, per_panel: int = 50) -> FakeElement:
+    """构造一棵假的溜云库主窗口控件树：大量无关控件 + 在线素材按钮 + 点击后出现的模型库标记"""
+    root = FakeElement("Window", "溜云库")
+    for i in range(panels):
+        root.children.append(FakeElement("Pane", f"面板 {i}", children=[
+            FakeElement("Text" if j % 2 else "Button", f"控件 {i}-{j}") for j in range(per_panel)
+        ]))
+
+    content = FakeElement("Pane", "内容")
+    root.children.append(content)
+
+    def show_library(_):
+        if not content.children:
+            content.children.append(FakeElement("Text", "模型库"))
+
+    root.children.append(FakeElement("RadioButton", "本地素材"))
+    root.children.append(FakeElement("RadioButton", "在线素材", on_click=show_library))
+    return root
+
+
+def bench_uia(checks: int = 20) -> Dict:
+    """对比遍历整棵控件树（descendants + window_text）与缓存查找的耗时"""
+    root = build_fake_uia_tree()
+    results = {}
+
+    start = time.perf_counter()
+    text_reads = 0
+    for _ in range(checks):
+        for control_type, keyword in (("RadioButton", "在线"), ("Text", "模型库")):
+            for element in root.descendants(control_type=control_type):
+                text_reads += 1
+                if keyword in element.window_text():
+                    break
+    results["descendants"] = {"seconds": time.perf_counter() - start, "text_reads": text_reads}
+
+    backend = FakeUiaBackend()
+    uia = UiaLocator(backend, root)
+    start = time.perf_counter()
+    uia.find("online_material").click_input()
+    for _ in range(checks):
+        uia.find("online_material")
+        uia.exists("model_library")
+    results["cached"] = {"seconds": time.perf_counter() - start, "visited": backend.visited,
+                         "summary": uia.summary()}
+
+    print(f"\n📊 UIA查找对比（假控件树, {len(root.descendants())} 个控件, 每种方式 {checks} 轮）")
+    print(f"  descendants  耗时: {results['descendants']['seconds'] * 1000:.1f}ms  "
+          f"window_text 读取: {results['descendants']['text_reads']}")
+    print(f"  cached       耗时: {results['cached']['seconds'] * 1000:.1f}ms  "
+          f"遍历控件: {results['cached']['visited']}")
+    uia.print_summary(indent="    ")
+    return results
+
+
+class StubCdpHandler(BaseHTTPRequestHandler):
+    """只响应 /json/version 的CDP桩服务（server.delay 为响应前的延迟秒数）"""
+
+    def do_GET(self):
+        time.sleep(getattr(self.server, "delay", 0))
+        if self.path != "/json/version":
+            self.send_error(404)
+            return
+        port = self.server.server_address[1]
+        body = json.dumps({
+            "Browser": "Chrome/Stub",
+            "webSocketDebuggerUrl": f"ws://localhost:{port}/devtools/browser/stub",
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def _stub_cdp_server(delay: float = 0.0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("localhost", 0), StubCdpHandler)
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_cdp_probe(timeout: float = 0.5, prefer_wait: float = 0.1) -> Dict:
+    """
+    用本地桩服务测量并校验端口探测：一个关闭的端口、一个只接受连接不响应的端口、一个正常的CDP端口
+
+    依次探测的耗时为各端口耗时之和，并发探测全部端口取决于最慢的端口，
+    find_live_port 在存活端口响应时返回；另用两个存活端口校验首选（缓存）端口优先。
+    校验不通过时抛出 AssertionError
+    """
+    server = _stub_cdp_server()
+    slow_server = _stub_cdp_server(delay=prefer_wait / 4)
+    silent = socket.socket()
+    silent.bind(("localhost", 0))
+    silent.listen(8)
+
+    closed_port, silent_port = str(_free_port()), str(silent.getsockname()[1])
+    live_port, slow_port = str(server.server_address[1]), str(slow_server.server_address[1])
+    ports = [closed_port, silent_port, live_port]
+    results = {}
+    try:
+        start = time.perf_counter()
+        sequential = [probe_ports([port], timeout=timeout)[0] for port in ports]
+        results["sequential"] = {"seconds": time.perf_counter() - start, "probes": sequential}
+
+        start = time.perf_counter()
+        concurrent = probe_ports(ports, timeout=timeout)
+        results["concurrent"] = {"seconds": time.perf_counter() - start, "probes": concurrent}
+        results["live"] = pick_live_port(concurrent)
+
+        start = time.perf_counter()
+        first = find_live_port(ports, timeout=timeout, prefer_wait=prefer_wait)
+        results["first_live"] = {"seconds": time.perf_counter() - start, "probes": [first] if first else []}
+
+        # 首选端口存活但响应较慢：仍应选中它，而不是先响应的另一个存活端口
+        start = time.perf_counter()
+        preferred = find_live_port([slow_port, live_port], timeout=timeout, prefer_wait=prefer_wait)
+        results["preferred"] = {"seconds": time.perf_counter() - start, "probes": [preferred] if preferred else []}
+
+        start = time.perf_counter()
+        results["none_live"] = {"probe": find_live_port([closed_port, silent_port], timeout=timeout,
+                                                        prefer_wait=prefer_wait),
+                                "seconds": time.perf_counter() - start}
+    finally:
+        for stub in (server, slow_server):
+            stub.shutdown()
+            stub.server_close()
+        silent.close()
+
+    print(f"\n📊 CDP端口探测（关闭 / 无响应 / 正常, 超时 {timeout}s）")
+    for mode in ("sequential", "concurrent", "first_live", "preferred"):
+        result = results[mode]
+        detail = ", ".join(f"{p['port']}{'✅' if p['ok'] else '❌'} {p['latency'] * 1000:.0f}ms" for p in result["probes"])
+        print(f"  {mode:<10} 耗时: {result['seconds'] * 1000:.0f}ms  {detail}")
+    if results["live"]:
+        print(f"  选中端口: {results['live']['port']} ({results['live']['ws_url']})")
+
+    # 校验：选中存活端口、跳过不可用端口、耗时有上限
+    bound = timeout + prefer_wait + 0.5
+    probes = {probe["port"]: probe for probe in concurrent}
+    assert not probes[closed_port]["ok"] and not probes[silent_port]["ok"], "不可用的端口被判为存活"
+    assert probes[live_port]["ok"], "存活端口未被识别"
+    assert results["live"] and results["live"]["port"] == live_port, "pick_live_port 未选中存活端口"
+    assert first and first["port"] == live_port, "find_live_port 未选中存活端口"
+    assert first["ws_url"] and first["ws_url"].startswith("ws://"), "未取得 webSocketDebuggerUrl"
+    assert preferred and preferred["port"] == slow_port, "find_live_port 未优先选择首选端口"
+    assert results["none_live"]["probe"] is None, "没有存活端口时应返回 None"
+    for mode in ("concurrent", "first_live", "preferred"):
+        assert results[mode]["seconds"] < bound, f"{mode} 耗时超过上限 {bound}s"
+    assert results["none_live"]["seconds"] < bound, f"全部不可用时耗时超过上限 {bound}s"
+    print(f"  ✅ 校验通过（耗时上限 {bound:.1f}s）")
+    return results
+
+
+def check_stream_resume() -> Dict:
+    """
+    校验 --resume 后的流式记录重建：首次运行失败的细分项在续爬时重试并再次写入，
+    重建结果中每个细分项只出现一次，成功的记录优先，不完整的最后一行被跳过。校验不通过时抛出 AssertionError
+    """
+    nav = {"text": "贴图", "index": 0}
+    category = {"title": "植物", "subcategories": [], "items": ["全部", "花卉", "树木"]}
+
+    def visit(writer: NavigationStreamWriter, text: str, ok: bool, digest: str):
+        sub_data = {"text": text, "is_active": False, "has_close_btn": False}
+        writer.write_visit(nav, category, sub_data, {"ok": ok, "screenshot_hash": digest})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stream.jsonl")
+
+        # 首次运行：花卉成功，树木失败后中断（最后一行只写了一半）
+        first = NavigationStreamWriter(path)
+        visit(first, "花卉", True, "a1")
+        visit(first, "树木", False, "b0")
+        first.close()
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"ts": "2026')
+
+        # --resume：花卉已在检查点中不再访问，树木重试成功，草坪第一次访问失败
+        resumed = NavigationStreamWriter(path, append=True)
+        visit(resumed, "树木", True, "b1")
+        visit(resumed, "草坪", False, "c0")
+        # 同一次运行中成功之后又失败的记录不覆盖成功的记录
+        visit(resumed, "花卉", False, "a2")
+        resumed.close()
+
+        rebuilt = rebuild_navigation(path)
+
+    navs = rebuilt["main_navigation"]
+    assert len(navs) == 1 and len(navs[0]["categories"]) == 1, "主导航或大类重复"
+    subs = navs[0]["categories"][0]["subcategories"]
+    texts = [s["text"] for s in subs]
+    assert texts == ["花卉", "树木", "草坪"], f"细分项重复或顺序错误: {texts}"
+    hashes = {s["text"]: s["screenshot_hash"] for s in subs}
+    assert hashes["树木"] == "b1", "重试成功的记录没有覆盖失败的记录"
+    assert hashes["花卉"] == "a1", "失败的记录覆盖了成功的记录"
+    assert hashes["草坪"] == "c0", "从未成功的细分项应保留最后一条记录"
+
+    print("\n📊 流式记录续爬重建")
+    for s in subs:
+        print(f"  {s['text']}  {s['screenshot_hash']}")
+    print("  ✅ 校验通过（每个细分项一条记录，成功的记录优先）")
+    return rebuilt
+
+
+def _wait_totals(records: List[Dict]) -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for record in records:
+        totals[record["name"]] = totals.get(record["name"], 0.0) + record["waited"]
+    return totals
+
+
+class ProfiledAutomator(LiuYunKuNavigationAutomator):
+    """为每个节点（主导航 / 大类 / 细分项）记录耗时、RPC次数和各等待的总时长"""
+
+    def __init__(self, counter: RpcCounter, **kwargs):
+        super().__init__(**kwargs)
+        self.counter = counter
+        self.nodes: List[Dict] = []
+
+    @contextmanager
+    def node(self, level: str, name: str):
+        records = self.get_waiter().records
+        first_record = len(records)
+        rpc = self.counter.total
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.nodes.append({
+                "level": level,
+                "name": name,
+                "seconds": time.perf_counter() - start,
+                "rpc": self.counter.total - rpc,
+                "waits": _wait_totals(records[first_record:]),
+            })
+
+    def process_navigation(self, nav_item: Dict) -> Optional[Dict]:
+        with self.node("nav", nav_item["text"]):
+            return super().process_navigation(nav_item)
+
+    def process_category(self, nav_item: Dict, category: Dict) -> Optional[Dict]:
+        with self.node("category", f"{nav_item['text']}/{category['title']}"):
+            return super().process_category(nav_item, category)
+
+    def click_subcategory_and_screenshot(self, subcategory: Dict, nav_text: str, category_title: str) -> bool:
+        with self.node("subcategory", f"{nav_text}/{category_title}/{subcategory['text']}"):
+            return super().click_subcategory_and_screenshot(subcategory, nav_text, category_title)
+
+
+def _format_waits(waits: Dict[str, float]) -> str:
+    return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in waits.items())
+
+
+def run_profiled_crawl(page, workdir: str, taxonomy: bool = False):
+    """
+    在给定页面上运行 process_all_navigations_in_order，截图写到 workdir
+
+    返回 (automator, counter, results)
+    """
+    counter = RpcCounter()
+    automator = ProfiledAutomator(counter)
+    automator.page = counter.wrap(page)
+    automator.save_screenshots = not taxonomy
+    # 截图写到临时目录，不污染真实的截图目录
+    automator.screenshot_pool = open_pool(os.path.join(workdir, "screenshots"))
+    if OUTPUT_CONFIG["screenshot_dedup"]:
+        automator.screenshot_store = ScreenshotStore(
+            automator.screenshot_pool, os.path.join(workdir, "screenshots", "store"),
+            threshold=OUTPUT_CONFIG["dedup_threshold"])
+
+    start = time.perf_counter()
+    navigation_data = automator.process_all_navigations_in_order()
+    seconds = time.perf_counter() - start
+
+    navs = navigation_data.get("main_navigation", [])
+    results = {
+        "seconds": seconds,
+        "rpc": counter.total,
+        "calls": dict(counter.calls),
+        "navigations": len(navs),
+        "categories": sum(len(nav["categories"]) for nav in navs),
+        "subcategories": sum(len(cat["subcategories"]) for nav in navs for cat in nav["categories"]),
+        "nodes": automator.nodes,
+        "waits": automator.waiter.summary() if automator.waiter else {},
+        "stages": automator.spans.stage_summary(),
+    }
+    return automator, counter, results
+
+
+def print_profiled_crawl(title: str, automator: ProfiledAutomator, counter: RpcCounter, results: Dict):
+    """打印 run_profiled_crawl 的结果：总计、各主导航/大类节点、细分项平均值、等待和阶段耗时"""
+    visits = [node for node in automator.nodes if node["level"] == "subcategory"]
+    print(f"\n📊 {title}")
+    print(f"  总耗时: {results['seconds']:.2f}s  总RPC: {counter.total}  "
+          f"主导航: {results['navigations']}  大类: {results['categories']}  细分项: {results['subcategories']}")
+    print(f"  {dict(counter.calls.most_common())}")
+    for node in automator.nodes:
+        if node["level"] != "subcategory":
+            indent = "  " if node["level"] == "nav" else "    "
+            print(f"{indent}{node['name']:<16} {node['seconds']:.2f}s  RPC {node['rpc']:<4} {_format_waits(node['waits'])}")
+    if visits:
+        print(f"  细分项 {len(visits)} 个: 平均 {sum(v['seconds'] for v in visits) / len(visits):.2f}s, "
+              f"最长 {max(v['seconds'] for v in visits):.2f}s, "
+              f"平均RPC {sum(v['rpc'] for v in visits) / len(visits):.1f}")
+    for name, stat in results["waits"].items():
+        print(f"    等待 {name}: {stat['count']} 次, 共 {stat['total']:.2f}s, 最长 {stat['max']:.2f}s, "
+              f"超时 {stat['timeouts']} 次")
+    print("  阶段耗时:")
+    automator.spans.print_report(indent="    ")
+
+
+def bench_replica(headless: bool = True, delay_scale: float = 1.0, max_navs: Optional[int] = None,
+                  max_items: Optional[int] = 8, subdivisions: int = DEFAULT_SUBDIVISIONS,
+                  taxonomy: bool = False) -> Dict:
+    """
+    在本地复刻页面上运行 process_all_navigations_in_order
+
+    复刻页面由 liuyunku_navigation.json 生成（缺少的 TARGET_ORDER 主导航自动补齐），
+    报告总耗时、RPC次数，以及每个主导航 / 大类 / 细分项的耗时、RPC和等待
+    taxonomy 时按分类模式运行（不截图、不等待结果区；复刻页面的图片是 data: URL，不经过请求拦截）
+    """
+    model = load_replica_model(fill_targets=TARGET_ORDER, max_items=max_items, max_navs=max_navs)
+    delays = scale_delays(factor=delay_scale)
+
+    with tempfile.TemporaryDirectory() as tmp, sync_playwright() as p:
+        url = write_replica(os.path.join(tmp, "replica.html"), model, delays, subdivisions)
+        browser = p.chromium.launch(headless=headless)
+        page = browser.new_page(viewport={"width": 1280, "height": 800})
+        page.goto(url)
+        automator, counter, results = run_profiled_crawl(page, tmp, taxonomy)
+        browser.close()
+
+    results["delays"] = delays
+    print_profiled_crawl(f"本地复刻页面（主导航 {len(model)} 个, 延迟 {delays}）", automator, counter, results)
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare_runs(current: Dict, baseline: Dict):
+    """按阶段对比两次回放的 p50 和总耗时"""
+    print(f"\n📈 与基线对比（{baseline.get('revision')} → {current.get('revision')}）")
+    print(f"  总耗时: {baseline['seconds']:.2f}s → {current['seconds']:.2f}s "
+          f"({current['seconds'] - baseline['seconds']:+.2f}s)  RPC: {baseline['rpc']} → {current['rpc']}")
+    for stage, stat in current["stages"].items():
+        before = baseline["stages"].get(stage)
+        if before is None:
+            print(f"  {stage:<20} p50 {stat['p50']:.2f}s（新增阶段）")
+            continue
+        print(f"  {stage:<20} p50 {before['p50']:.2f}s → {stat['p50']:.2f}s ({stat['p50'] - before['p50']:+.2f}s)  "
+              f"共 {before['total']:.1f}s → {stat['total']:.1f}s")
+
+
+def bench_har_replay(directory: str, headless: bool = True, save: Optional[str] = None,
+                     baseline: Optional[str] = None, taxonomy: bool = False) -> Dict:
+    """
+    离线回放 --record 录制的会话并运行完整爬取
+
+    save 时把结果（含当前提交）写成JSON，baseline 为之前保存的结果时按阶段对比
+    """
+    with tempfile.TemporaryDirectory() as tmp, sync_playwright() as p:
+        browser, page = open_replay(p, directory, headless=headless)
+        automator, counter, results = run_profiled_crawl(page, tmp, taxonomy)
+        browser.close()
+
+    results["revision"] = _git_revision()
+    results["manifest"] = load_manifest(directory)
+    print_profiled_crawl(f"HAR回放（{directory}）", automator, counter, results)
+
+    if save:
+        with open(save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"  结果已保存: {save}")
+    if baseline:
+        try:
+            with open(baseline, 'r', encoding='utf-8') as f:
+                compare_runs(results, json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  读取基线失败: {e}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="溜云库爬虫基准测试")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rpc", help="统计单个下拉菜单的RPC次数")
+    subparsers.add_parser("attach", help="在假桌面上对比首次连接与缓存连接")
+    subparsers.add_parser("uia", help="在假控件树上对比遍历查找与缓存查找")
+    subparsers.add_parser("cdp", help="用本地桩服务测量并校验CDP端口探测")
+    subparsers.add_parser("stream", help="校验 --resume 后流式记录的重建（去重、成功的记录优先）")
+    replica = subparsers.add_parser("replica", help="在本地复刻页面上运行完整的按序爬取")
+    replica.add_argument("--delay-scale", type=float, default=1.0, help="渲染延迟缩放比例")
+    replica.add_argument("--navs", type=int, default=None, help="最多处理的主导航数")
+    replica.add_argument("--items", type=int, default=8, help="每个大类最多保留的项数")
+    replica.add_argument("--subdivisions", type=int, default=DEFAULT_SUBDIVISIONS, help="每个细分面板的项数")
+    replica.add_argument("--taxonomy", action="store_true", help="分类模式（不截图）")
+    replay = subparsers.add_parser("replay", help="离线回放录制的会话并运行完整爬取")
+    replay.add_argument("directory", help="liuyunku_final_v2.py --record 的录制目录")
+    replay.add_argument("--save", default=None, help="把本次结果保存为JSON（供之后对比）")
+    replay.add_argument("--baseline", default=None, help="之前保存的结果JSON，按阶段对比")
+    replay.add_argument("--taxonomy", action="store_true", help="分类模式（不截图）")
+
+    args = parser.parse_args()
+    setup_logging({"file_output": False})
+
+    if args.command == "rpc":
+        bench_dropdown_rpc(headless=not args.headed)
+    elif args.command == "attach":
+        bench_attach()
+    elif args.command == "uia":
+        bench_uia()
+    elif args.command == "cdp":
+        bench_cdp_probe()
+    elif args.command == "stream":
+        check_stream_resume()
+    elif args.command == "replica":
+        bench_replica(headless=not args.headed, delay_scale=args.delay_scale, max_navs=args.navs,
+                      max_items=args.items, subdivisions=args.subdivisions, taxonomy=args.taxonomy)
+    elif args.command == "replay":
+        bench_har_replay(args.directory, headless=not args.headed, save=args.save, baseline=args.baseline,
+                         taxonomy=args.taxonomy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# 溜云库截图配置：按 OUTPUT_CONFIG["capture_profiles"] 裁剪到结果区、选择格式和缩放
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+from playwright.sync_api import Page
+from liuyunku_config import OUTPUT_CONFIG, SELECTOR_CONFIG
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# 各格式的文件扩展名
+EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+
+
+def get_profile(name: Optional[str] = None) -> Dict:
+    """取出截图配置，缺省字段使用默认值"""
+    name = name or OUTPUT_CONFIG["capture_profile"]
+    profile = {"clip": None, "format": "png", "quality": 80, "scale": 1.0}
+    profile.update(OUTPUT_CONFIG["capture_profiles"][name])
+    profile["name"] = name
+    return profile
+
+
+def _clip_selector(clip: Optional[str]) -> Optional[str]:
+    return SELECTOR_CONFIG.get(clip, clip) if clip else None
+
+
+def _valid_box(box: Optional[Dict]) -> Optional[Dict]:
+    """元素不存在或不可见时返回 None（退回整个窗口）"""
+    if not box or box["width"] < 1 or box["height"] < 1:
+        return None
+    return box
+
+
+def _screenshot_options(profile: Dict, box: Optional[Dict]) -> Dict:
+    """
+    浏览器端截图参数
+
+    PNG/JPEG 且不缩放时直接由浏览器编码；WebP 或需要缩放时先截取PNG再交给Pillow处理。
+    未安装Pillow时退回浏览器原生的PNG/JPEG
+    """
+    fmt = profile["format"]
+    if _needs_pillow(profile):
+        return {"type": "png", "clip": box}
+    options = {"type": "png" if fmt == "webp" else fmt, "clip": box}
+    if fmt == "jpeg":
+        options["quality"] = profile["quality"]
+    return options
+
+
+def _needs_pillow(profile: Dict) -> bool:
+    return Image is not None and (profile["format"] == "webp" or profile["scale"] < 1.0)
+
+
+def _encode(raw: bytes, profile: Dict, options: Dict) -> Tuple[bytes, str]:
+    """按配置缩放并编码，返回 (图片字节, 扩展名)"""
+    if not _needs_pillow(profile):
+        return raw, EXTENSIONS[options["type"]]
+
+    fmt = profile["format"]
+    with Image.open(BytesIO(raw)) as image:
+        if profile["scale"] < 1.0:
+            size = (max(1, int(image.width * profile["scale"])), max(1, int(image.height * profile["scale"])))
+            image = image.resize(size, Image.LANCZOS)
+
+        buffer = BytesIO()
+        if fmt == "jpeg":
+            image.convert("RGB").save(buffer, format="JPEG", quality=profile["quality"], optimize=True)
+        elif fmt == "webp":
+            image.save(buffer, format="WEBP", quality=profile["quality"], method=4)
+        else:
+            image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue(), EXTENSIONS[fmt]
+
+
+def capture(page: Page, profile: Dict) -> Tuple[bytes, str]:
+    """按截图配置截图，返回 (图片字节, 扩展名)"""
+    box = None
+    selector = _clip_selector(profile["clip"])
+    if selector:
+        try:
+            box = _valid_box(page.locator(selector).first.bounding_box(timeout=1000))
+        except Exception:
+            box = None
+
+    options = _screenshot_options(profile, box)
+    return _encode(page.screenshot(**options), profile, options)
+
+
+async def capture_async(page, profile: Dict) -> Tuple[bytes, str]:
+    """capture 的异步版本（playwright.async_api 的 Page）"""
+    box = None
+    selector = _clip_selector(profile["clip"])
+    if selector:
+        try:
+            box = _valid_box(await page.locator(selector).first.bounding_box(timeout=1000))
+        except Exception:
+            box = None
+
+    options = _screenshot_options(profile, box)
+    return _encode(await page.screenshot(**options), profile, options)
@@ -0,0 +1,95 @@
+# 溜云库CDP端口探测：并发请求各端口的 /json/version，只对存活的端口调用 connect_over_cdp
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+from typing import List, Dict, Optional
+from liuyunku_config import BROWSER_CONFIG
+
+
+def probe_port(port: str, host: str = "localhost", timeout: float = 0.5) -> Dict:
+    """
+    请求 http://host:port/json/version
+
+    返回 {"port", "ok", "latency", "browser", "ws_url", "error"}
+    """
+    start = time.perf_counter()
+    result = {"port": port, "ok": False, "latency": None, "browser": None, "ws_url": None, "error": None}
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/json/version", timeout=timeout) as response:
+            info = json.loads(response.read().decode("utf-8"))
+        result.update(ok=True, browser=info.get("Browser"), ws_url=info.get("webSocketDebuggerUrl"))
+    except Exception as e:
+        result["error"] = str(e)
+    result["latency"] = time.perf_counter() - start
+    return result
+
+
+def probe_ports(ports: List[str], host: str = "localhost", timeout: Optional[float] = None) -> List[Dict]:
+    """并发探测所有端口，结果按 ports 的顺序返回"""
+    timeout = BROWSER_CONFIG["probe_timeout"] if timeout is None else timeout
+    with ThreadPoolExecutor(max_workers=max(1, len(ports))) as executor:
+        return list(executor.map(lambda port: probe_port(port, host, timeout), ports))
+
+
+def pick_live_port(probes: List[Dict]) -> Optional[Dict]:
+    """按端口优先顺序（缓存的端口在前）选出第一个存活的端口"""
+    for probe in probes:
+        if probe["ok"]:
+            return probe
+    return None
+
+
+def find_live_port(ports: List[str], host: str = "localhost", timeout: Optional[float] = None,
+                   prefer_wait: Optional[float] = None) -> Optional[Dict]:
+    """
+    并发探测所有端口，返回存活端口，不等待其余端口超时
+
+    ports[0] 为首选端口（缓存的端口）：其他端口先响应时最多再等它 prefer_wait 秒，它存活就选它，
+    否则选先响应的端口。耗时不超过 timeout + prefer_wait；所有端口都不可用时返回 None
+    """
+    timeout = BROWSER_CONFIG["probe_timeout"] if timeout is None else timeout
+    prefer_wait = BROWSER_CONFIG["probe_prefer_wait"] if prefer_wait is None else prefer_wait
+    if not ports:
+        return None
+    executor = ThreadPoolExecutor(max_workers=len(ports))
+    try:
+        futures = [executor.submit(probe_port, port, host, timeout) for port in ports]
+        preferred = futures[0]
+        for future in as_completed(futures):
+            probe = future.result()
+            if not probe["ok"]:
+                continue
+            if future is not preferred:
+                try:
+                    first = preferred.result(timeout=prefer_wait)
+                    if first["ok"]:
+                        return first
+                except FutureTimeout:
+                    pass
+            return probe
+        return None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def list_targets(cdp_url: str, timeout: Optional[float] = None) -> Optional[List[Dict]]:
+    """
+    一次请求 cdp_url/json/list 取得所有页面目标的 {"id", "title", "url"}（不需要逐个页面evaluate）
+
+    cdp_url 不是 http 地址或请求失败时返回 None
+    """
+    timeout = BROWSER_CONFIG["probe_timeout"] if timeout is None else timeout
+    if not cdp_url or not cdp_url.startswith("http"):
+        return None
+    try:
+        with urllib.request.urlopen(f"{cdp_url.rstrip('/')}/json/list", timeout=timeout) as response:
+            targets = json.loads(response.read().decode("utf-8"))
+        return [target for target in targets if target.get("type") == "page"]
+    except Exception:
+        return None
+
+
+def cdp_endpoint(probe: Dict, host: str = "localhost") -> str:
+    """connect_over_cdp 使用的地址：优先用探测得到的 WebSocket 地址，省去一次 /json/version 请求"""
+    return probe["ws_url"] or f"http://{host}:{probe['port']}"
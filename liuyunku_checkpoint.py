@@ -0,0 +1,119 @@
+# 溜云库爬取检查点：只追加的JSONL日志，每完成一个 (主导航, 大类, 细分项) 记录一行
+import json
+import os
+from typing import Dict, Optional
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class CheckpointJournal:
+    """
+    检查点日志
+
+    每行一个JSON记录：
+        {"type": "subcategory", "nav", "category", "subcategory", "data"}  细分项完成
+        {"type": "category", "nav", "category", "data"}                    大类完成（data不含细分项）
+        {"type": "nav", "nav", "data"}                                     主导航完成（data不含大类）
+    每行写入后 flush + fsync，崩溃时最多丢失正在写的那一行
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.subcategories: Dict[tuple, Dict] = {}
+        self.categories: Dict[tuple, Dict] = {}
+        self.navs: Dict[str, Dict] = {}
+
+        if resume:
+            self.load()
+        elif os.path.exists(path):
+            os.remove(path)
+
+        self.file = open(path, 'a', encoding='utf-8')
+        if resume and self._ends_without_newline():
+            # 上次崩溃留下的不完整行单独成行，避免与新记录粘连
+            self._append_raw("\n")
+
+    def _ends_without_newline(self) -> bool:
+        if os.path.getsize(self.path) == 0:
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def load(self) -> int:
+        """读取已有日志，返回有效记录数；最后一行不完整时忽略"""
+        if not os.path.exists(self.path):
+            logger.warning("⚠️  未找到检查点日志: %s，从头开始", self.path)
+            return 0
+
+        count = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("⚠️  检查点第 %s 行不完整，已忽略", line_no)
+                    continue
+
+                if record["type"] == "subcategory":
+                    self.subcategories[(record["nav"], record["category"], record["subcategory"])] = record["data"]
+                elif record["type"] == "category":
+                    self.categories[(record["nav"], record["category"])] = record["data"]
+                elif record["type"] == "nav":
+                    self.navs[record["nav"]] = record["data"]
+                count += 1
+
+        logger.info("📒 已加载检查点: %s 个主导航、%s 个大类、%s 个细分项已完成",
+                    len(self.navs), len(self.categories), len(self.subcategories))
+        return count
+
+    def _append(self, record: Dict):
+        self._append_raw(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _append_raw(self, text: str):
+        self.file.write(text)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def record_subcategory(self, nav: str, category: str, subcategory: str, data: Dict):
+        self.subcategories[(nav, category, subcategory)] = data
+        self._append({"type": "subcategory", "nav": nav, "category": category, "subcategory": subcategory, "data": data})
+
+    def record_category(self, nav: str, category_data: Dict):
+        data = {k: v for k, v in category_data.items() if k != "subcategories"}
+        self.categories[(nav, category_data["title"])] = data
+        self._append({"type": "category", "nav": nav, "category": category_data["title"], "data": data})
+
+    def record_nav(self, nav_data: Dict):
+        data = {k: v for k, v in nav_data.items() if k != "categories"}
+        self.navs[nav_data["text"]] = data
+        self._append({"type": "nav", "nav": nav_data["text"], "data": data})
+
+    def subcategory_data(self, nav: str, category: str, subcategory: str) -> Optional[Dict]:
+        return self.subcategories.get((nav, category, subcategory))
+
+    def category_data(self, nav: str, category: str) -> Optional[Dict]:
+        """已完成大类的完整数据（含已记录的细分项），未完成时返回 None"""
+        data = self.categories.get((nav, category))
+        if data is None:
+            return None
+        subcategories = [sub for key, sub in self.subcategories.items() if key[0] == nav and key[1] == category]
+        return dict(data, subcategories=subcategories)
+
+    def nav_data(self, nav: str) -> Optional[Dict]:
+        """已完成主导航的完整数据（含已完成的大类），未完成时返回 None"""
+        data = self.navs.get(nav)
+        if data is None:
+            return None
+        categories = [self.category_data(nav, key[1]) for key in self.categories if key[0] == nav]
+        return dict(data, categories=categories)
+
+    def close(self):
+        try:
+            self.file.close()
+        except:
+            pass
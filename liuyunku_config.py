@@ -7,14 +7,37 @@ APP_CONFIG = {
     "model_library_keyword": "模型库",  # 模型库页面关键词
     "startup_timeout": 30,  # 启动超时时间（秒）
     "operation_delay": 2,  # 操作间隔时间（秒）
+    "attach_cache_file": "liuyunku_attach.json",  # 上次连接的PID、窗口句柄和CDP端口
+    # UIA控件查找条件（control_type / title_re / auto_id，title_re 从开头匹配）
+    "uia_targets": {
+        "online_material": {"control_type": "RadioButton", "title_re": ".*在线.*", "auto_id": None},
+        "model_library": {"control_type": "Text", "title_re": ".*(模型库|在线素材).*", "auto_id": None},
+    },
 }
 # 浏览器连接配置
 BROWSER_CONFIG = {
     "cdp_ports": ['9222', '9333', '9444', '9555'],  # CDP端口列表
     "connection_retries": 3,  # 连接重试次数
     "connection_timeout": 10,  # 连接超时时间（秒）
+    "probe_timeout": 0.5,  # 探测 /json/version 的超时（秒）
+    "probe_prefer_wait": 0.1,  # 其他端口先响应时，再等待首选（缓存）端口的时间（秒）
+    "probe_retry_delay": 1,  # 所有端口都未响应时的重试间隔（秒）
     "page_timeout": 15000,  # 页面操作超时（毫秒）
-    "network_idle_timeout": 15000,  # 网络空闲超时（毫秒）
+    # 结果区就绪检测（毫秒）：结果区静止 result_quiet_ms 后就绪；点击后 result_unchanged_ms 内结果区没有任何变更
+    # （包括 aria-busy 切换）才把已有卡片视为"结果与点击前相同"，后端较慢时应调大
+    "result_quiet_ms": 200,
+    "result_unchanged_ms": 3000,
+    "result_ready_timeout": 10000,
+    # 点击大类后下拉菜单开始变更，panel_grace_ms 内仍未出现"细分"容器则视为没有细分面板（毫秒）
+    "panel_grace_ms": 1500,
+    "target_url_keywords": ["liuyunku", "lyk"],  # 溜云库页面URL关键词（选择CDP目标页面）
+    "target_title_keywords": ["溜云库"],  # 溜云库页面标题关键词
+    "in_page_click": True,  # 大类下钻时在页面内派发点击事件（单次RPC），无响应时改用真实点击
+    # 分类模式（只爬分类结构、不截图）中止的请求类型；taxonomy_block_api 时同时中止素材列表API请求
+    "taxonomy_block_types": ["image", "font", "media"],
+    "taxonomy_block_api": False,
+    "material_api_patterns": [r"/api/.*material", r"/material/(list|search)"],  # 素材列表API的URL（正则）
+    "material_id_keys": ["id", "materialId", "material_id", "uuid"],  # 素材记录中的ID字段（按顺序取第一个）
 }
 # 导航选择器配置
 SELECTOR_CONFIG = {
@@ -27,7 +50,9 @@ SELECTOR_CONFIG = {
     "subcategory_item": "li",
     "subcategory_text": "span",
     "close_button": "span[class*='maxClassList_close__']",
-    "active_class": "maxClassList_active__9kpsY",
+    "active_class": "maxClassList_active__",  # 激活样式的类名前缀（CSS Modules 哈希后缀随版本变化，不写入）
+    "result_container": "div[class*='materialList_']",  # 素材结果区（截图裁剪范围）
+    "result_card": "[class*='materialList_card']",  # 结果区中的素材卡片（就绪检测）
 }
 # 测试用例配置
 TEST_CASES = [
@@ -45,9 +70,31 @@ TEST_CASES = [
 # 输出配置
 OUTPUT_CONFIG = {
     "navigation_data_file": "liuyunku_navigation.json",
+    "final_navigation_file": "liuyunku_navigation_final_v2.json",  # liuyunku_final_v2.py 的导航输出（增量爬取的基线）
+    "incremental_navigation_file": "liuyunku_navigation_incremental.json",  # 增量爬取的导航输出
     "screenshot_dir": "screenshots",
     "log_file": "liuyunku_automation.log",
+    "checkpoint_file": "liuyunku_checkpoint.jsonl",  # 断点续爬日志
+    "stream_file": "liuyunku_navigation.jsonl",  # 流式输出（每个细分项一行）
+    "timing_file": "liuyunku_timings.jsonl",  # 阶段计时（每个span一行）
+    "capture_responses": True,  # 捕获素材列表接口的JSON响应
+    "response_file": "liuyunku_materials.jsonl",  # 素材列表记录（按导航路径，素材按ID去重）
     "save_screenshots": True,
+    "screenshot_writers": 2,  # 后台截图写入线程数
+    "screenshot_queue_size": 8,  # 截图队列上限（满时阻塞爬取线程）
+    "screenshot_compress": True,  # 用Pillow重新压缩PNG（未安装Pillow时跳过）
+    "screenshot_dedup": True,  # 按感知哈希去重，截图存入 screenshots/store（需要NumPy和Pillow）
+    "dedup_threshold": 5,  # dHash汉明距离不超过此值视为近似
+    "capture_profile": "grid",  # 细分项截图使用的配置
+    "initial_capture_profile": "full",  # 初始页面截图使用的配置
+    # 截图配置：clip 为 SELECTOR_CONFIG 键名或CSS选择器（None为整个窗口），
+    # format 为 png/jpeg/webp（webp需要Pillow），quality 用于jpeg/webp，scale<1时用Pillow缩小
+    "capture_profiles": {
+        "full": {"clip": None, "format": "png"},
+        "grid": {"clip": "result_container", "format": "jpeg", "quality": 80},
+        "grid_webp": {"clip": "result_container", "format": "webp", "quality": 75},
+        "thumbnail": {"clip": "result_container", "format": "webp", "quality": 70, "scale": 0.5},
+    },
     "save_json": True,
 }
 # 日志配置
@@ -55,5 +102,8 @@ LOG_CONFIG = {
     "level": "INFO",  # DEBUG, INFO, WARNING, ERROR
     "console_output": True,
     "file_output": True,
-    "log_format": "%(asctime)s - %(levelname)s - %(message)s",
+    "log_format": "%(asctime)s - %(levelname)s - %(message)s",  # 文件日志格式
+    "console_format": "%(message)s",  # 控制台只输出消息本身（与原先的 print 一致）
+    "json_format": False,  # 文件日志改为每行一个JSON对象（便于机器解析）
+    "queue_size": -1,  # 文件日志队列上限（-1 不限），由后台线程写盘
 }
\ No newline at end of file
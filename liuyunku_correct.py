@@ -1,10 +1,12 @@
 import time
 import json
 import os
-from typing import List, Dict, Optional
-from playwright.sync_api import sync_playwright, Browser, Page, ElementHandle
+from typing import List, Dict
+from playwright.sync_api import sync_playwright
 from pywinauto import Application, Desktop
 import psutil
+from liuyunku_config import SELECTOR_CONFIG
+from liuyunku_selectors import has_class_prefix
 class LiuYunKuNavigationAutomator:
     """溜云库导航自动化器 - 正确层级版"""
     
@@ -257,7 +259,7 @@ class LiuYunKuNavigationAutomator:
                         if text.strip() == target_text:
                             data_id = item.get_attribute("data-rfd-draggable-id")
                             data_type = text_elem.get_attribute("datatype")
-                            is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
+                            is_active = has_class_prefix(item.get_attribute("class"), SELECTOR_CONFIG["active_class"])
                             
                             nav_item = {
                                 "index": idx,
@@ -469,10 +471,10 @@ class LiuYunKuNavigationAutomator:
                                 continue
                             
                             # 检查激活状态
-                            is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
+                            is_active = has_class_prefix(item.get_attribute("class"), SELECTOR_CONFIG["active_class"])
                             
                             # 检查是否有关闭按钮
-                            has_close_btn = item.query_selector("span[class*='maxClassList_close__']") is not None
+                            has_close_btn = item.query_selector(SELECTOR_CONFIG["close_button"]) is not None
                             
                             subcategory = {
                                 "text": text.strip(),
@@ -1,10 +1,12 @@
 import time
 import json
 import os
-from typing import List, Dict, Optional
-from playwright.sync_api import sync_playwright, Browser, Page, ElementHandle
+from typing import List, Dict
+from playwright.sync_api import sync_playwright
 from pywinauto import Application, Desktop
 import psutil
+from liuyunku_config import SELECTOR_CONFIG
+from liuyunku_selectors import has_class_prefix
 class LiuYunKuNavigationAutomator:
     """溜云库导航自动化器 - 最终优化版"""
     
@@ -251,7 +253,7 @@ class LiuYunKuNavigationAutomator:
                     
                     data_id = item.get_attribute("data-rfd-draggable-id")
                     data_type = text_elem.get_attribute("datatype")
-                    is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
+                    is_active = has_class_prefix(item.get_attribute("class"), SELECTOR_CONFIG["active_class"])
                     
                     main_navs.append({
                         "index": idx,
@@ -384,8 +386,8 @@ class LiuYunKuNavigationAutomator:
                             if not text:
                                 continue
                             
-                            is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
-                            has_close_btn = item.query_selector("span[class*='maxClassList_close__']") is not None
+                            is_active = has_class_prefix(item.get_attribute("class"), SELECTOR_CONFIG["active_class"])
+                            has_close_btn = item.query_selector(SELECTOR_CONFIG["close_button"]) is not None
                             
                             first_level_subcategories.append({
                                 "text": text.strip(),
@@ -481,8 +483,8 @@ class LiuYunKuNavigationAutomator:
                                 if not text:
                                     continue
                                 
-                                is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
-                                has_close_btn = item.query_selector("span[class*='maxClassList_close__']") is not None
+                                is_active = has_class_prefix(item.get_attribute("class"), SELECTOR_CONFIG["active_class"])
+                                has_close_btn = item.query_selector(SELECTOR_CONFIG["close_button"]) is not None
                                 
                                 second_level_subcategories.append({
                                     "text": text.strip(),
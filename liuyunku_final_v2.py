@@ -1,334 +1,392 @@
+import argparse
+import logging
+import os
 import time
 import json
-import os
 from typing import List, Dict, Optional
-from playwright.sync_api import sync_playwright, Browser, Page, ElementHandle
-from pywinauto import Application, Desktop
-import psutil
+from playwright.sync_api import sync_playwright
+from liuyunku_snapshot import (
+    snapshot_dropdown, get_categories, to_subcategories, find_subdivision_items, item_locator,
+    category_fingerprint, dropdown_fingerprint, snapshot_navigation, build_nav_index, lookup_nav,
+    resolve_nav_targets, with_nav_locators, VISIBLE_DROPDOWN,
+)
+from liuyunku_selectors import SelectorRegistry
+from liuyunku_waits import PageWaiter
+from liuyunku_locators import LocatorRegistry
+from liuyunku_panel import SubdivisionPanelWatcher
+from liuyunku_checkpoint import CheckpointJournal
+from liuyunku_spans import SpanRecorder
+from liuyunku_logging import get_logger, setup_logging, shutdown_logging
+from liuyunku_stream import NavigationStreamWriter, rebuild_navigation
+from liuyunku_screenshots import ScreenshotWriterPool, open_pool
+from liuyunku_phash import ScreenshotStore
+from liuyunku_capture import capture, get_profile
+from liuyunku_routing import TaxonomyMode
+from liuyunku_responses import ResponseCapture
+from liuyunku_har import SessionRecorder
+from liuyunku_windows import WindowManager, PywinautoWindowManager, AttachCache, WindowAttacher
+from liuyunku_cdp import find_live_port, cdp_endpoint
+from liuyunku_targets import PagePool, rank_pages
+from liuyunku_uia import UiaBackend, PywinautoUiaBackend, UiaLocator
+from liuyunku_config import OUTPUT_CONFIG, BROWSER_CONFIG
+
+logger = get_logger(__name__)
+
+# 主导航处理顺序
+TARGET_ORDER = ["3D模型", "SU模型", "材质", "贴图", "CAD", "灯光", "光域网", "PS免抠"]
+
+
+def is_skipped_category(nav_text: str, category_title: str) -> bool:
+    """🚨 特殊规则：跳过"贴图类目-免抠素材大类"（同步引擎、异步引擎和增量爬取共用）"""
+    return nav_text == "贴图" and category_title == "免抠素材"
+
 class LiuYunKuNavigationAutomator:
     """溜云库导航自动化器 - 最终优化版V2"""
     
-    def __init__(self, exe_path=r"D:\LiuYunKu4\LiuYunKu.exe"):
+    def __init__(self, exe_path=r"D:\LiuYunKu4\LiuYunKu.exe", use_snapshot: bool = True,
+                 window_manager: Optional[WindowManager] = None, uia_backend: Optional[UiaBackend] = None):
         self.exe_path = exe_path
+        self.window_manager = window_manager  # 窗口管理（默认pywinauto，测试时可传入 FakeDesktop）
+        self.uia_backend = uia_backend  # UIA查找（默认pywinauto，测试时可传入 FakeUiaBackend）
+        self.uia = None  # 主窗口的UIA控件查找器（UiaLocator），缓存在线素材按钮和模型库标记
+        self.attacher = None  # 主窗口连接器（带PID/句柄/CDP端口缓存），首次连接时创建
+        self.attach_cache = None  # 未通过连接器连接窗口时单独使用的连接缓存
+        self.page_pool = None  # 按分数排序的候选页面（PagePool），连接浏览器时建立
+        self.use_snapshot = use_snapshot  # 快照模式：一次evaluate读取整个下拉菜单
         self.app = None
         self.main_window = None
         self.playwright = None
         self.browser = None
         self.page = None
+        self.cdp_url = None
         self.navigation_data = {}
+        self.dropdown_snapshot = None
+        self.nav_index = None  # 主导航索引（build_nav_index），首次读取主导航时建立
+        self.selectors = SelectorRegistry()  # 选择器注册表，首次读取主导航时在页面上校验
+        self.nav_resolution = None  # 按 TARGET_ORDER 解析的结果，含未找到的目标
+        self.waiter = None
+        self.locators = None  # 定位器注册表（LocatorRegistry），与等待器一起按页面创建
+        self.panel_watcher = None  # 细分面板监视器（SubdivisionPanelWatcher）
+        self.journal = None  # 检查点日志（CheckpointJournal），为None时不记录
+        self.incomplete = 0  # 本次运行中未完成的大类数（有失败的细分项），所在主导航不写入检查点
+        self.stream = None  # 流式JSONL输出（NavigationStreamWriter），为None时不输出
+        self.keep_tree = True  # 是否在内存中保留完整导航树（仅流式输出时可关闭）
+        self.last_visit = {}  # 最近一次细分项访问的耗时和截图路径
+        self.spans = SpanRecorder()  # 各阶段计时（main 中写入JSONL），结束时汇总分位数
+        self.screenshot_pool = None  # 后台截图写入池，首次截图时创建
+        self.screenshot_store = None  # 去重的内容寻址截图库（OUTPUT_CONFIG["screenshot_dedup"]）
+        self.capture_profile = get_profile()  # 细分项截图配置（裁剪范围、格式、缩放）
+        self.save_screenshots = OUTPUT_CONFIG["save_screenshots"]  # 关闭时进入分类模式：不截图并拦截图片等资源
+        self.taxonomy = None  # 分类模式的请求拦截（TaxonomyMode），仅在不截图时安装
+        self.responses = None  # 素材列表接口捕获（ResponseCapture），为None时不捕获
+        self.recorder = None  # 会话录制（SessionRecorder），录制时保存每个下拉菜单的DOM夹具
         
+    def get_attacher(self) -> WindowAttacher:
+        """获取主窗口连接器"""
+        if self.attacher is None:
+            manager = self.window_manager or PywinautoWindowManager()
+            self.attacher = WindowAttacher(manager, self.get_attach_cache())
+        return self.attacher
+    
     def start_application(self, timeout=30) -> bool:
-        """启动溜云库应用"""
+        """启动溜云库应用（已运行时直接连接，优先使用上次的PID和窗口句柄）"""
         try:
-            print("🚀 正在启动溜云库...")
+            logger.info("🚀 正在启动溜云库...")
             
-            # 检查进程是否已存在
-            for proc in psutil.process_iter(['name']):
-                if proc.info['name'] == 'LiuYunKu.exe':
-                    print("⚠️  检测到溜云库已在运行，尝试连接...")
-                    return self.connect_to_existing_window()
+            attacher = self.get_attacher()
+            self.main_window = attacher.attach(self.exe_path, timeout)
+            attach = attacher.last_attach
             
-            # 启动新应用
-            self.app = Application(backend="uia").start(self.exe_path)
-            success = self.wait_for_main_window(timeout)
-            
-            if success:
-                print("✅ 溜云库启动成功")
+            if self.main_window:
+                logger.info("✅ 已连接溜云库窗口: %s (方式: %s, 耗时 %.2fs)",
+                            self.main_window.window_text(), attach['method'], attach['seconds'])
                 return True
             else:
-                print("❌ 溜云库启动失败")
+                logger.error("❌ 溜云库启动失败")
                 return False
                 
         except Exception as e:
-            print(f"❌ 启动应用时出错: {e}")
+            logger.error("❌ 启动应用时出错: %s", e)
             return False
     
     def connect_to_existing_window(self, timeout=30) -> bool:
         """连接到已运行的溜云库窗口"""
         try:
-            desktop = Desktop(backend="uia")
-            start_time = time.time()
-            
-            while time.time() - start_time < timeout:
-                for window in desktop.windows():
-                    if window.is_visible():
-                        try:
-                            text = window.window_text()
-                            if "溜云库" in text:
-                                self.main_window = window
-                                print(f"✅ 连接到现有窗口: {text}")
-                                return True
-                        except:
-                            continue
-                time.sleep(2)
+            self.main_window = self.get_attacher().attach_cached() or self.get_attacher().find_window(timeout)
+            if self.main_window:
+                logger.info("✅ 连接到现有窗口: %s", self.main_window.window_text())
+                return True
             
-            print("❌ 未找到现有溜云库窗口")
+            logger.error("❌ 未找到现有溜云库窗口")
             return False
             
         except Exception as e:
-            print(f"❌ 连接现有窗口失败: {e}")
+            logger.error("❌ 连接现有窗口失败: %s", e)
             return False
     
     def wait_for_main_window(self, timeout=30) -> bool:
         """等待主窗口出现"""
         try:
-            desktop = Desktop(backend="uia")
-            start_time = time.time()
-            
-            while time.time() - start_time < timeout:
-                for window in desktop.windows():
-                    if window.is_visible():
-                        try:
-                            text = window.window_text()
-                            if "溜云库" in text:
-                                self.main_window = window
-                                print(f"✅ 找到主窗口: {text}")
-                                return True
-                        except:
-                            continue
-                
-                print("⏳ 等待窗口加载...")
-                time.sleep(2)
+            self.main_window = self.get_attacher().find_window(timeout)
+            if self.main_window:
+                logger.info("✅ 找到主窗口: %s", self.main_window.window_text())
+                return True
             
-            print("❌ 等待窗口超时")
+            logger.error("❌ 等待窗口超时")
             return False
             
         except Exception as e:
-            print(f"❌ 等待窗口失败: {e}")
+            logger.error("❌ 等待窗口失败: %s", e)
             return False
     
+    def get_uia(self) -> UiaLocator:
+        """获取主窗口的UIA控件查找器（主窗口变化后重建）"""
+        if self.uia is None or self.uia.root is not self.main_window:
+            self.uia = UiaLocator(self.uia_backend or PywinautoUiaBackend(), self.main_window)
+        return self.uia
+    
     def navigate_to_online_material(self) -> bool:
         """导航到在线素材页面"""
         try:
             if not self.main_window:
-                print("❌ 主窗口未找到")
+                logger.error("❌ 主窗口未找到")
                 return False
             
-            print("📍 设置窗口焦点...")
+            logger.info("📍 设置窗口焦点...")
             self.main_window.set_focus()
             time.sleep(2)
             
             # 检查是否已经在在线素材页面
             if self.check_online_material():
-                print("✅ 已处于在线素材页面")
+                logger.info("✅ 已处于在线素材页面")
                 return True
             
-            print("🔍 查找在线素材RadioButton...")
-            radio_buttons = self.main_window.descendants(control_type="RadioButton")
+            logger.info("🔍 查找在线素材RadioButton...")
+            radio = self.get_uia().find("online_material")
+            if radio is None:
+                logger.error("❌ 未找到在线素材RadioButton")
+                return False
             
-            for radio in radio_buttons:
-                try:
-                    text = radio.window_text()
-                    print(f"发现RadioButton: {text}")
-                    
-                    if "在线" in text:
-                        print(f"✅ 找到在线素材: {text}")
-                        radio.click_input()
-                        print("✅ 点击在线素材成功!")
-                        time.sleep(3)  # 等待页面加载
-                        
-                        # 验证是否成功切换
-                        if self.check_online_material():
-                            return True
-                        else:
-                            print("⚠️  点击后验证失败，尝试重试...")
-                            radio.click_input()
-                            time.sleep(3)
-                            return self.check_online_material()
-                            
-                except Exception as e:
-                    print(f"处理RadioButton时出错: {e}")
-                    continue
+            logger.info("✅ 找到在线素材: %s", radio.window_text())
+            for attempt in range(2):
+                radio.click_input()
+                logger.info("✅ 点击在线素材成功!" if attempt == 0 else "⚠️  点击后验证失败，已重试点击")
+                
+                # 等待页面加载：模型库标记出现即完成
+                if self.wait_for_online_material(timeout=3):
+                    return True
             
-            print("❌ 未找到在线素材RadioButton")
             return False
             
         except Exception as e:
-            print(f"❌ 导航到在线素材失败: {e}")
+            logger.error("❌ 导航到在线素材失败: %s", e)
             return False
     
     def check_online_material(self) -> bool:
-        """检查是否已处于在线素材页面"""
+        """检查是否已处于在线素材页面（模型库标记存在）"""
         try:
             if not self.main_window:
                 return False
             
-            text_blocks = self.main_window.descendants(control_type="Text")
-            for block in text_blocks:
-                try:
-                    text = block.window_text()
-                    if "模型库" in text or "在线素材" in text:
-                        print(f"✅ 检测到在线素材页面: {text}")
-                        return True
-                except:
-                    continue
+            marker = self.get_uia().find("model_library")
+            if marker is not None:
+                logger.info("✅ 检测到在线素材页面: %s", marker.window_text())
+                return True
             
             return False
             
         except Exception as e:
-            print(f"❌ 检查在线素材状态失败: {e}")
+            logger.error("❌ 检查在线素材状态失败: %s", e)
             return False
     
+    def wait_for_online_material(self, timeout: float = 3, poll_interval: float = 0.2) -> bool:
+        """轮询模型库标记，直到出现或超时"""
+        deadline = time.time() + timeout
+        while True:
+            if self.check_online_material():
+                return True
+            if time.time() >= deadline:
+                return False
+            time.sleep(poll_interval)
+    
+    def get_attach_cache(self) -> AttachCache:
+        """连接缓存（与主窗口连接器共用；未连接窗口时单独读取）"""
+        if self.attacher is not None:
+            return self.attacher.cache
+        if self.attach_cache is None:
+            self.attach_cache = AttachCache()
+        return self.attach_cache
+    
+    def cdp_ports(self) -> List[str]:
+        """CDP端口列表，连接缓存中记录的端口排在最前"""
+        ports = list(BROWSER_CONFIG["cdp_ports"])
+        cached = self.get_attach_cache().get("cdp_port")
+        if cached:
+            ports = [cached] + [port for port in ports if port != cached]
+        return ports
+    
     def connect_to_browser(self, max_retries=3) -> bool:
-        """连接到溜云库内的浏览器"""
+        """连接到溜云库内的浏览器：先并发探测所有CDP端口，只连接存活的端口"""
         try:
-            print("🌐 尝试连接到浏览器...")
+            logger.info("🌐 尝试连接到浏览器...")
             
             # 初始化Playwright（同步模式）
             self.playwright = sync_playwright().start()
             
             for attempt in range(max_retries):
                 try:
-                    # 尝试不同的CDP端口
-                    ports = ['9222', '9333', '9444', '9555']
+                    # 并发请求各端口的 /json/version，取最先响应的存活端口
+                    start = time.perf_counter()
+                    live = find_live_port(self.cdp_ports())
+                    logger.info("🔗 探测CDP端口: %s (%.0fms)", live['port'] if live else '无存活端口',
+                                (time.perf_counter() - start) * 1000)
                     
-                    for port in ports:
+                    if live:
                         try:
-                            cdp_url = f"http://localhost:{port}"
-                            print(f"🔗 尝试连接CDP: {cdp_url}")
-                            
                             # 连接CDP
-                            self.browser = self.playwright.chromium.connect_over_cdp(cdp_url)
-                            print("✅ 成功连接到浏览器")
+                            self.browser = self.playwright.chromium.connect_over_cdp(cdp_endpoint(live))
+                            self.cdp_url = f"http://localhost:{live['port']}"
+                            self.get_attach_cache().update(cdp_port=live["port"])
+                            logger.info("✅ 成功连接到浏览器: %s (%s)", self.cdp_url, live['browser'])
                             
-                            # 获取页面
-                            if self.browser.contexts and self.browser.contexts[0].pages:
-                                self.page = self.browser.contexts[0].pages[0]
-                            else:
-                                self.page = self.browser.new_page()
+                            # 在所有上下文的页面中选出溜云库页面（有导航列表的优先）
+                            self.page_pool = PagePool(rank_pages(self.browser, cdp_url=self.cdp_url))
+                            self.page_pool.print_summary()
+                            self.page = self.page_pool.acquire() or self.browser.new_page()
                             
                             # 设置页面超时
                             self.page.set_default_timeout(15000)
                             self.page.set_default_navigation_timeout(15000)
                             
-                            print("✅ 获取页面成功")
+                            logger.info("✅ 获取页面成功")
                             return True
                             
                         except Exception as e:
-                            print(f"端口 {port} 连接失败: {e}")
-                            continue
+                            logger.warning("端口 %s 连接失败: %s", live['port'], e)
                     
-                    print(f"⚠️  第 {attempt + 1} 次尝试失败，等待重试...")
-                    time.sleep(3)
+                    logger.warning("⚠️  第 %s 次尝试失败，等待重试...", attempt + 1)
+                    if attempt < max_retries - 1:
+                        time.sleep(BROWSER_CONFIG["probe_retry_delay"])
                     
                 except Exception as e:
-                    print(f"连接尝试 {attempt + 1} 失败: {e}")
+                    logger.warning("连接尝试 %s 失败: %s", attempt + 1, e)
                     if attempt < max_retries - 1:
-                        time.sleep(3)
+                        time.sleep(BROWSER_CONFIG["probe_retry_delay"])
             
-            print("❌ 所有连接尝试都失败了")
+            logger.error("❌ 所有连接尝试都失败了")
             return False
             
         except Exception as e:
-            print(f"❌ 连接浏览器失败: {e}")
+            logger.error("❌ 连接浏览器失败: %s", e)
             return False
     
+    def get_waiter(self) -> PageWaiter:
+        """获取当前页面的事件等待器（页面切换后重新安装）"""
+        if self.waiter is None or self.waiter.page is not self.page:
+            self.waiter = PageWaiter(self.page)
+            self.waiter.install()
+        return self.waiter
+    
+    def get_panel_watcher(self) -> SubdivisionPanelWatcher:
+        """获取当前页面的细分面板监视器（等待记录写入同一个等待器）"""
+        if self.panel_watcher is None or self.panel_watcher.page is not self.page:
+            self.panel_watcher = SubdivisionPanelWatcher(self.page, self.get_waiter())
+        return self.panel_watcher
+    
+    def get_locators(self) -> LocatorRegistry:
+        """获取当前页面的定位器注册表（页面切换后重建）"""
+        if self.locators is None or self.locators.page is not self.page:
+            self.locators = LocatorRegistry(self.page)
+        return self.locators
+    
+    def report_wait(self, result: Dict, indent: str = "      "):
+        """打印一次等待的实际耗时"""
+        status = "✅" if result["ok"] else "⚠️  超时"
+        reason = f" ({result['reason']})" if result.get("reason") else ""
+        logger.info("%s⏱️  等待 %s: %.2fs %s%s", indent, result['name'], result['waited'], status, reason)
+    
     def get_main_navigation_items(self) -> List[Dict]:
-        """获取主导航项（按指定顺序）"""
+        """获取主导航项（按指定顺序）：一次evaluate读取全部导航项，再按索引解析目标"""
         try:
             if not self.page:
-                print("❌ 页面未初始化")
+                logger.error("❌ 页面未初始化")
                 return []
             
-            print("🔍 获取主导航项...")
+            logger.info("🔍 获取主导航项...")
             
             # 等待导航加载
-            self.page.wait_for_selector("ul[data-rfd-droppable-id='nav-list']", timeout=10000)
+            self.page.wait_for_selector(self.selectors["main_nav_container"], timeout=10000)
+            self.selectors.validate(self.page)
             
-            nav_items = self.page.query_selector_all("ul[data-rfd-droppable-id='nav-list'] li")
+            self.nav_index = build_nav_index(snapshot_navigation(self.page))
+            self.nav_resolution = resolve_nav_targets(self.nav_index, TARGET_ORDER)
             
             main_navs = []
+            for record in self.nav_resolution["found"]:
+                main_navs.append(with_nav_locators(self.page, record))
+                logger.info("  ✅ %s (类型: %s, 激活: %s)", record['text'], record['data_type'], record['is_active'])
             
-            # 按指定顺序查找导航项
-            target_order = ["3D模型", "SU模型", "材质", "贴图", "CAD", "灯光", "光域网", "PS免抠"]
+            for missing in self.nav_resolution["missing"]:
+                logger.warning("  ⚠️  未找到主导航项: %s", missing['target'])
             
-            for target_text in target_order:
-                found = False
-                for idx, item in enumerate(nav_items):
-                    try:
-                        text_elem = item.query_selector("p")
-                        if not text_elem:
-                            continue
-                        
-                        text = text_elem.text_content()
-                        if not text:
-                            continue
-                        
-                        if text.strip() == target_text:
-                            data_id = item.get_attribute("data-rfd-draggable-id")
-                            data_type = text_elem.get_attribute("datatype")
-                            is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
-                            
-                            nav_item = {
-                                "index": idx,
-                                "text": text.strip(),
-                                "data_id": data_id,
-                                "data_type": data_type,
-                                "is_active": is_active,
-                                "element": item,
-                                "text_element": text_elem
-                            }
-                            
-                            main_navs.append(nav_item)
-                            print(f"  ✅ {text.strip()} (类型: {data_type}, 激活: {is_active})")
-                            found = True
-                            break
-                            
-                    except Exception as e:
-                        continue
-                
-                if not found:
-                    print(f"  ⚠️  未找到主导航项: {target_text}")
-            
-            print(f"✅ 找到 {len(main_navs)} 个主导航项")
+            logger.info("✅ 找到 %s 个主导航项", len(main_navs))
             return main_navs
             
         except Exception as e:
-            print(f"❌ 获取主导航项失败: {e}")
+            logger.error("❌ 获取主导航项失败: %s", e)
             return []
     
+    def find_main_navigation(self, text: Optional[str] = None, data_type: Optional[str] = None,
+                             data_id: Optional[str] = None) -> Optional[Dict]:
+        """按文本、datatype 或 data-rfd-draggable-id 直接取得主导航项（复用已读取的索引）"""
+        if self.nav_index is None:
+            self.page.wait_for_selector(self.selectors["main_nav_container"], timeout=10000)
+            self.nav_index = build_nav_index(snapshot_navigation(self.page))
+        
+        record = lookup_nav(self.nav_index, text, data_type, data_id)
+        return with_nav_locators(self.page, record) if record else None
+    
     def open_dropdown_menu(self, nav_item: Dict) -> bool:
         """打开下拉菜单"""
         try:
             if not self.page:
                 return False
             
-            print(f"📂 打开下拉菜单: {nav_item['text']}")
+            logger.info("📂 打开下拉菜单: %s", nav_item['text'])
             
             # 点击主导航项
             nav_item["text_element"].click()
+            if self.use_snapshot:
+                self.get_locators().set_nav(nav_item)
             
             # 等待下拉菜单出现
-            print("⏳ 等待下拉菜单加载...")
+            logger.info("⏳ 等待下拉菜单加载...")
             
             # 方式1：等待可见
             try:
                 dropdown = self.page.wait_for_selector(
-                    "div.mantine-HoverCard-dropdown[role='dialog']", 
+                    self.selectors["dropdown_menu"], 
                     timeout=5000,
                     state="visible"
                 )
                 if dropdown:
-                    print("✅ 下拉菜单已打开（方式1）")
+                    logger.info("✅ 下拉菜单已打开（方式1）")
                     return True
             except:
                 pass
             
-            # 方式2：查找所有可见的下拉菜单
-            time.sleep(2)
-            dropdowns = self.page.query_selector_all("div.mantine-HoverCard-dropdown[role='dialog']")
-            
-            for dropdown in dropdowns:
-                style = dropdown.get_attribute("style") or ""
-                if "display: none" not in style:
-                    print("✅ 下拉菜单已打开（方式2）")
-                    return True
+            # 方式2：等待任一下拉菜单的style不再是display: none
+            result = self.get_waiter().wait_for_dropdown(timeout=2000)
+            self.report_wait(result, indent="")
+            if result["ok"]:
+                logger.info("✅ 下拉菜单已打开（方式2）")
+                return True
             
-            print("❌ 无法定位下拉菜单")
+            logger.error("❌ 无法定位下拉菜单")
             return False
             
         except Exception as e:
-            print(f"❌ 打开下拉菜单失败: {e}")
+            logger.error("❌ 打开下拉菜单失败: %s", e)
             return False
     
     def get_all_categories_from_dropdown(self) -> List[Dict]:
@@ -338,20 +396,23 @@ class LiuYunKuNavigationAutomator:
         优化：直接从下拉菜单容器中查找，避免获取到其他类目的大类
         """
         try:
-            print("📋 从下拉菜单获取所有大类...")
+            logger.info("📋 从下拉菜单获取所有大类...")
+            
+            if self.use_snapshot:
+                return self.get_categories_from_snapshot()
             
             # 查找当前可见的下拉菜单
-            dropdown = self.page.query_selector("div.mantine-HoverCard-dropdown[role='dialog']:not([style*='display: none'])")
+            dropdown = self.page.query_selector(VISIBLE_DROPDOWN)
             
             if not dropdown:
-                print("❌ 未找到可见的下拉菜单")
+                logger.error("❌ 未找到可见的下拉菜单")
                 return []
             
             # 在下拉菜单内查找大类容器
-            containers = dropdown.query_selector_all("div[class*='maxClassList_max_children_class__']")
+            containers = dropdown.query_selector_all(self.selectors["category_container"])
             
             if not containers:
-                print("❌ 下拉菜单内未找到大类容器")
+                logger.error("❌ 下拉菜单内未找到大类容器")
                 return []
             
             categories = []
@@ -359,7 +420,7 @@ class LiuYunKuNavigationAutomator:
             for container_idx, container in enumerate(containers):
                 try:
                     # 方式1：查找标题span（可能有特定class）
-                    title_elem = container.query_selector("span[class*='maxClassList_max_title__']")
+                    title_elem = container.query_selector(self.selectors["category_title"])
                     
                     # 方式2：如果方式1失败，查找容器内的第一个span
                     if not title_elem:
@@ -375,20 +436,20 @@ class LiuYunKuNavigationAutomator:
                                 break
                     
                     if not title_elem:
-                        print(f"  ⚠️  容器 {container_idx} 未找到标题元素")
+                        logger.warning("  ⚠️  容器 %s 未找到标题元素", container_idx)
                         continue
                     
                     title = title_elem.text_content()
                     if not title or len(title.strip()) == 0:
-                        print(f"  ⚠️  容器 {container_idx} 标题为空")
+                        logger.warning("  ⚠️  容器 %s 标题为空", container_idx)
                         continue
                     
                     # 过滤掉"细分"相关的标题
                     if "细分" in title:
-                        print(f"  ⚠️  跳过细分容器: {title}")
+                        logger.warning("  ⚠️  跳过细分容器: %s", title)
                         continue
                     
-                    print(f"  📁 {title}")
+                    logger.info("  📁 %s", title)
                     
                     category_data = {
                         "title": title.strip(),
@@ -400,16 +461,36 @@ class LiuYunKuNavigationAutomator:
                     categories.append(category_data)
                     
                 except Exception as e:
-                    print(f"  ❌ 解析容器 {container_idx} 时出错: {e}")
+                    logger.error("  ❌ 解析容器 %s 时出错: %s", container_idx, e)
                     continue
             
-            print(f"✅ 找到 {len(categories)} 个大类")
+            logger.info("✅ 找到 %s 个大类", len(categories))
             return categories
             
         except Exception as e:
-            print(f"❌ 获取大类失败: {e}")
+            logger.error("❌ 获取大类失败: %s", e)
             return []
     
+    def get_categories_from_snapshot(self) -> List[Dict]:
+        """
+        从下拉菜单快照中获取所有大类
+        
+        优化：整个下拉菜单只读取一次，大类记录只保存序号，不持有ElementHandle
+        """
+        self.dropdown_snapshot = snapshot_dropdown(self.page)
+        self.get_locators().observe(self.dropdown_snapshot)
+        
+        if not self.dropdown_snapshot:
+            logger.error("❌ 未找到可见的下拉菜单")
+            return []
+        
+        categories = get_categories(self.dropdown_snapshot)
+        for category in categories:
+            logger.info("  📁 %s", category['title'])
+        
+        logger.info("✅ 找到 %s 个大类", len(categories))
+        return categories
+    
     def click_category_and_get_subcategories(self, category: Dict, max_wait_time: float = 5.0) -> List[Dict]:
         """
         点击大类触发细分项菜单，并获取细分项
@@ -417,22 +498,23 @@ class LiuYunKuNavigationAutomator:
         优化：点击后等待新内容出现，然后获取细分项
         """
         try:
-            print(f"    🖱️  点击大类触发细分项: {category['title']}")
+            logger.info("    🖱️  点击大类触发细分项: %s", category['title'])
+            
+            if self.use_snapshot:
+                return self.click_category_via_snapshot(category, max_wait_time)
             
             # 查找大类下的可点击项（通常是第一个li）
             clickable_items = category["element"].query_selector_all("ul li")
             
             if not clickable_items:
-                print(f"    ❌ 未找到可点击项")
+                logger.error("    ❌ 未找到可点击项")
                 return []
             
             # 记录点击前的容器数量
-            before_containers = self.page.query_selector_all(
-                "div[class*='maxClassList_max_children_class__']"
-            )
+            before_containers = self.page.query_selector_all(self.selectors["category_container"])
             before_count = len(before_containers)
             
-            print(f"    📊 点击前容器数量: {before_count}")
+            logger.debug("    📊 点击前容器数量: %s", before_count)
             
             # 尝试点击每个可能的项，直到出现细分项
             found_subcategories = False
@@ -440,24 +522,25 @@ class LiuYunKuNavigationAutomator:
             
             for item_idx, item in enumerate(clickable_items):
                 try:
-                    print(f"      尝试点击第 {item_idx + 1} 项...")
+                    logger.debug("      尝试点击第 %s 项...", item_idx + 1)
                     
                     # 点击该项
                     item.click()
                     
-                    # 等待新内容加载
-                    time.sleep(2)
+                    # 等待细分容器出现或DOM静止
+                    wait = self.get_waiter().wait_for_subdivision_panel(
+                        before_count, timeout=int(max_wait_time * 1000), page_wide=True
+                    )
+                    self.report_wait(wait)
                     
                     # 检查是否有新容器出现
-                    after_containers = self.page.query_selector_all(
-                        "div[class*='maxClassList_max_children_class__']"
-                    )
+                    after_containers = self.page.query_selector_all(self.selectors["category_container"])
                     after_count = len(after_containers)
                     
-                    print(f"      点击后容器数量: {after_count}")
+                    logger.debug("      点击后容器数量: %s", after_count)
                     
                     if after_count > before_count:
-                        print(f"      ✅ 检测到 {after_count - before_count} 个新容器")
+                        logger.info("      ✅ 检测到 %s 个新容器", after_count - before_count)
                         
                         # 获取细分项
                         subcategories = self.extract_subcategories_from_new_containers(
@@ -468,7 +551,7 @@ class LiuYunKuNavigationAutomator:
                             found_subcategories = True
                             break
                         else:
-                            print(f"      ⚠️  新容器中未找到细分项")
+                            logger.warning("      ⚠️  新容器中未找到细分项")
                     
                     # 如果没有新容器，可能是点击后内容更新了，尝试获取当前容器内的细分项
                     if not found_subcategories:
@@ -478,19 +561,93 @@ class LiuYunKuNavigationAutomator:
                             break
                     
                 except Exception as e:
-                    print(f"      ❌ 点击第 {item_idx + 1} 项失败: {e}")
+                    logger.error("      ❌ 点击第 %s 项失败: %s", item_idx + 1, e)
                     continue
             
             if not found_subcategories:
-                print(f"    ❌ 所有点击尝试都未找到细分项")
+                logger.error("    ❌ 所有点击尝试都未找到细分项")
                 return []
             
             return subcategories
             
         except Exception as e:
-            print(f"❌ 点击大类失败: {e}")
+            logger.error("❌ 点击大类失败: %s", e)
             return []
     
+    def click_category_via_snapshot(self, category: Dict, max_wait_time: float = 5.0) -> List[Dict]:
+        """快照模式下点击大类：仅点击时使用Locator，前后状态都通过单次快照读取"""
+        container_index = category["container_index"]
+        
+        if not category["items"]:
+            logger.error("    ❌ 未找到可点击项")
+            return []
+        
+        locators = self.get_locators()
+        watcher = self.get_panel_watcher()
+        # 点击前的容器数量取自上一次快照；没有快照时由页面在点击前读取
+        before_count = len(self.dropdown_snapshot["containers"]) if self.dropdown_snapshot else None
+        
+        logger.debug("    📊 点击前容器数量: %s", before_count if before_count is not None else '（由页面读取）')
+        
+        for item in category["items"]:
+            try:
+                logger.debug("      尝试点击第 %s 项...", item['index'] + 1)
+                
+                # 点击、等待细分面板、读取快照在同一次evaluate中完成；无响应时改用真实点击
+                path = locators.path_of(container_index, item["index"])
+                result = watcher.drill_down(
+                    container_index, item["index"], before=before_count,
+                    locate=(lambda: locators.resolve(path)) if path else None,
+                    timeout=int(max_wait_time * 1000),
+                )
+                self.report_wait(result["wait"])
+                before_count = result["before"]
+                
+                self.dropdown_snapshot = result["snapshot"]
+                locators.observe(self.dropdown_snapshot)
+                if not self.dropdown_snapshot:
+                    continue
+                
+                after_count = len(self.dropdown_snapshot["containers"])
+                logger.debug("      点击后容器数量: %s", after_count)
+                
+                if after_count > before_count:
+                    logger.info("      ✅ 检测到 %s 个新容器", after_count - before_count)
+                    subcategories = find_subdivision_items(self.dropdown_snapshot, before_count)
+                    if subcategories:
+                        self.print_subcategories(subcategories)
+                        return self.attach_paths(subcategories)
+                    logger.warning("      ⚠️  新容器中未找到细分项")
+                
+                # 没有新容器时，直接从当前大类容器取细分项
+                if container_index < after_count:
+                    container = self.dropdown_snapshot["containers"][container_index]
+                    subcategories = to_subcategories(container, skip_first=True)
+                    if subcategories:
+                        self.print_subcategories(subcategories)
+                        return self.attach_paths(subcategories)
+                    
+            except Exception as e:
+                logger.error("      ❌ 点击第 %s 项失败: %s", item['index'] + 1, e)
+                continue
+        
+        logger.error("    ❌ 所有点击尝试都未找到细分项")
+        return []
+    
+    def attach_paths(self, subcategories: List[Dict]) -> List[Dict]:
+        """为细分项记录补充稳定路径（点击时由定位器注册表解析）"""
+        locators = self.get_locators()
+        for sub in subcategories:
+            sub["path"] = locators.path_of(sub["container_index"], sub["index"])
+        return subcategories
+    
+    def print_subcategories(self, subcategories: List[Dict]):
+        """打印细分项列表（DEBUG 级别，未开启时不遍历）"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        for sub in subcategories:
+            logger.debug("          %s. %s %s", sub['index'] + 1, sub['text'], '✅' if sub['is_active'] else '')
+    
     def extract_subcategories_from_new_containers(self, before_count: int, all_containers: List) -> List[Dict]:
         """从新出现的容器中提取细分项"""
         try:
@@ -503,36 +660,30 @@ class LiuYunKuNavigationAutomator:
                 # 检查是否包含"细分"标题
                 title_elem = container.query_selector("span")
                 if title_elem and "细分" in title_elem.text_content():
-                    print(f"        ✅ 找到细分容器: {title_elem.text_content()}")
+                    logger.debug("        ✅ 找到细分容器: %s", title_elem.text_content())
                     
-                    # 获取细分项
+                    # 获取细分项（文本、激活状态、关闭按钮在页面内一次读取）
                     sub_items = container.query_selector_all("ul li")
+                    states = self.selectors.item_states(container)
                     
-                    for sub_idx, item in enumerate(sub_items):
+                    for sub_idx, (item, state) in enumerate(zip(sub_items, states)):
                         try:
-                            text_elem = item.query_selector("span")
-                            if not text_elem:
-                                continue
-                            
-                            text = text_elem.text_content()
+                            text = state["text"]
                             if not text:
                                 continue
                             
-                            is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
-                            has_close_btn = item.query_selector("span[class*='maxClassList_close__']") is not None
-                            
                             subcategories.append({
                                 "text": text.strip(),
                                 "index": sub_idx,
-                                "is_active": is_active,
-                                "has_close_btn": has_close_btn,
+                                "is_active": state["is_active"],
+                                "has_close_btn": state["has_close_btn"],
                                 "element": item
                             })
                             
-                            print(f"          {sub_idx + 1}. {text.strip()} {'✅' if is_active else ''}")
+                            logger.debug("          %s. %s %s", sub_idx + 1, text.strip(), '✅' if state["is_active"] else '')
                             
                         except Exception as e:
-                            print(f"          ❌ 解析细分项 {sub_idx} 时出错: {e}")
+                            logger.error("          ❌ 解析细分项 %s 时出错: %s", sub_idx, e)
                             continue
                     
                     break
@@ -540,7 +691,7 @@ class LiuYunKuNavigationAutomator:
             return subcategories
             
         except Exception as e:
-            print(f"❌ 从新容器提取细分项失败: {e}")
+            logger.error("❌ 从新容器提取细分项失败: %s", e)
             return []
     
     def extract_subcategories_from_container(self, category_container) -> List[Dict]:
@@ -548,16 +699,13 @@ class LiuYunKuNavigationAutomator:
         try:
             subcategories = []
             
-            # 查找容器内所有可能的细分项
+            # 查找容器内所有可能的细分项（文本、激活状态、关闭按钮在页面内一次读取）
             all_items = category_container.query_selector_all("ul li")
+            states = self.selectors.item_states(category_container)
             
-            for idx, item in enumerate(all_items):
+            for idx, (item, state) in enumerate(zip(all_items, states)):
                 try:
-                    text_elem = item.query_selector("span")
-                    if not text_elem:
-                        continue
-                    
-                    text = text_elem.text_content()
+                    text = state["text"]
                     if not text:
                         continue
                     
@@ -565,27 +713,24 @@ class LiuYunKuNavigationAutomator:
                     if idx == 0 and len(all_items) > 1:
                         continue
                     
-                    is_active = "maxClassList_active__9kpsY" in (item.get_attribute("class") or "")
-                    has_close_btn = item.query_selector("span[class*='maxClassList_close__']") is not None
-                    
                     subcategories.append({
                         "text": text.strip(),
                         "index": idx,
-                        "is_active": is_active,
-                        "has_close_btn": has_close_btn,
+                        "is_active": state["is_active"],
+                        "has_close_btn": state["has_close_btn"],
                         "element": item
                     })
                     
-                    print(f"          {idx + 1}. {text.strip()} {'✅' if is_active else ''}")
+                    logger.debug("          %s. %s %s", idx + 1, text.strip(), '✅' if state["is_active"] else '')
                     
                 except Exception as e:
-                    print(f"          ❌ 解析项 {idx} 时出错: {e}")
+                    logger.error("          ❌ 解析项 %s 时出错: %s", idx, e)
                     continue
             
             return subcategories
             
         except Exception as e:
-            print(f"❌ 从容器提取细分项失败: {e}")
+            logger.error("❌ 从容器提取细分项失败: %s", e)
             return []
     
     def click_subcategory_and_screenshot(self, subcategory: Dict, nav_text: str, category_title: str) -> bool:
@@ -595,235 +740,488 @@ class LiuYunKuNavigationAutomator:
                 return False
             
             text = subcategory["text"]
+            timings = {}
+            self.last_visit = {"ok": False, "timings": timings, "screenshot": None}
+            
+            logger.info("      🖱️  点击细分项: %s", text)
+            
+            waiter = self.get_waiter()
+            if self.responses:
+                self.responses.set_path(nav_text, category_title, text)
+            
+            # 点击细分项（快照模式下此时才由注册表解析Locator），并等待激活样式移动到该项
+            started = time.perf_counter()
+            if "element" in subcategory:
+                subcategory["element"].click()
+                timings["click"] = time.perf_counter() - started
+                active_wait = waiter.wait_for_active_element(subcategory["element"])
+            elif subcategory.get("path"):
+                locators = self.get_locators()
+                locators.resolve(subcategory["path"]).click()
+                locators.mark_mutated()
+                timings["click"] = time.perf_counter() - started
+                _, title, _, occurrence = subcategory["path"]
+                active_wait = waiter.wait_for_active_path(title, text, occurrence)
+            else:
+                item_locator(self.page, subcategory["container_index"], subcategory["index"]).click()
+                timings["click"] = time.perf_counter() - started
+                active_wait = waiter.wait_for_active_item(subcategory["container_index"], subcategory["index"])
+            self.report_wait(active_wait)
+            timings["active"] = active_wait["waited"]
+            self.spans.record("subcategory_click", timings["click"] + timings["active"], active_wait["ok"],
+                              category=category_title, subcategory=text)
+            
+            # 激活样式没有移动到该项：点击可能没有生效，结果区仍是上一个细分项的，不截图
+            if not active_wait["ok"]:
+                logger.warning("      ⚠️  细分项未激活，跳过截图: %s", text)
+                self.drain_responses()
+                return False
             
-            print(f"      🖱️  点击细分项: {text}")
-            
-            # 点击细分项
-            subcategory["element"].click()
-            
-            # 等待页面响应
-            self.page.wait_for_load_state("networkidle", timeout=15000)
-            time.sleep(2)
-            
-            # 生成截图文件名
-            filename = f"screenshots/{nav_text}_{category_title}_{text}.png"
-            
-            # 确保目录存在
-            os.makedirs("screenshots", exist_ok=True)
-            
-            # 截图
-            if self.page.screenshot(path=filename):
-                print(f"      📸 截图已保存: {filename}")
+            # 分类模式：只需要分类结构，不等待结果区也不截图
+            if not self.save_screenshots:
+                self.last_visit["ok"] = True
+                self.drain_responses()
+                return True
+            self.allow_assets()
+            
+            # 等待结果区就绪：卡片出现、图片解码完成、短暂静止（不等待 networkidle，长轮询会让它一直超时）
+            ready_wait = waiter.wait_for_result_ready()
+            self.report_wait(ready_wait)
+            timings["result_ready"] = ready_wait["waited"]
+            self.spans.record("result_ready", ready_wait["waited"], ready_wait["ok"], reason=ready_wait["reason"],
+                              category=category_title, subcategory=text)
+            self.drain_responses()
+            if ready_wait["reason"] == "unchanged":
+                self.last_visit["result_unchanged"] = True
+                logger.warning("      ⚠️  结果区在点击后没有变化，按点击前的结果截图")
+            
+            # 截图：按截图配置裁剪到结果区并编码，写盘交给后台写入池
+            with self.spans.span("screenshot", category=category_title, subcategory=text) as span:
+                started = time.perf_counter()
+                image, extension = capture(self.page, self.capture_profile)
+                timings["screenshot"] = time.perf_counter() - started
+                span["ok"] = bool(image)
+            self.last_visit["ok"] = True
+            
+            if image and OUTPUT_CONFIG["screenshot_dedup"]:
+                stored = self.get_screenshot_store().add(image, extension=extension)
+                self.last_visit.update(
+                    screenshot=stored["path"],
+                    screenshot_hash=stored["hash"],
+                    duplicate=stored["duplicate"],
+                    likely_unchanged=stored["likely_unchanged"],
+                )
+                logger.info("      📸 截图已提交: %s%s", stored['path'], ' (重复)' if stored['duplicate'] else '')
+                if stored["likely_unchanged"]:
+                    logger.warning("      ⚠️  截图与上一张近似（距离 %s），页面可能没有变化", stored['distance'])
+                return True
+            elif image:
+                filename = self.get_screenshot_pool().submit(
+                    f"{nav_text}_{category_title}_{text}", image, extension=extension)
+                self.last_visit["screenshot"] = filename
+                logger.info("      📸 截图已提交: %s", filename)
                 return True
             else:
-                print(f"      ⚠️  截图失败，但点击成功")
+                logger.warning("      ⚠️  截图失败，但点击成功")
                 return True
             
         except Exception as e:
-            print(f"      ❌ 点击细分项失败: {e}")
+            logger.error("      ❌ 点击细分项失败: %s", e)
             return False
     
+    def drain_responses(self):
+        """写出已到达的素材列表响应，新增素材数记入 last_visit"""
+        if self.responses:
+            self.last_visit["materials"] = self.responses.drain()
+    
+    def enable_taxonomy_mode(self, block_api: Optional[bool] = None) -> bool:
+        """安装分类模式的请求拦截（图片、字体、媒体，可选素材列表API）"""
+        if self.taxonomy is None or self.taxonomy.page is not self.page:
+            self.taxonomy = TaxonomyMode(self.page, block_api)
+        return self.taxonomy.enable()
+    
+    def allow_assets(self):
+        """需要截图时移除分类模式的拦截（之后点击重新渲染的结果区会正常加载图片）"""
+        if self.taxonomy is not None and self.taxonomy.enabled:
+            logger.warning("⚠️  需要截图，移除分类模式的请求拦截")
+            self.taxonomy.disable()
+    
+    def get_screenshot_pool(self) -> ScreenshotWriterPool:
+        """获取截图写入池（每次运行创建一次，截图目录也只创建一次）"""
+        if self.screenshot_pool is None:
+            self.screenshot_pool = open_pool()
+        return self.screenshot_pool
+    
+    def get_screenshot_store(self) -> ScreenshotStore:
+        """获取去重截图库，存放在截图目录下的 store 子目录"""
+        if self.screenshot_store is None:
+            self.screenshot_store = ScreenshotStore(
+                self.get_screenshot_pool(),
+                os.path.join(OUTPUT_CONFIG["screenshot_dir"], "store"),
+                threshold=OUTPUT_CONFIG["dedup_threshold"],
+            )
+        return self.screenshot_store
+    
+    def close_screenshot_pool(self):
+        """等待剩余截图写完并停止写入池"""
+        if self.screenshot_store is not None:
+            self.screenshot_store.save_index()
+            self.screenshot_store.print_summary()
+            self.screenshot_store = None
+        
+        if self.screenshot_pool is not None:
+            self.screenshot_pool.close()
+            self.screenshot_pool.print_summary()
+            self.screenshot_pool = None
+    
     def process_all_navigations_in_order(self) -> Dict:
         """按指定顺序处理所有导航"""
         try:
-            print("🚀 开始按序处理所有导航...")
+            logger.info("🚀 开始按序处理所有导航...")
             
             navigation_data = {
                 "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
                 "main_navigation": []
             }
             
+            # 不截图时只爬分类结构：拦截图片、字体、媒体请求
+            if not self.save_screenshots:
+                self.enable_taxonomy_mode()
+            
             # 获取主导航项（按指定顺序）
-            main_navs = self.get_main_navigation_items()
+            self.spans.nav = None
+            with self.spans.span("nav_discovery") as span:
+                main_navs = self.get_main_navigation_items()
+                span.update(ok=bool(main_navs), found=len(main_navs))
             if not main_navs:
-                print("❌ 未找到任何主导航项")
+                logger.error("❌ 未找到任何主导航项")
                 return navigation_data
             
             # 按顺序处理每个主导航项
             for nav_idx, nav_item in enumerate(main_navs):
+                logger.info("\n%s", '='*80)
+                logger.info("📂 [%s/%s] 处理主导航: %s", nav_idx + 1, len(main_navs), nav_item['text'])
+                logger.info("%s", '='*80)
+                
+                # 断点续爬：已完成的主导航直接取检查点数据
+                finished = self.journal.nav_data(nav_item["text"]) if self.journal else None
+                if finished is not None:
+                    logger.info("⏭️  主导航已完成，跳过: %s", nav_item['text'])
+                    navigation_data["main_navigation"].append(finished)
+                    continue
+                
+                self.spans.nav = nav_item["text"]
+                incomplete = self.incomplete
+                with self.spans.span("nav") as span:
+                    nav_data = self.process_navigation(nav_item)
+                    span["ok"] = nav_data is not None
+                self.spans.nav = None
+                if nav_data is not None:
+                    if self.journal and self.incomplete == incomplete:
+                        self.journal.record_nav(nav_data)
+                    # 流式输出时可不在内存中保留大类，需要时由 rebuild_navigation 重建
+                    if not self.keep_tree:
+                        nav_data = self.build_nav_data(nav_item)
+                    navigation_data["main_navigation"].append(nav_data)
+            
+            logger.info("\n✅ 按序处理完成，共处理 %s 个主导航项", len(navigation_data['main_navigation']))
+            return navigation_data
+            
+        except Exception as e:
+            logger.error("❌ 按序处理失败: %s", e)
+            return {}
+        
+        finally:
+            self.close_screenshot_pool()
+            if self.taxonomy is not None:
+                self.taxonomy.disable()
+                self.taxonomy.print_summary()
+    
+    def build_nav_data(self, nav_item: Dict) -> Dict:
+        """构造主导航项的输出记录（不含大类）"""
+        return {
+            "text": nav_item["text"],
+            "data_id": nav_item["data_id"],
+            "data_type": nav_item["data_type"],
+            "is_active": nav_item["is_active"],
+            "categories": []
+        }
+    
+    def process_navigation(self, nav_item: Dict) -> Optional[Dict]:
+        """处理单个主导航项：打开下拉菜单 → 逐个大类处理 → 关闭下拉菜单"""
+        try:
+            nav_data = self.build_nav_data(nav_item)
+            
+            # 步骤a: 打开下拉菜单
+            with self.spans.span("dropdown_open") as span:
+                span["ok"] = opened = self.open_dropdown_menu(nav_item)
+            if not opened:
+                logger.error("❌ 无法打开 %s 的下拉菜单，跳过", nav_item['text'])
+                return None
+            
+            # 步骤b: 获取所有大类（从当前下拉菜单）
+            categories = self.get_all_categories_from_dropdown()
+            if not categories:
+                logger.warning("⚠️  未找到大类，跳过 %s", nav_item['text'])
+                return None
+            
+            if self.recorder:
+                self.recorder.save_dom(f"dropdown_{nav_item['text']}")
+            
+            # 快照模式下记录下拉菜单指纹，供增量爬取比对
+            if all("items" in category for category in categories):
+                nav_data["fingerprint"] = dropdown_fingerprint(categories)
+            
+            # 步骤c: 对每个大类进行处理
+            for cat_idx, category in enumerate(categories):
+                logger.info("\n  📁 [%s/%s] 大类: %s", cat_idx + 1, len(categories), category['title'])
+                
+                category_data = self.process_category(nav_item, category)
+                if category_data is not None:
+                    nav_data["categories"].append(category_data)
+            
+            # 步骤d: 完成当前类目后，关闭下拉菜单
+            logger.info("\n  ✅ 完成主导航 '%s' 的所有大类处理", nav_item['text'])
+            self.close_dropdown_menu()
+            
+            return nav_data
+            
+        except Exception as e:
+            logger.error("❌ 处理主导航 %s 时出错: %s", nav_item['text'], e)
+            return None
+    
+    def close_dropdown_menu(self):
+        """按 Escape 关闭下拉菜单并等待其消失"""
+        self.page.keyboard.press("Escape")
+        self.report_wait(self.get_waiter().wait_for_dropdown_closed(), indent="  ")
+    
+    def is_skipped_category(self, nav_text: str, category_title: str) -> bool:
+        """🚨 特殊规则：跳过"贴图类目-免抠素材大类"（见模块级 is_skipped_category）"""
+        return is_skipped_category(nav_text, category_title)
+    
+    def process_category(self, nav_item: Dict, category: Dict) -> Optional[Dict]:
+        """处理单个大类：触发细分项菜单，逐个点击细分项并截图"""
+        try:
+            if self.is_skipped_category(nav_item['text'], category['title']):
+                logger.warning("  ⚠️  跳过特殊处理的大类: %s - %s", nav_item['text'], category['title'])
+                return None
+            
+            # 断点续爬：已完成的大类直接取检查点数据
+            finished = self.journal.category_data(nav_item['text'], category['title']) if self.journal else None
+            if finished is not None:
+                logger.info("  ⏭️  大类已完成，跳过: %s", category['title'])
+                return finished
+            
+            # 点击大类触发细分项菜单，并获取细分项
+            with self.spans.span("category_drill_down", category=category['title']) as span:
+                subcategories = self.click_category_and_get_subcategories(category)
+                span.update(ok=bool(subcategories), found=len(subcategories))
+            
+            if not subcategories:
+                logger.warning("    ⚠️  未找到细分项，跳过此大类")
+                self.incomplete += 1
+                return None
+            
+            # 保存大类数据
+            category_data = {
+                "title": category["title"],
+                "subcategories": []
+            }
+            
+            if "items" in category:
+                category_data["items"] = [item["text"] for item in category["items"]]
+                category_data["fingerprint"] = category_fingerprint(category["title"], category_data["items"])
+            
+            # 遍历细分项（失败的细分项不写入检查点，--resume 时重试）
+            failed = 0
+            for sub_idx, subcategory in enumerate(subcategories):
                 try:
-                    print(f"\n{'='*80}")
-                    print(f"📂 [{nav_idx + 1}/{len(main_navs)}] 处理主导航: {nav_item['text']}")
-                    print(f"{'='*80}")
-                    
-                    nav_data = {
-                        "text": nav_item["text"],
-                        "data_id": nav_item["data_id"],
-                        "data_type": nav_item["data_type"],
-                        "is_active": nav_item["is_active"],
-                        "categories": []
-                    }
+                    logger.info("    🎯 [%s/%s] 细分项: %s", sub_idx + 1, len(subcategories), subcategory['text'])
                     
-                    # 步骤a: 打开下拉菜单
-                    if not self.open_dropdown_menu(nav_item):
-                        print(f"❌ 无法打开 {nav_item['text']} 的下拉菜单，跳过")
+                    finished = self.journal.subcategory_data(
+                        nav_item['text'], category['title'], subcategory['text']
+                    ) if self.journal else None
+                    if finished is not None:
+                        logger.info("      ⏭️  细分项已完成，跳过")
+                        category_data["subcategories"].append(finished)
                         continue
                     
-                    # 步骤b: 获取所有大类（从当前下拉菜单）
-                    categories = self.get_all_categories_from_dropdown()
-                    if not categories:
-                        print(f"⚠️  未找到大类，跳过 {nav_item['text']}")
-                        continue
+                    # 保存细分项数据
+                    sub_data = {
+                        "text": subcategory["text"],
+                        "is_active": subcategory["is_active"],
+                        "has_close_btn": subcategory["has_close_btn"]
+                    }
+                    category_data["subcategories"].append(sub_data)
                     
-                    # 步骤c: 对每个大类进行处理
-                    for cat_idx, category in enumerate(categories):
-                        try:
-                            print(f"\n  📁 [{cat_idx + 1}/{len(categories)}] 大类: {category['title']}")
-                            
-                            # 🚨 特殊规则：跳过"贴图类目-免抠素材大类"
-                            if nav_item['text'] == "贴图" and category['title'] == "免抠素材":
-                                print(f"  ⚠️  跳过特殊处理的大类: {nav_item['text']} - {category['title']}")
-                                continue
-                            
-                            # 点击大类触发细分项菜单，并获取细分项
-                            subcategories = self.click_category_and_get_subcategories(category)
-                            
-                            if not subcategories:
-                                print(f"    ⚠️  未找到细分项，跳过此大类")
-                                continue
-                            
-                            # 保存大类数据
-                            category_data = {
-                                "title": category["title"],
-                                "subcategories": []
-                            }
-                            
-                            # 遍历细分项
-                            for sub_idx, subcategory in enumerate(subcategories):
-                                try:
-                                    print(f"    🎯 [{sub_idx + 1}/{len(subcategories)}] 细分项: {subcategory['text']}")
-                                    
-                                    # 保存细分项数据
-                                    category_data["subcategories"].append({
-                                        "text": subcategory["text"],
-                                        "is_active": subcategory["is_active"],
-                                        "has_close_btn": subcategory["has_close_btn"]
-                                    })
-                                    
-                                    # 点击细分项并截图
-                                    self.click_subcategory_and_screenshot(
-                                        subcategory, 
-                                        nav_item['text'], 
-                                        category['title']
-                                    )
-                                    
-                                    # 等待一下，准备下一次操作
-                                    time.sleep(1)
-                                    
-                                except Exception as e:
-                                    print(f"    ❌ 处理细分项 {sub_idx} 时出错: {e}")
-                                    continue
-                            
-                            nav_data["categories"].append(category_data)
-                            
-                        except Exception as e:
-                            print(f"❌ 处理大类 {cat_idx} 时出错: {e}")
-                            continue
+                    # 点击细分项并截图
+                    ok = self.click_subcategory_and_screenshot(
+                        subcategory, 
+                        nav_item['text'], 
+                        category['title']
+                    )
                     
-                    navigation_data["main_navigation"].append(nav_data)
+                    if self.last_visit.get("screenshot_hash"):
+                        sub_data["screenshot_hash"] = self.last_visit["screenshot_hash"]
                     
-                    # 步骤d: 完成当前类目后，关闭下拉菜单
-                    print(f"\n  ✅ 完成主导航 '{nav_item['text']}' 的所有大类处理")
-                    self.page.keyboard.press("Escape")
-                    time.sleep(1)
+                    if not ok:
+                        failed += 1
+                        logger.warning("      ⚠️  细分项未完成，不写入检查点: %s", subcategory['text'])
+                    elif self.journal:
+                        self.journal.record_subcategory(nav_item['text'], category['title'], subcategory['text'], sub_data)
+                    if self.stream:
+                        self.stream.write_visit(self.build_nav_data(nav_item), category_data, sub_data, self.last_visit)
                     
                 except Exception as e:
-                    print(f"❌ 处理主导航 {nav_item['text']} 时出错: {e}")
+                    failed += 1
+                    logger.error("    ❌ 处理细分项 %s 时出错: %s", sub_idx, e)
                     continue
             
-            print(f"\n✅ 按序处理完成，共处理 {len(navigation_data['main_navigation'])} 个主导航项")
-            return navigation_data
+            # 只有全部细分项都成功时才把大类记为完成
+            if self.journal and not failed:
+                self.journal.record_category(nav_item['text'], category_data)
+            elif failed:
+                self.incomplete += 1
+                logger.warning("    ⚠️  大类 %s 有 %s 个细分项未完成，--resume 时重试", category['title'], failed)
+            
+            return category_data
             
         except Exception as e:
-            print(f"❌ 按序处理失败: {e}")
-            return {}
+            self.incomplete += 1
+            logger.error("❌ 处理大类 %s 时出错: %s", category['title'], e)
+            return None
     
-    def save_navigation_data(self, data: Dict, filename: str = "liuyunku_navigation_final_v2.json") -> bool:
+    def save_navigation_data(self, data: Dict, filename: str = OUTPUT_CONFIG["final_navigation_file"]) -> bool:
         """保存导航数据到文件"""
         try:
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
-            print(f"✅ 导航数据已保存到: {filename}")
+            logger.info("✅ 导航数据已保存到: %s", filename)
             return True
         except Exception as e:
-            print(f"❌ 保存数据失败: {e}")
+            logger.error("❌ 保存数据失败: %s", e)
             return False
     
     def take_initial_screenshot(self) -> bool:
         """拍摄初始页面截图"""
         try:
-            os.makedirs("screenshots", exist_ok=True)
-            return self.page.screenshot(path="screenshots/initial_page.png")
+            self.allow_assets()
+            image, extension = capture(self.page, get_profile(OUTPUT_CONFIG["initial_capture_profile"]))
+            self.get_screenshot_pool().submit("initial_page", image, extension=extension)
+            return True
         except Exception as e:
-            print(f"❌ 初始截图失败: {e}")
+            logger.error("❌ 初始截图失败: %s", e)
             return False
     
     def close(self):
         """关闭应用和浏览器"""
+        self.close_screenshot_pool()
+        
         try:
             if self.page:
                 self.page.close()
-                print("✅ 页面已关闭")
+                logger.info("✅ 页面已关闭")
         except:
             pass
         
         try:
             if self.browser:
                 self.browser.close()
-                print("✅ 浏览器已关闭")
+                logger.info("✅ 浏览器已关闭")
         except:
             pass
         
         try:
             if self.playwright:
                 self.playwright.stop()
-                print("✅ Playwright已停止")
+                logger.info("✅ Playwright已停止")
         except:
             pass
         
         try:
             if self.main_window:
                 self.main_window.close()
-                print("✅ 溜云库应用已关闭")
+                logger.info("✅ 溜云库应用已关闭")
         except:
             pass
 def main():
     """主函数 - 最终优化版V2"""
+    parser = argparse.ArgumentParser(description="溜云库导航自动化器（最终优化版V2）")
+    parser.add_argument("--resume", action="store_true", help="从检查点日志继续上一次中断的爬取")
+    parser.add_argument("--checkpoint", default=OUTPUT_CONFIG["checkpoint_file"], help="检查点日志文件")
+    parser.add_argument("--stream", default=OUTPUT_CONFIG["stream_file"], help="流式JSONL输出文件")
+    parser.add_argument("--timings", default=OUTPUT_CONFIG["timing_file"], help="阶段计时JSONL文件")
+    parser.add_argument("--taxonomy", action="store_true", help="分类模式：只爬分类结构，不截图并拦截图片等资源")
+    parser.add_argument("--responses", default=OUTPUT_CONFIG["response_file"], help="素材列表接口记录JSONL文件")
+    parser.add_argument("--record", default=None, help="录制目录：在新的浏览器中复现当前会话，录制HAR和DOM夹具供离线回放")
+    args = parser.parse_args()
+    
+    setup_logging()
     automator = LiuYunKuNavigationAutomator()
+    automator.journal = CheckpointJournal(args.checkpoint, resume=args.resume)
+    automator.stream = NavigationStreamWriter(args.stream, append=args.resume)
+    automator.keep_tree = OUTPUT_CONFIG["save_json"]
+    automator.spans = SpanRecorder(args.timings, append=args.resume)
+    if args.taxonomy:
+        automator.save_screenshots = False
     
     try:
-        print("🚀 启动溜云库导航自动化器（最终优化版V2）")
-        print("=" * 60)
+        logger.info("🚀 启动溜云库导航自动化器（最终优化版V2）")
+        logger.info("%s", "=" * 60)
         
         # 1. 启动溜云库 → 导航到在线素材 → 连接浏览器
-        print("\n📍 步骤1: 启动应用并导航到在线素材")
-        if not automator.start_application():
-            print("❌ 应用启动失败")
+        logger.info("\n📍 步骤1: 启动应用并导航到在线素材")
+        with automator.spans.span("attach") as span:
+            span["ok"] = started = automator.start_application()
+            if automator.attacher and automator.attacher.last_attach:
+                span["method"] = automator.attacher.last_attach["method"]
+        if not started:
+            logger.error("❌ 应用启动失败")
             return
         
         if not automator.navigate_to_online_material():
-            print("❌ 无法导航到在线素材")
+            logger.error("❌ 无法导航到在线素材")
             return
         
-        print("\n🌐 步骤2: 连接到浏览器")
-        if not automator.connect_to_browser():
-            print("❌ 无法连接到浏览器")
+        logger.info("\n🌐 步骤2: 连接到浏览器")
+        with automator.spans.span("cdp_connect") as span:
+            span["ok"] = connected = automator.connect_to_browser()
+        if not connected:
+            logger.error("❌ 无法连接到浏览器")
             return
         
-        # 拍摄初始截图
-        automator.take_initial_screenshot()
+        # 录制模式：之后的爬取在录制HAR的新页面上进行
+        if args.record:
+            automator.recorder = SessionRecorder(args.record)
+            automator.page = automator.recorder.start(automator.playwright, automator.page)
+        
+        # 捕获素材列表接口响应（按导航路径写入JSONL）
+        if OUTPUT_CONFIG["capture_responses"]:
+            automator.responses = ResponseCapture(automator.page, args.responses, append=args.resume)
+            automator.responses.install()
+        
+        # 拍摄初始截图（续爬时已有）
+        if not args.resume and automator.save_screenshots:
+            automator.take_initial_screenshot()
         
         # 2. 获取所有主导航项（按指定顺序）
-        print("\n🔍 步骤3: 获取主导航项（按序）")
+        logger.info("\n🔍 步骤3: 获取主导航项（按序）")
         
         # 3. 按顺序处理每个主导航项
-        print("\n🎯 步骤4: 按序处理所有导航")
+        logger.info("\n🎯 步骤4: 按序处理所有导航")
         navigation_data = automator.process_all_navigations_in_order()
+        automator.stream.close()
+        
+        # 未在内存中保留导航树时，由流式记录重建
+        if not automator.keep_tree:
+            navigation_data = rebuild_navigation(args.stream)
         
         # 4. 保存完整数据到JSON
-        print("\n💾 步骤5: 保存数据")
+        logger.info("\n💾 步骤5: 保存数据")
+        logger.info("  流式记录: %s 条 → %s", automator.stream.count, args.stream)
         if navigation_data["main_navigation"]:
-            automator.save_navigation_data(navigation_data)
+            if OUTPUT_CONFIG["save_json"]:
+                automator.save_navigation_data(navigation_data)
             
             # 打印统计信息
             total_main = len(navigation_data["main_navigation"])
@@ -833,29 +1231,53 @@ def main():
                 for nav in navigation_data["main_navigation"]
             )
             
-            print(f"\n📊 最终统计:")
-            print(f"  主导航项: {total_main}")
-            print(f"  大类: {total_categories}")
-            print(f"  细分项: {total_subcategories}")
-            print(f"  截图数量: {total_subcategories}")
+            logger.info("\n📊 最终统计:")
+            logger.info("  主导航项: %s", total_main)
+            logger.info("  大类: %s", total_categories)
+            logger.info("  细分项: %s", total_subcategories)
+            logger.info("  截图数量: %s", total_subcategories if automator.save_screenshots else 0)
+            
+            if automator.waiter:
+                logger.info("\n⏱️  等待统计:")
+                for name, stat in automator.waiter.summary().items():
+                    logger.info("  %s: %s 次, 共 %.1fs, 最长 %.2fs, 超时 %s 次",
+                                name, stat['count'], stat['total'], stat['max'], stat['timeouts'])
+            if automator.locators:
+                automator.locators.print_summary()
+            if automator.panel_watcher:
+                automator.panel_watcher.print_summary()
+            if automator.responses:
+                automator.responses.print_summary()
+            
+            logger.info("\n⏱️  阶段耗时（%s）:", args.timings)
+            automator.spans.print_report()
         
-        print("\n✅ 自动化测试完成!")
+        logger.info("\n✅ 自动化测试完成!")
         
     except Exception as e:
-        print(f"❌ 主程序执行失败: {e}")
+        logger.error("❌ 主程序执行失败: %s", e)
     
     finally:
+        automator.journal.close()
+        automator.stream.close()
+        automator.spans.close()
+        if automator.responses:
+            automator.responses.close()
+        if automator.recorder:
+            automator.recorder.finish()
+        
         # 询问是否关闭应用
         try:
             user_input = input("\n是否关闭溜云库应用? (y/n): ").lower().strip()
             if user_input == 'y':
                 automator.close()
             else:
-                print("保持应用运行")
+                logger.info("保持应用运行")
                 # 仍然需要清理Playwright资源
                 if automator.playwright:
                     automator.playwright.stop()
         except:
             automator.close()
+        shutdown_logging()
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,130 @@
+# 溜云库会话录制与离线回放：录制时在新的上下文中复现当前会话并保存HAR和DOM夹具，回放时用 route_from_har 离线提供同一会话
+import json
+import os
+import re
+import time
+from typing import Dict, Optional
+from playwright.sync_api import Page, Playwright, Route
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+HAR_FILE = "session.har"
+DOM_DIR = "dom"
+INITIAL_FIXTURE = "initial"
+
+DEFAULT_VIEWPORT = {"width": 1280, "height": 800}
+
+
+def _fixture_name(name: str) -> str:
+    """夹具文件名：去掉路径中不允许的字符"""
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name).strip("_") or "page"
+
+
+def load_manifest(directory: str) -> Dict:
+    with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class SessionRecorder:
+    """
+    会话录制
+
+    start() 读取来源页面（CDP连接的溜云库页面）的URL和登录状态，在新启动的浏览器中以
+    record_har_path 打开同一页面，返回的新页面交给爬虫正常爬取；save_dom() 保存DOM夹具；
+    finish() 关闭上下文（此时写出HAR）并写 manifest.json
+    """
+
+    def __init__(self, directory: str, headless: bool = True):
+        self.directory = directory
+        self.headless = headless
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.manifest: Dict = {}
+
+    def start(self, playwright: Playwright, source_page: Page) -> Page:
+        os.makedirs(os.path.join(self.directory, DOM_DIR), exist_ok=True)
+        url = source_page.url
+        viewport = source_page.viewport_size or DEFAULT_VIEWPORT
+
+        self.browser = playwright.chromium.launch(headless=self.headless)
+        self.context = self.browser.new_context(
+            storage_state=source_page.context.storage_state(),
+            viewport=viewport,
+            record_har_path=os.path.join(self.directory, HAR_FILE),
+            record_har_content="embed",
+        )
+        self.page = self.context.new_page()
+        self.page.goto(url)
+
+        self.manifest = {
+            "url": url,
+            "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "viewport": viewport,
+            "har": HAR_FILE,
+            "fixtures": {},
+        }
+        self.save_dom(INITIAL_FIXTURE)
+        logger.info("🎥 开始录制会话: %s → %s", url, self.directory)
+        return self.page
+
+    def save_dom(self, name: str) -> Optional[str]:
+        """保存当前页面的完整DOM（page.content()）"""
+        if self.page is None:
+            return None
+        filename = os.path.join(DOM_DIR, _fixture_name(name) + ".html")
+        try:
+            with open(os.path.join(self.directory, filename), 'w', encoding='utf-8') as f:
+                f.write(self.page.content())
+            self.manifest["fixtures"][name] = filename
+            return filename
+        except Exception as e:
+            logger.warning("⚠️  保存DOM夹具失败 %s: %s", name, e)
+            return None
+
+    def finish(self) -> Optional[str]:
+        """结束录制，返回 manifest.json 路径"""
+        if self.context is None:
+            return None
+        try:
+            self.context.close()
+            self.browser.close()
+        except Exception as e:
+            logger.warning("⚠️  关闭录制上下文失败: %s", e)
+        self.context = None
+
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        logger.info("✅ 会话已录制: %s（DOM夹具 %s 个）", self.directory, len(self.manifest["fixtures"]))
+        return path
+
+
+def open_replay(playwright: Playwright, directory: str, headless: bool = True):
+    """
+    离线回放录制的会话，返回 (browser, page)
+
+    请求先按HAR回放；HAR中没有的页面导航请求用初始DOM夹具应答，其余请求一律中止（不访问网络）
+    """
+    manifest = load_manifest(directory)
+    with open(os.path.join(directory, manifest["fixtures"][INITIAL_FIXTURE]), 'r', encoding='utf-8') as f:
+        initial_dom = f.read()
+
+    def offline(route: Route):
+        request = route.request
+        if request.is_navigation_request() and request.url == manifest["url"]:
+            route.fulfill(status=200, content_type="text/html; charset=utf-8", body=initial_dom)
+        else:
+            route.abort("internetdisconnected")
+
+    browser = playwright.chromium.launch(headless=headless)
+    context = browser.new_context(viewport=manifest["viewport"])
+    # 后注册的路由先匹配：先查HAR，未命中时交给 offline
+    context.route("**/*", offline)
+    context.route_from_har(os.path.join(directory, manifest["har"]), not_found="fallback")
+    page = context.new_page()
+    page.goto(manifest["url"])
+    logger.info("▶️  回放会话: %s（录制于 %s）", manifest["url"], manifest["recorded_at"])
+    return browser, page
@@ -0,0 +1,264 @@
+# 溜云库增量爬取：按下拉菜单/大类指纹比对上一次的导航JSON，只深入变化的大类
+import argparse
+import json
+import os
+import time
+from typing import List, Dict, Optional
+from liuyunku_config import OUTPUT_CONFIG
+from liuyunku_final_v2 import LiuYunKuNavigationAutomator, is_skipped_category
+from liuyunku_snapshot import category_fingerprint, combine_fingerprints, dropdown_fingerprint
+from liuyunku_logging import get_logger, setup_logging, shutdown_logging
+
+logger = get_logger(__name__)
+
+
+def load_previous_navigation(filename: str) -> Dict[str, Dict]:
+    """读取上一次的导航JSON，按主导航文本建立索引；文件不存在时返回空字典"""
+    if not os.path.exists(filename):
+        logger.warning("⚠️  未找到上一次的导航数据: %s，将执行完整爬取", filename)
+        return {}
+
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {nav["text"]: nav for nav in data.get("main_navigation", [])}
+    except Exception as e:
+        logger.error("❌ 读取上一次的导航数据失败: %s", e)
+        return {}
+
+
+def previous_items(category: Dict) -> Optional[List[str]]:
+    """取出旧记录中大类的项文本（兼容 first_level 旧格式）"""
+    if "items" in category:
+        return category["items"]
+    if "first_level" in category:
+        return [item["text"] for item in category["first_level"]]
+    return None
+
+
+def previous_category_fingerprint(category: Dict) -> Optional[str]:
+    """旧记录中大类的指纹；没有保存指纹时由项文本计算"""
+    if category.get("fingerprint"):
+        return category["fingerprint"]
+    items = previous_items(category)
+    return category_fingerprint(category["title"], items) if items is not None else None
+
+
+def previous_nav_fingerprint(nav: Dict) -> Optional[str]:
+    """旧记录中下拉菜单的指纹；没有保存指纹时由各大类指纹组合"""
+    if nav.get("fingerprint"):
+        return nav["fingerprint"]
+    fingerprints = [previous_category_fingerprint(cat) for cat in nav.get("categories", [])]
+    if not fingerprints or None in fingerprints:
+        return None
+    return combine_fingerprints(fingerprints)
+
+
+def diff_names(old: List[str], new: List[str]) -> Dict[str, List]:
+    """
+    比较两个名称列表
+
+    同一位置上一个名称消失、另一个名称出现时视为重命名
+    """
+    old_set, new_set = set(old), set(new)
+    removed = [name for name in old if name not in new_set]
+    added = [name for name in new if name not in old_set]
+    renamed = []
+
+    for name in list(removed):
+        pos = old.index(name)
+        if pos < len(new) and new[pos] in added:
+            renamed.append({"from": name, "to": new[pos]})
+            removed.remove(name)
+            added.remove(new[pos])
+
+    return {"added": added, "removed": removed, "renamed": renamed}
+
+
+def has_changes(diff: Dict[str, List]) -> bool:
+    return bool(diff["added"] or diff["removed"] or diff["renamed"])
+
+
+class IncrementalCrawler:
+    """
+    增量爬取器：下拉菜单指纹未变化时整体复用旧数据，否则只深入指纹变化的大类
+
+    指纹来自下拉菜单快照，因此要求 automator 处于快照模式
+    """
+
+    def __init__(self, automator: LiuYunKuNavigationAutomator, previous_file: str = OUTPUT_CONFIG["final_navigation_file"]):
+        if not automator.use_snapshot:
+            raise ValueError("增量爬取需要快照模式（use_snapshot=True）")
+        self.automator = automator
+        self.previous_file = previous_file
+        self.previous = {}
+        self.stats = {"navs_reused": 0, "categories_reused": 0, "categories_crawled": 0, "categories_skipped": 0}
+
+    def run(self) -> Dict:
+        """执行增量爬取，返回 {"navigation_data": ..., "diff": ...}"""
+        start = time.perf_counter()
+        logger.info("🚀 开始增量爬取...")
+
+        self.previous = load_previous_navigation(self.previous_file)
+        navigation_data = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "main_navigation": []
+        }
+        diff = {
+            "timestamp": navigation_data["timestamp"],
+            "previous_file": self.previous_file,
+            "navigations": [],
+            "removed_navigations": [],
+        }
+
+        main_navs = self.automator.get_main_navigation_items()
+        for nav_item in main_navs:
+            nav_data, nav_diff = self.crawl_navigation(nav_item)
+            if nav_data is not None:
+                navigation_data["main_navigation"].append(nav_data)
+            diff["navigations"].append(nav_diff)
+
+        seen = {nav["text"] for nav in main_navs}
+        diff["removed_navigations"] = [text for text in self.previous if text not in seen]
+        diff["stats"] = dict(self.stats, seconds=round(time.perf_counter() - start, 2))
+
+        self.print_report(diff)
+        return {"navigation_data": navigation_data, "diff": diff}
+
+    def crawl_navigation(self, nav_item: Dict):
+        """处理单个主导航：先比对下拉菜单指纹，再逐个比对大类指纹"""
+        automator = self.automator
+        prev_nav = self.previous.get(nav_item["text"])
+        nav_diff = {"text": nav_item["text"], "status": "added" if prev_nav is None else "unchanged"}
+
+        if not automator.open_dropdown_menu(nav_item):
+            logger.error("❌ 无法打开 %s 的下拉菜单，跳过", nav_item['text'])
+            nav_diff["status"] = "failed"
+            return prev_nav, nav_diff
+
+        categories = automator.get_all_categories_from_dropdown()
+        fingerprint = dropdown_fingerprint(categories)
+
+        if prev_nav is not None and previous_nav_fingerprint(prev_nav) == fingerprint:
+            logger.info("  ✅ %s 指纹未变化（%s），复用上一次的数据", nav_item['text'], fingerprint)
+            self.stats["navs_reused"] += 1
+            automator.close_dropdown_menu()
+            return dict(prev_nav, fingerprint=fingerprint), nav_diff
+
+        nav_data = automator.build_nav_data(nav_item)
+        nav_data["fingerprint"] = fingerprint
+        prev_categories = {cat["title"]: cat for cat in prev_nav["categories"]} if prev_nav else {}
+
+        # 特殊规则跳过的大类不爬取，也不计入差异
+        skipped = [cat for cat in categories if is_skipped_category(nav_item["text"], cat["title"])]
+        categories = [cat for cat in categories if cat not in skipped]
+        self.stats["categories_skipped"] += len(skipped)
+        if skipped:
+            nav_diff["skipped_categories"] = [cat["title"] for cat in skipped]
+
+        nav_diff["categories"] = diff_names(list(prev_categories), [cat["title"] for cat in categories])
+        nav_diff["subcategories"] = {}
+
+        for category in categories:
+            item_texts = [item["text"] for item in category["items"]]
+            prev_category = prev_categories.get(category["title"])
+
+            if prev_category is not None and \
+                    previous_category_fingerprint(prev_category) == category_fingerprint(category["title"], item_texts):
+                nav_data["categories"].append(prev_category)
+                self.stats["categories_reused"] += 1
+                continue
+
+            logger.info("\n  📁 大类有变化，重新爬取: %s", category['title'])
+            self.stats["categories_crawled"] += 1
+            category_data = automator.process_category(nav_item, category)
+            if category_data is not None:
+                nav_data["categories"].append(category_data)
+
+            if prev_category is None:
+                continue
+
+            category_diff = {}
+            old_items = previous_items(prev_category)
+            if old_items is not None:
+                category_diff["items"] = diff_names(old_items, item_texts)
+            if category_data is not None:
+                category_diff["subcategories"] = diff_names(
+                    [sub["text"] for sub in prev_category.get("subcategories", [])],
+                    [sub["text"] for sub in category_data["subcategories"]],
+                )
+            if any(has_changes(d) for d in category_diff.values()):
+                nav_diff["subcategories"][category["title"]] = category_diff
+
+        automator.close_dropdown_menu()
+
+        if prev_nav is not None:
+            nav_diff["status"] = "changed"
+        return nav_data, nav_diff
+
+    def print_report(self, diff: Dict):
+        """打印差异报告摘要"""
+        logger.info("\n📊 增量爬取差异报告:")
+        for nav_diff in diff["navigations"]:
+            logger.info("  %s: %s", nav_diff['text'], nav_diff['status'])
+            categories = nav_diff.get("categories")
+            if categories and has_changes(categories):
+                logger.info("    大类 新增 %s 删除 %s 重命名 %s",
+                            categories['added'], categories['removed'],
+                            [(r['from'], r['to']) for r in categories['renamed']])
+            for title, category_diff in nav_diff.get("subcategories", {}).items():
+                for kind, changes in category_diff.items():
+                    if has_changes(changes):
+                        logger.info("    %s / %s: 新增 %s 删除 %s 重命名 %s",
+                                    title, kind, changes['added'], changes['removed'],
+                                    [(r['from'], r['to']) for r in changes['renamed']])
+        if diff["removed_navigations"]:
+            logger.info("  已删除的主导航: %s", diff['removed_navigations'])
+        stats = diff["stats"]
+        logger.info("  复用主导航 %s 个，复用大类 %s 个，重新爬取大类 %s 个，跳过大类 %s 个，耗时 %ss",
+                    stats['navs_reused'], stats['categories_reused'], stats['categories_crawled'],
+                    stats['categories_skipped'], stats['seconds'])
+
+
+def main():
+    """主函数 - 增量爬取"""
+    parser = argparse.ArgumentParser(description="溜云库增量导航爬取")
+    parser.add_argument("--previous", default=OUTPUT_CONFIG["final_navigation_file"],
+                        help="上一次的导航JSON（默认为 liuyunku_final_v2.py 的输出）")
+    parser.add_argument("--output", default=OUTPUT_CONFIG["incremental_navigation_file"], help="本次导航JSON输出文件")
+    parser.add_argument("--diff", default="liuyunku_navigation_diff.json", help="差异报告输出文件")
+    args = parser.parse_args()
+
+    setup_logging()
+    automator = LiuYunKuNavigationAutomator()
+
+    try:
+        if not automator.start_application():
+            logger.error("❌ 应用启动失败")
+            return
+
+        if not automator.navigate_to_online_material():
+            logger.error("❌ 无法导航到在线素材")
+            return
+
+        if not automator.connect_to_browser():
+            logger.error("❌ 无法连接到浏览器")
+            return
+
+        result = IncrementalCrawler(automator, args.previous).run()
+
+        if result["navigation_data"]["main_navigation"]:
+            automator.save_navigation_data(result["navigation_data"], args.output)
+        automator.save_navigation_data(result["diff"], args.diff)
+
+    except Exception as e:
+        logger.error("❌ 增量爬取失败: %s", e)
+
+    finally:
+        if automator.playwright:
+            automator.playwright.stop()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
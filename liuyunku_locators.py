@@ -0,0 +1,136 @@
+# 溜云库定位器注册表：节点以稳定路径保存，点击时才解析为 Locator，按DOM代数缓存
+import re
+from typing import Dict, Optional, Tuple
+from playwright.sync_api import Page, Locator
+from liuyunku_snapshot import SNAPSHOT_SELECTORS, VISIBLE_DROPDOWN, item_locator
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+# 读取 window.__lykWatch 的DOM变更代数（观察器未安装时为 null）
+GENERATION_JS = "() => window.__lykWatch ? window.__lykWatch.generation : null"
+
+# 路径：(主导航键, 容器标题, 项文本, 同名项序号)
+NodePath = Tuple[str, str, str, int]
+
+
+def _exact(text: str):
+    """匹配去除首尾空白后完全相等的文本"""
+    return re.compile(r"^\s*" + re.escape(text) + r"\s*$")
+
+
+class LocatorRegistry:
+    """
+    定位器注册表
+
+    - observe() 从下拉菜单快照登记节点：路径 → (容器序号, 项序号)，并记下快照时的DOM代数
+    - resolve() 把路径解析为 Locator：
+        缓存的是按文本构造的 Locator         → 直接返回缓存（不依赖DOM序号，重新渲染后仍然有效）
+        缓存的按序号 Locator 代数与当前相同 → 直接返回缓存
+        当前代数与快照一致                  → 按序号构造（与快照完全对应）
+        否则                                → 按容器标题 + 项文本构造（React重新渲染后仍然有效）
+    - 自己触发的点击之后调用 mark_mutated() 重新读取代数（1次RPC），需要确认页面代数时调用 refresh()
+
+    Locator 本身在每次操作时由 Playwright 重新查询，不会像 ElementHandle 那样失效；
+    按文本构造的 Locator 不依赖DOM序号，因此永不需要重新解析，只有按序号构造的会随代数变化而重建
+    （统计中 positional / semantic 为实际构造次数）
+    """
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.nav_key: Optional[str] = None
+        self.generation: Optional[int] = None  # 最近一次已知的DOM代数，None 表示未知
+        self.snapshot_generation: Optional[int] = None
+        self.positions: Dict[NodePath, Tuple[int, int]] = {}
+        self.paths: Dict[Tuple[int, int], NodePath] = {}
+        self.cache: Dict[NodePath, Tuple[Optional[int], Locator]] = {}  # 代数为 None 表示按文本构造
+        self.stats = {"registered": 0, "resolved": 0, "cache_hits": 0, "positional": 0, "semantic": 0}
+
+    def set_nav(self, nav_item: Dict):
+        """切换当前主导航（路径以 data-rfd-draggable-id 为键，没有时用文本）"""
+        self.nav_key = nav_item.get("data_id") or nav_item["text"]
+
+    def observe(self, snapshot: Optional[Dict]):
+        """登记快照中的所有项"""
+        self.positions = {}
+        self.paths = {}
+        if not snapshot:
+            self.generation = self.snapshot_generation = None
+            return
+
+        for container in snapshot["containers"]:
+            seen: Dict[str, int] = {}
+            for item in container["items"]:
+                occurrence = seen.get(item["text"], 0)
+                seen[item["text"]] = occurrence + 1
+                path = (self.nav_key, container["title"], item["text"], occurrence)
+                self.positions[path] = (container["index"], item["index"])
+                self.paths[(container["index"], item["index"])] = path
+                self.stats["registered"] += 1
+
+        self.generation = self.snapshot_generation = snapshot.get("generation")
+
+    def path_of(self, container_index: int, item_index: int) -> Optional[NodePath]:
+        """按最近一次快照中的序号取得节点路径"""
+        return self.paths.get((container_index, item_index))
+
+    def mark_mutated(self):
+        """DOM可能已变更（例如刚点击过）：重新读取代数，读取失败时视为未知，之后的解析不再信任快照序号"""
+        try:
+            self.refresh()
+        except Exception:
+            self.generation = None
+
+    def refresh(self) -> Optional[int]:
+        """读取页面当前的DOM代数（1次RPC）"""
+        self.generation = self.page.evaluate(GENERATION_JS)
+        return self.generation
+
+    def resolve(self, path: NodePath, verify: bool = False) -> Locator:
+        """把路径解析为 Locator；verify=True 时先读取页面代数"""
+        if verify:
+            self.refresh()
+
+        self.stats["resolved"] += 1
+        cached = self.cache.get(path)
+        if cached and (cached[0] is None or (self.generation is not None and cached[0] == self.generation)):
+            self.stats["cache_hits"] += 1
+            return cached[1]
+
+        position = self.positions.get(path)
+        if position and self.generation is not None and self.generation == self.snapshot_generation:
+            locator = item_locator(self.page, *position)
+            self.cache[path] = (self.generation, locator)
+            self.stats["positional"] += 1
+        else:
+            locator = self._semantic_locator(path)
+            self.cache[path] = (None, locator)
+            self.stats["semantic"] += 1
+        return locator
+
+    def _semantic_locator(self, path: NodePath) -> Locator:
+        """按容器标题和项文本构造 Locator，不依赖DOM序号（容器标题与 CONTAINER_TITLE_JS 的取法相同）"""
+        _, title, text, occurrence = path
+        containers = self.page.locator(VISIBLE_DROPDOWN).first.locator(SNAPSHOT_SELECTORS["container"])
+        title_elem = self.page.locator(SNAPSHOT_SELECTORS["title"])
+        titled = containers.filter(has=title_elem.filter(has_text=_exact(title)))
+        # 没有标题元素的容器以第一个 span 为标题
+        untitled = (
+            containers.filter(has_not=title_elem)
+            .filter(has=self.page.locator("span >> nth=0").filter(has_text=_exact(title)))
+        )
+        container = titled.or_(untitled).first
+        return (
+            container.locator(SNAPSHOT_SELECTORS["item"])
+            .filter(has=self.page.locator(SNAPSHOT_SELECTORS["item_text"]).filter(has_text=_exact(text)))
+            .nth(occurrence)
+        )
+
+    def summary(self) -> Dict:
+        return dict(self.stats)
+
+    def print_summary(self, indent: str = "  "):
+        stats = self.stats
+        logger.info("%s定位器: 登记 %s 个, 解析 %s 次 (缓存命中 %s, 按序号构造 %s, 按文本构造 %s)",
+                    indent, stats['registered'], stats['resolved'], stats['cache_hits'],
+                    stats['positional'], stats['semantic'])
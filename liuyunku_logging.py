@@ -0,0 +1,92 @@
+# 溜云库日志：按 LOG_CONFIG 配置控制台和文件输出，文件经队列由后台线程写入，可选JSON格式
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Dict, Optional
+from liuyunku_config import LOG_CONFIG, OUTPUT_CONFIG
+
+# 所有爬虫模块的日志都挂在这个根名称之下
+ROOT_LOGGER = "liuyunku"
+
+# LogRecord 的标准属性，其余属性视为 extra 字段
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志一行JSON：{"ts", "level", "logger", "message", ...extra 字段, "exc"}"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage().strip(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """取得 liuyunku.<name> 日志器（模块名去掉 liuyunku_ 前缀）"""
+    if name.startswith("liuyunku_"):
+        name = name[len("liuyunku_"):]
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def _file_formatter(config: Dict) -> logging.Formatter:
+    if config.get("json_format"):
+        return JsonFormatter()
+    return logging.Formatter(config["log_format"])
+
+
+def setup_logging(config: Optional[Dict] = None, log_file: Optional[str] = None) -> logging.Logger:
+    """
+    按配置初始化日志（重复调用时先关闭上一次的配置）
+
+    - 控制台只输出消息本身并写到标准输出，与原先的 print 输出一致（管道重定向时不会丢失）
+    - 文件输出经 QueueHandler 入队，由 QueueListener 的后台线程写盘，不阻塞爬取线程
+    - 级别低于 level 的调用在 isEnabledFor 处即返回，不会格式化消息
+    """
+    config = dict(LOG_CONFIG, **(config or {}))
+    shutdown_logging()
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(getattr(logging, str(config["level"]).upper(), logging.INFO))
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if config["console_output"]:
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter(config.get("console_format", "%(message)s")))
+        root.addHandler(console)
+
+    if config["file_output"]:
+        global _listener
+        file_handler = logging.FileHandler(log_file or OUTPUT_CONFIG["log_file"], encoding="utf-8")
+        file_handler.setFormatter(_file_formatter(config))
+        log_queue = queue.Queue(config.get("queue_size", -1))
+        _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _listener.start()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    return root
+
+
+def shutdown_logging():
+    """停止后台写入线程（写完队列中剩余的日志）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
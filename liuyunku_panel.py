@@ -0,0 +1,204 @@
+# 溜云库细分面板监视器：在打开的下拉菜单上安装一次 MutationObserver，一次evaluate完成"点击大类 → 等待细分面板 → 提取细分项"
+import time
+from typing import Callable, Dict, Optional
+from playwright.sync_api import Page, Locator
+from liuyunku_config import BROWSER_CONFIG
+from liuyunku_snapshot import SNAPSHOT_SELECTORS, EXTRACT_CONTAINERS_JS, CONTAINER_TITLE_JS, item_locator
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+# 可见下拉菜单中的容器数量（真实点击前的基准）
+COUNT_CONTAINERS_JS = """
+(sel) => {
+    const dropdown = Array.from(document.querySelectorAll(sel.dropdown))
+        .find(d => !(d.getAttribute('style') || '').includes('display: none'));
+    return dropdown ? dropdown.querySelectorAll(sel.container).length : 0;
+}
+"""
+
+# 返回的 Promise 在以下情况之一时完成，并在同一次evaluate中附带下拉菜单快照：
+#   panel     序号不小于 before 的位置出现了"细分"容器
+#   no_panel  下拉菜单开始变更后 panelGrace 毫秒内仍没有"细分"容器（细分项可能在原容器内更新，由调用方处理）
+#   no_effect 页面内点击后 grace 毫秒内下拉菜单没有任何变更（需要改用真实点击）
+#   timeout   超时
+# 不按下拉菜单静止判断：点击自身的激活样式变更之后，较慢的细分面板可能还要一段时间才渲染
+# 观察器挂在下拉菜单元素上，同一个下拉菜单只安装一次
+PANEL_WATCH_JS = """
+async ({sel, containerIndex, itemIndex, before, click, timeout, grace, panelGrace}) => {
+    const extract = EXTRACT_CONTAINERS;
+    const containerTitle = CONTAINER_TITLE;
+    const started = performance.now();
+    const dropdown = Array.from(document.querySelectorAll(sel.dropdown))
+        .find(d => !(d.getAttribute('style') || '').includes('display: none'));
+    if (!dropdown) {
+        return {reason: 'no_dropdown', waited: 0, before: 0, snapshot: null};
+    }
+
+    let watch = dropdown.__lykPanel;
+    if (!watch) {
+        watch = {generation: 0, listeners: new Set()};
+        new MutationObserver(() => {
+            watch.generation += 1;
+            watch.listeners.forEach(listener => listener());
+        }).observe(dropdown, {
+            childList: true, subtree: true, attributes: true, attributeFilter: ['class', 'style'],
+        });
+        dropdown.__lykPanel = watch;
+    }
+
+    const baseline = before === null ? dropdown.querySelectorAll(sel.container).length : before;
+    const startGeneration = watch.generation;
+    const hasPanel = () => {
+        const containers = dropdown.querySelectorAll(sel.container);
+        for (let i = baseline; i < containers.length; i++) {
+            if (containerTitle(containers[i], sel).includes('细分')) {
+                return true;
+            }
+        }
+        return false;
+    };
+
+    let target = null;
+    if (click) {
+        const container = dropdown.querySelectorAll(sel.container)[containerIndex];
+        const item = container ? container.querySelectorAll(sel.item)[itemIndex] : null;
+        if (!item) {
+            return {reason: 'no_item', waited: 0, before: baseline, snapshot: null};
+        }
+        target = item.querySelector(sel.item_text) || item;
+    }
+
+    return await new Promise((resolve) => {
+        let done = false;
+        let graceTimer = null;
+        let panelTimer = null;
+        let deadline = null;
+        const finish = (reason) => {
+            if (done) {
+                return;
+            }
+            done = true;
+            watch.listeners.delete(check);
+            clearTimeout(graceTimer);
+            clearTimeout(panelTimer);
+            clearTimeout(deadline);
+            const pageWatch = window.__lykWatch;
+            resolve({
+                reason: reason,
+                waited: performance.now() - started,
+                before: baseline,
+                snapshot: {
+                    containers: extract(dropdown, sel),
+                    generation: pageWatch ? pageWatch.generation : null,
+                },
+            });
+        };
+        const armPanelGrace = () => {
+            if (panelTimer === null) {
+                panelTimer = setTimeout(() => finish('no_panel'), panelGrace);
+            }
+        };
+        const check = () => {
+            if (hasPanel()) {
+                finish('panel');
+            } else if (watch.generation > startGeneration) {
+                clearTimeout(graceTimer);
+                armPanelGrace();
+            }
+        };
+
+        watch.listeners.add(check);
+        deadline = setTimeout(() => finish('timeout'), timeout);
+        if (target) {
+            graceTimer = setTimeout(() => finish('no_effect'), grace);
+            const options = {bubbles: true, cancelable: true, view: window, button: 0};
+            target.dispatchEvent(new PointerEvent('pointerdown', options));
+            target.dispatchEvent(new MouseEvent('mousedown', options));
+            target.dispatchEvent(new PointerEvent('pointerup', options));
+            target.dispatchEvent(new MouseEvent('mouseup', options));
+            target.dispatchEvent(new MouseEvent('click', options));
+        } else {
+            // 真实点击已经在调用前完成：面板可能已出现，否则从现在起等待 panelGrace
+            armPanelGrace();
+        }
+        check();
+    });
+}
+""".replace("EXTRACT_CONTAINERS", EXTRACT_CONTAINERS_JS.strip()).replace("CONTAINER_TITLE", CONTAINER_TITLE_JS.strip())
+
+
+class SubdivisionPanelWatcher:
+    """
+    细分面板监视器
+
+    drill_down() 默认在页面内派发点击事件并等待面板，单次RPC返回细分面板和整个下拉菜单的快照；
+    页面内点击没有引起任何变更时，改用 Locator 真实点击后再等待一次（共3次RPC）
+    等待记录写入 PageWaiter.records，与其他等待一起汇总
+    """
+
+    def __init__(self, page: Page, waiter=None, in_page_click: Optional[bool] = None, grace_ms: int = 1000,
+                 panel_grace_ms: Optional[int] = None):
+        self.page = page
+        self.waiter = waiter
+        self.in_page_click = BROWSER_CONFIG["in_page_click"] if in_page_click is None else in_page_click
+        self.grace_ms = grace_ms
+        self.panel_grace_ms = BROWSER_CONFIG["panel_grace_ms"] if panel_grace_ms is None else panel_grace_ms
+        self.stats = {"drill_downs": 0, "round_trips": 0, "fallback_clicks": 0}
+
+    def _watch(self, container_index: int, item_index: int, before: Optional[int], click: bool,
+               timeout: int) -> Dict:
+        self.stats["round_trips"] += 1
+        return self.page.evaluate(PANEL_WATCH_JS, {
+            "sel": SNAPSHOT_SELECTORS,
+            "containerIndex": container_index,
+            "itemIndex": item_index,
+            "before": before,
+            "click": click,
+            "timeout": timeout,
+            "grace": self.grace_ms,
+            "panelGrace": self.panel_grace_ms,
+        })
+
+    def drill_down(self, container_index: int, item_index: int, before: Optional[int] = None,
+                   locate: Optional[Callable[[], Locator]] = None, timeout: int = 5000) -> Dict:
+        """
+        点击大类中的项并等待细分面板
+
+        before 为点击前的容器数量（None 时由页面在点击前读取），locator 为真实点击时使用的定位器
+        返回 {"reason", "before", "snapshot", "wait": 等待记录}
+        """
+        self.stats["drill_downs"] += 1
+        start = time.perf_counter()
+
+        if self.in_page_click:
+            result = self._watch(container_index, item_index, before, True, timeout)
+        else:
+            result = {"reason": "no_effect", "before": before}
+
+        if result["reason"] in ("no_effect", "no_item"):
+            locator = locate() if locate else item_locator(self.page, container_index, item_index)
+            self.stats["fallback_clicks"] += 1
+            if result["before"] is None:
+                result["before"] = self.page.evaluate(COUNT_CONTAINERS_JS, SNAPSHOT_SELECTORS)
+                self.stats["round_trips"] += 1
+            locator.click()
+            self.stats["round_trips"] += 1
+            result = self._watch(container_index, item_index, result["before"], False, timeout)
+
+        wait = {
+            "name": "subdivision_panel",
+            "ok": result["reason"] in ("panel", "no_panel"),
+            "reason": result["reason"],
+            "waited": time.perf_counter() - start,
+            "timeout": timeout / 1000,
+        }
+        if self.waiter is not None:
+            self.waiter.records.append(wait)
+        result["wait"] = wait
+        return result
+
+    def print_summary(self, indent: str = "  "):
+        stats = self.stats
+        logger.info("%s细分面板: 下钻 %s 次, 往返 %s 次, 改用真实点击 %s 次",
+                    indent, stats['drill_downs'], stats['round_trips'], stats['fallback_clicks'])
@@ -0,0 +1,337 @@
+# 溜云库并行爬取：多个CDP页面/实例通过工作队列分担主导航或大类
+import argparse
+import queue
+import threading
+import time
+from typing import List, Dict, Optional
+from playwright.sync_api import sync_playwright
+from liuyunku_config import BROWSER_CONFIG, OUTPUT_CONFIG
+from liuyunku_final_v2 import LiuYunKuNavigationAutomator
+from liuyunku_targets import PagePool, rank_pages, target_id
+from liuyunku_cdp import probe_ports, cdp_endpoint
+from liuyunku_logging import get_logger, setup_logging, shutdown_logging
+
+logger = get_logger(__name__)
+
+
+class ParallelNavigationCrawler:
+    """
+    并行导航爬取器
+
+    mode:
+        "pages" - 在已连接的浏览器中打开 workers 个新页面（同一个溜云库实例）
+        "ports" - 每个工作线程连接 BROWSER_CONFIG["cdp_ports"] 中的一个存活的溜云库实例（先并发探测）
+    granularity:
+        "nav"      - 以主导航项为工作单元
+        "category" - 以大类为工作单元（先由主页面枚举大类）
+
+    Playwright同步API不能跨线程共享，每个工作线程各自启动Playwright并连接CDP。
+    截图写入池和去重截图库由主爬虫创建、所有工作线程共用（只有一份 index.json）。
+    """
+
+    def __init__(self, automator: LiuYunKuNavigationAutomator, workers: int = 2,
+                 mode: str = "pages", granularity: str = "nav", ports: Optional[List[str]] = None):
+        if mode not in ("pages", "ports"):
+            raise ValueError(f"未知的并行模式: {mode}")
+        if granularity not in ("nav", "category"):
+            raise ValueError(f"未知的任务粒度: {granularity}")
+
+        self.automator = automator
+        self.workers = workers
+        self.mode = mode
+        self.granularity = granularity
+        self.ports = ports or BROWSER_CONFIG["cdp_ports"]
+        self.start_url = automator.page.url if automator.page else None
+        # 主爬虫页面的 targetId：工作线程通过自己的连接枚举页面时排除它
+        self.main_target = target_id(automator.page) if automator.page else None
+
+        self.work_queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.results: Dict[tuple, Optional[Dict]] = {}
+        self.worker_stats: List[Dict] = []
+        self.pool = None  # 共用的截图写入池和去重截图库，run() 中创建
+        self.store = None
+
+    def plan(self) -> Dict:
+        """在主页面上枚举工作单元并放入队列，返回合并用的导航骨架"""
+        main_navs = self.automator.get_main_navigation_items()
+        skeleton = {"navs": main_navs, "nav_data": {}}
+
+        for nav_idx, nav_item in enumerate(main_navs):
+            if self.granularity == "nav":
+                self.work_queue.put({"nav_index": nav_idx, "nav_text": nav_item["text"]})
+                continue
+
+            # 大类粒度：打开下拉菜单读取大类标题，随后关闭
+            skeleton["nav_data"][nav_idx] = self.automator.build_nav_data(nav_item)
+            if not self.automator.open_dropdown_menu(nav_item):
+                logger.error("❌ 无法打开 %s 的下拉菜单，跳过", nav_item['text'])
+                continue
+
+            categories = self.automator.get_all_categories_from_dropdown()
+            for cat_idx, category in enumerate(categories):
+                self.work_queue.put({
+                    "nav_index": nav_idx,
+                    "nav_text": nav_item["text"],
+                    "category_index": cat_idx,
+                    "category_title": category["title"],
+                })
+            self.automator.close_dropdown_menu()
+
+        logger.info("📋 共 %s 个工作单元（粒度: %s）", self.work_queue.qsize(), self.granularity)
+        return skeleton
+
+    def run(self) -> Dict:
+        """并行处理所有工作单元，并按原始顺序合并为 navigation_data"""
+        logger.info("🚀 并行爬取开始：%s 个工作线程，模式 %s", self.workers, self.mode)
+
+        navigation_data = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "main_navigation": []
+        }
+
+        skeleton = self.plan()
+        if self.work_queue.empty():
+            return navigation_data
+
+        endpoints = self.worker_endpoints()
+        if not endpoints:
+            logger.error("❌ 没有可用的CDP端口，并行爬取取消")
+            return navigation_data
+
+        # 所有工作线程共用主爬虫的截图写入池和去重截图库
+        self.pool = self.automator.get_screenshot_pool()
+        self.store = self.automator.get_screenshot_store() if OUTPUT_CONFIG["screenshot_dedup"] else None
+
+        threads = []
+        for worker_id, cdp_url in enumerate(endpoints):
+            thread = threading.Thread(target=self._worker, args=(worker_id, cdp_url), daemon=True)
+            threads.append(thread)
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+        self.automator.close_screenshot_pool()
+
+        navigation_data["main_navigation"] = self.merge(skeleton)
+        self.report_throughput()
+        return navigation_data
+
+    def worker_endpoints(self) -> List[str]:
+        """每个工作线程连接的CDP地址；ports 模式下只保留探测存活的端口"""
+        if self.mode == "pages":
+            return [self.automator.cdp_url] * self.workers
+
+        endpoints = []
+        for probe in probe_ports(self.ports):
+            if probe["ok"]:
+                endpoints.append(cdp_endpoint(probe))
+            else:
+                logger.warning("⚠️  CDP端口 %s 未响应，跳过: %s", probe['port'], probe['error'])
+        logger.info("🔌 存活的CDP端口: %s/%s", len(endpoints), len(self.ports))
+        return endpoints
+
+    def merge(self, skeleton: Dict) -> List[Dict]:
+        """按主导航和大类的原始顺序合并各工作线程的结果"""
+        merged = []
+        for nav_idx in range(len(skeleton["navs"])):
+            if self.granularity == "nav":
+                nav_data = self.results.get((nav_idx,))
+                if nav_data is not None:
+                    merged.append(nav_data)
+                continue
+
+            nav_data = skeleton["nav_data"].get(nav_idx)
+            if nav_data is None:
+                continue
+            keys = sorted(key for key in self.results if key[0] == nav_idx)
+            nav_data["categories"] = [self.results[key] for key in keys if self.results[key] is not None]
+            merged.append(nav_data)
+        return merged
+
+    def _worker(self, worker_id: int, cdp_url: str):
+        """工作线程：连接CDP，取出工作单元直到队列为空"""
+        stats = {
+            "worker": worker_id,
+            "cdp_url": cdp_url,
+            "units": 0,
+            "subcategories": 0,
+            "busy": 0.0,
+            "error": None,
+        }
+        worker = LiuYunKuNavigationAutomator()
+        worker.screenshot_pool = self.pool
+        worker.screenshot_store = self.store
+        created_page = None
+        started = time.perf_counter()
+
+        try:
+            worker.playwright = sync_playwright().start()
+            worker.browser = worker.playwright.chromium.connect_over_cdp(cdp_url)
+            worker.cdp_url = cdp_url
+
+            if self.mode == "pages":
+                # 复用已打开的其他溜云库页面（排除主爬虫的页面），不够时新建页面
+                nav_pages = PagePool(rank_pages(worker.browser, stop_early=False, cdp_url=cdp_url)).nav_pages()
+                if self.main_target is not None:
+                    nav_pages = [candidate for candidate in nav_pages if target_id(candidate["page"]) != self.main_target]
+                else:
+                    # 取不到主页面的 targetId 时，按排序假定第一个页面是主爬虫的
+                    nav_pages = nav_pages[1:]
+                if worker_id < len(nav_pages):
+                    worker.page = nav_pages[worker_id]["page"]
+                else:
+                    context = worker.browser.contexts[0] if worker.browser.contexts else worker.browser.new_context()
+                    created_page = context.new_page()
+                    created_page.goto(self.start_url)
+                    worker.page = created_page
+            else:
+                pool = PagePool(rank_pages(worker.browser, cdp_url=cdp_url))
+                worker.page = pool.acquire() or worker.browser.new_page()
+
+            worker.page.set_default_timeout(BROWSER_CONFIG["page_timeout"])
+            navs = {nav["text"]: nav for nav in worker.get_main_navigation_items()}
+            state = {"nav_text": None, "categories": []}
+
+            while True:
+                try:
+                    unit = self.work_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                unit_start = time.perf_counter()
+                result = self._run_unit(worker, navs, state, unit)
+                stats["busy"] += time.perf_counter() - unit_start
+                stats["units"] += 1
+                stats["subcategories"] += self._count_subcategories(result)
+
+                key = (unit["nav_index"],) if "category_index" not in unit else (unit["nav_index"], unit["category_index"])
+                with self.lock:
+                    self.results[key] = result
+
+        except Exception as e:
+            stats["error"] = str(e)
+            logger.error("❌ 工作线程 %s 出错: %s", worker_id, e)
+
+        finally:
+            stats["elapsed"] = time.perf_counter() - started
+            with self.lock:
+                self.worker_stats.append(stats)
+            # 共用的写入池和截图库由 run() 在所有线程结束后关闭
+            worker.screenshot_pool = worker.screenshot_store = None
+            try:
+                if created_page:
+                    created_page.close()
+            except:
+                pass
+            try:
+                if worker.playwright:
+                    worker.playwright.stop()
+            except:
+                pass
+
+    def _run_unit(self, worker: LiuYunKuNavigationAutomator, navs: Dict, state: Dict, unit: Dict) -> Optional[Dict]:
+        """在工作线程自己的页面上处理一个工作单元"""
+        nav_item = navs.get(unit["nav_text"])
+        if not nav_item:
+            logger.warning("⚠️  工作线程页面中未找到主导航项: %s", unit['nav_text'])
+            return None
+
+        if "category_index" not in unit:
+            return worker.process_navigation(nav_item)
+
+        # 同一主导航的大类连续处理时复用已打开的下拉菜单
+        if state["nav_text"] != unit["nav_text"]:
+            if state["nav_text"] is not None:
+                worker.close_dropdown_menu()
+            state["nav_text"] = None
+            if not worker.open_dropdown_menu(nav_item):
+                return None
+            state["nav_text"] = unit["nav_text"]
+            state["categories"] = worker.get_all_categories_from_dropdown()
+
+        categories = state["categories"]
+        idx = unit["category_index"]
+        if idx >= len(categories) or categories[idx]["title"] != unit["category_title"]:
+            # 大类顺序与主页面不一致时按标题查找
+            matches = [cat for cat in categories if cat["title"] == unit["category_title"]]
+            if not matches:
+                logger.warning("⚠️  未找到大类: %s - %s", unit['nav_text'], unit['category_title'])
+                return None
+            category = matches[0]
+        else:
+            category = categories[idx]
+
+        return worker.process_category(nav_item, category)
+
+    def _count_subcategories(self, result: Optional[Dict]) -> int:
+        """统计工作单元结果中的细分项数量"""
+        if not result:
+            return 0
+        if "categories" in result:
+            return sum(len(cat["subcategories"]) for cat in result["categories"])
+        return len(result.get("subcategories", []))
+
+    def report_throughput(self):
+        """打印每个工作线程的吞吐量，用于选择并行数"""
+        logger.info("\n📊 并行吞吐量（%s / %s）:", self.mode, self.granularity)
+        total_units = 0
+        total_subcategories = 0
+        wall = 0.0
+        for stats in sorted(self.worker_stats, key=lambda s: s["worker"]):
+            minutes = stats["busy"] / 60 if stats["busy"] else 0
+            rate = stats["subcategories"] / minutes if minutes else 0
+            total_units += stats["units"]
+            total_subcategories += stats["subcategories"]
+            wall = max(wall, stats["elapsed"])
+            error = f"  ❌ {stats['error']}" if stats["error"] else ""
+            logger.info("  工作线程 %s (%s): %s 单元, %s 细分项, 忙碌 %.1fs, %.1f 细分项/分钟%s",
+                        stats['worker'], stats['cdp_url'], stats['units'], stats['subcategories'], stats['busy'],
+                        rate, error)
+        overall = total_subcategories / (wall / 60) if wall else 0
+        logger.info("  合计: %s 单元, %s 细分项, 墙钟 %.1fs, %.1f 细分项/分钟", total_units, total_subcategories, wall, overall)
+
+
+def main():
+    """主函数 - 并行爬取"""
+    parser = argparse.ArgumentParser(description="溜云库并行导航爬取")
+    parser.add_argument("--workers", type=int, default=2, help="pages模式下的页面数")
+    parser.add_argument("--mode", choices=["pages", "ports"], default="pages")
+    parser.add_argument("--granularity", choices=["nav", "category"], default="nav")
+    args = parser.parse_args()
+
+    setup_logging()
+    automator = LiuYunKuNavigationAutomator()
+
+    try:
+        if not automator.start_application():
+            logger.error("❌ 应用启动失败")
+            return
+
+        if not automator.navigate_to_online_material():
+            logger.error("❌ 无法导航到在线素材")
+            return
+
+        if not automator.connect_to_browser():
+            logger.error("❌ 无法连接到浏览器")
+            return
+
+        crawler = ParallelNavigationCrawler(
+            automator, workers=args.workers, mode=args.mode, granularity=args.granularity
+        )
+        navigation_data = crawler.run()
+
+        if navigation_data["main_navigation"]:
+            automator.save_navigation_data(navigation_data)
+
+    except Exception as e:
+        logger.error("❌ 并行爬取失败: %s", e)
+
+    finally:
+        if automator.playwright:
+            automator.playwright.stop()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# 溜云库截图去重：感知哈希（aHash/dHash，NumPy实现）+ 内容寻址存储
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+from io import BytesIO
+from typing import Dict, Optional
+from liuyunku_screenshots import ScreenshotWriterPool
+from liuyunku_logging import get_logger
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    np = None
+    Image = None
+
+logger = get_logger(__name__)
+
+
+def _grayscale(image, width: int, height: int):
+    """缩放为 width × height 的灰度矩阵"""
+    return np.asarray(image.convert("L").resize((width, height), Image.BILINEAR), dtype=np.float32)
+
+
+def _bits_to_int(bits) -> int:
+    return int.from_bytes(np.packbits(bits.flatten()).tobytes(), "big")
+
+
+def average_hash(image, size: int = 8) -> int:
+    """aHash：像素是否高于平均亮度"""
+    pixels = _grayscale(image, size, size)
+    return _bits_to_int(pixels > pixels.mean())
+
+
+def difference_hash(image, size: int = 8) -> int:
+    """dHash：每个像素是否比左侧像素更亮"""
+    pixels = _grayscale(image, size + 1, size)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ScreenshotStore:
+    """
+    内容寻址截图库
+
+    - 完全相同的截图（sha256相同）只存一份
+    - dHash 汉明距离不超过 threshold 的近似截图也只存一份，记录指向已有的那份
+    - 与上一张截图近似时标记 likely_unchanged（点击后页面很可能没有变化）
+
+    近似查找按 8 个字节分段建索引：距离 ≤ 7 的哈希至少有一段完全相同，不需要全量比较
+    需要 NumPy 和 Pillow；未安装时只做完全相同的去重
+    启动时载入已有的 index.json（跨运行去重，--resume 时保留中断前的记录），保存时与磁盘上的索引合并
+    add() 和 save_index() 加锁，多个工作线程可共用同一个截图库
+    """
+
+    BANDS = 8
+
+    def __init__(self, pool: ScreenshotWriterPool, directory: str, threshold: int = 5):
+        self.pool = pool
+        self.directory = directory
+        self.threshold = threshold
+        self.enabled = np is not None
+        self.entries: Dict[str, Dict] = {}  # 存储键 -> {"path", "dhash", "ahash", "refs"}
+        self.aliases: Dict[str, str] = {}  # sha256键 -> 存储键
+        self.band_index = defaultdict(set)
+        self.previous_dhash: Optional[int] = None
+        self.stats = {"captured": 0, "stored": 0, "exact": 0, "near": 0, "unchanged": 0, "bytes_saved": 0}
+        self.lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.loaded = self._merge_index(self._read_index())
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    def _read_index(self) -> Dict:
+        """读取磁盘上的 index.json（不存在或损坏时返回空索引）"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️  读取截图索引失败，重新建立: %s", e)
+            return {}
+
+    def _merge_index(self, index: Dict) -> int:
+        """把索引中尚未载入的条目（文件仍存在的）并入内存，返回并入的条目数"""
+        merged = 0
+        for key, record in index.items():
+            if key in self.entries:
+                for sha in record.get("aliases", []):
+                    self.aliases.setdefault(sha, key)
+                continue
+            if not os.path.exists(record["path"]):
+                continue
+            dhash = int(record["dhash"], 16) if record.get("dhash") else None
+            ahash = int(record["ahash"], 16) if record.get("ahash") else None
+            self.entries[key] = {"path": record["path"], "dhash": dhash, "ahash": ahash, "refs": record.get("refs", 0)}
+            self.aliases.setdefault(key, key)
+            for sha in record.get("aliases", []):
+                self.aliases.setdefault(sha, key)
+            if dhash is not None:
+                for band in self._bands(dhash):
+                    self.band_index[band].add(key)
+            merged += 1
+        return merged
+
+    def _bands(self, value: int):
+        return [(band, (value >> (band * 8)) & 0xFF) for band in range(self.BANDS)]
+
+    def _find_near(self, dhash: int) -> Optional[str]:
+        """查找 dHash 距离不超过阈值的已存截图"""
+        candidates = set()
+        for band in self._bands(dhash):
+            candidates |= self.band_index[band]
+
+        best_key, best_distance = None, self.threshold + 1
+        for key in candidates:
+            distance = hamming(dhash, self.entries[key]["dhash"])
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        return best_key
+
+    def add(self, data: bytes, extension: str = "png") -> Dict:
+        """
+        加入一张截图
+
+        返回 {"hash": 存储键, "path", "duplicate": None/"exact"/"near", "likely_unchanged", "distance"}
+        """
+        with self.lock:
+            return self._add(data, extension)
+
+    def _add(self, data: bytes, extension: str) -> Dict:
+        self.stats["captured"] += 1
+        sha_key = hashlib.sha256(data).hexdigest()[:20]
+        duplicate = None
+        dhash = ahash = None
+
+        if sha_key in self.aliases:
+            key = self.aliases[sha_key]
+            duplicate = "exact"
+            dhash = self.entries[key]["dhash"]
+        else:
+            if self.enabled:
+                with Image.open(BytesIO(data)) as image:
+                    image.load()
+                    dhash = difference_hash(image)
+                    ahash = average_hash(image)
+
+            key = self._find_near(dhash) if dhash is not None else None
+            if key is not None:
+                duplicate = "near"
+            else:
+                key = sha_key
+                path = self.pool.submit(key, data, directory=self.directory, extension=extension)
+                self.entries[key] = {"path": path, "dhash": dhash, "ahash": ahash, "refs": 0}
+                if dhash is not None:
+                    for band in self._bands(dhash):
+                        self.band_index[band].add(key)
+                self.stats["stored"] += 1
+            self.aliases[sha_key] = key
+
+        entry = self.entries[key]
+        entry["refs"] += 1
+        if duplicate:
+            self.stats[duplicate] += 1
+            self.stats["bytes_saved"] += len(data)
+
+        distance = None
+        if dhash is not None and self.previous_dhash is not None:
+            distance = hamming(dhash, self.previous_dhash)
+        likely_unchanged = distance is not None and distance <= self.threshold
+        if likely_unchanged:
+            self.stats["unchanged"] += 1
+        self.previous_dhash = dhash
+
+        return {
+            "hash": key,
+            "path": entry["path"],
+            "duplicate": duplicate,
+            "likely_unchanged": likely_unchanged,
+            "distance": distance,
+        }
+
+    def save_index(self) -> str:
+        """把存储索引写入 index.json：先并入磁盘上其他运行新写的条目，再写临时文件并替换"""
+        with self.lock:
+            return self._save_index()
+
+    def _save_index(self) -> str:
+        path = self.index_path
+        self._merge_index(self._read_index())
+        index = {
+            key: {
+                "path": entry["path"],
+                "dhash": f"{entry['dhash']:016x}" if entry["dhash"] is not None else None,
+                "ahash": f"{entry['ahash']:016x}" if entry["ahash"] is not None else None,
+                "refs": entry["refs"],
+                "aliases": sorted(sha for sha, target in self.aliases.items() if target == key and sha != key),
+            }
+            for key, entry in self.entries.items()
+        }
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+        return path
+
+    def print_summary(self, indent: str = "  "):
+        stats = self.stats
+        logger.info("%s截图去重: 共 %s 张, 实际存储 %s 张, 完全相同 %s 张, 近似 %s 张, 节省 %.0fKB",
+                    indent, stats['captured'], stats['stored'], stats['exact'], stats['near'],
+                    stats['bytes_saved'] / 1024)
+        if stats["unchanged"]:
+            logger.warning("%s⚠️  %s 次点击后截图与上一张近似，页面可能没有变化", indent, stats['unchanged'])
@@ -0,0 +1,329 @@
+# 溜云库在线素材页面的本地复刻：由导航数据生成自包含的HTML（主导航、HoverCard下拉菜单、大类/细分容器、结果区），渲染延迟可配置
+import argparse
+import json
+import os
+from typing import List, Dict, Optional, Union
+from liuyunku_config import OUTPUT_CONFIG, SELECTOR_CONFIG
+from liuyunku_logging import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+# 各处渲染延迟（毫秒）：
+#   nav      页面加载后渲染主导航列表
+#   dropdown 点击主导航后显示下拉菜单
+#   close    按 Escape 后隐藏下拉菜单
+#   active   点击项后激活样式移动到该项
+#   panel    点击大类中的项后出现细分面板
+#   grid     点击后结果区重新渲染
+DEFAULT_DELAYS = {"nav": 200, "dropdown": 150, "close": 50, "active": 30, "panel": 250, "grid": 400}
+
+# 导航数据中没有细分项时，每个细分面板生成的项数（不含"全部"）
+DEFAULT_SUBDIVISIONS = 4
+
+# 结果区的素材卡片数
+DEFAULT_CARDS = 12
+
+# 复刻页面使用的CSS Modules类名（与 SELECTOR_CONFIG 的前缀匹配，哈希后缀与真实页面不同）
+REPLICA_CLASSES = {
+    "nav_item": "navList_item__k8PqL",
+    "dropdown": "mantine-HoverCard-dropdown",
+    "container": "maxClassList_max_children_class__x1Y2z",
+    "title": "maxClassList_max_title__c3D4e",
+    "item": "maxClassList_item__aB3dE",
+    "close": "maxClassList_close__Qw7eR",
+    "active": SELECTOR_CONFIG["active_class"] + "Hn5Tb",
+    "grid": "materialList_list__m4TzQ",
+    "card": "materialList_card__Zp3Lk",
+}
+
+REPLICA_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+  <meta charset="utf-8">
+  <title>溜云库 - 在线素材（本地复刻）</title>
+  <style>
+    body { margin: 0; font-family: sans-serif; font-size: 13px; }
+    #header { position: relative; height: 48px; background: #20232a; }
+    ul[data-rfd-droppable-id='nav-list'] { display: flex; margin: 0; padding: 0 12px; list-style: none; }
+    ul[data-rfd-droppable-id='nav-list'] li { padding: 14px 12px; color: #ccc; cursor: pointer; }
+    ul[data-rfd-droppable-id='nav-list'] li p { margin: 0; }
+    .mantine-HoverCard-dropdown { top: 48px; left: 12px; right: 12px; z-index: 10; padding: 8px 12px;
+      background: #fff; border: 1px solid #ddd; box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15); }
+    .mantine-HoverCard-dropdown ul { display: flex; flex-wrap: wrap; margin: 4px 0 8px; padding: 0; list-style: none; }
+    .mantine-HoverCard-dropdown li { margin: 2px 4px; padding: 2px 6px; cursor: pointer; }
+    #grid { display: flex; flex-wrap: wrap; gap: 8px; padding: 12px; min-height: 400px; }
+    #grid > div { width: 140px; }
+    #grid img { width: 140px; height: 105px; display: block; }
+    #grid p { margin: 4px 0; }
+  </style>
+</head>
+<body>
+  <div id="header">
+    <ul data-rfd-droppable-id="nav-list"></ul>
+  </div>
+  <div id="grid"></div>
+  <script>
+    const R = __REPLICA__;
+    const C = R.classes;
+    const D = R.delays;
+    C.active_selector = 'li.' + C.active;
+
+    const header = document.getElementById('header');
+    const navList = header.querySelector("ul[data-rfd-droppable-id='nav-list']");
+    const grid = document.getElementById('grid');
+    grid.className = C.grid;
+    const dropdowns = [];
+    const timers = {};
+    let openIndex = -1;
+
+    const el = (tag, className, text) => {
+      const node = document.createElement(tag);
+      if (className) node.className = className;
+      if (text !== undefined) node.textContent = text;
+      return node;
+    };
+    const later = (name, ms, fn) => {
+      clearTimeout(timers[name]);
+      timers[name] = setTimeout(fn, ms);
+    };
+    const activate = (li) => setTimeout(() => {
+      li.parentNode.querySelectorAll(C.active_selector).forEach((other) => other.classList.remove(C.active));
+      li.classList.add(C.active);
+    }, D.active);
+
+    // 结果区：清空后延迟渲染卡片，图片为按路径着色的SVG
+    const cardImage = (key, i) => {
+      let hue = 0;
+      for (const ch of key) hue = (hue * 31 + ch.charCodeAt(0)) % 360;
+      const svg = '<svg xmlns="http://www.w3.org/2000/svg" width="140" height="105">' +
+        '<rect width="140" height="105" fill="hsl(' + ((hue + i * 23) % 360) + ',55%,70%)"/>' +
+        '<text x="10" y="60" font-size="28">' + (i + 1) + '</text></svg>';
+      return 'data:image/svg+xml;charset=utf-8,' + encodeURIComponent(svg);
+    };
+    const renderGrid = (key) => {
+      grid.textContent = '';
+      grid.setAttribute('aria-busy', 'true');
+      later('grid', D.grid, () => {
+        for (let i = 0; i < R.cards; i++) {
+          const card = el('div', C.card);
+          const img = el('img');
+          img.src = cardImage(key, i);
+          img.alt = key + ' ' + (i + 1);
+          card.appendChild(img);
+          card.appendChild(el('p', null, key + ' #' + (i + 1)));
+          grid.appendChild(card);
+        }
+        grid.removeAttribute('aria-busy');
+      });
+    };
+
+    const container = (title, labels, onClick) => {
+      const node = el('div', C.container);
+      node.appendChild(el('span', C.title, title));
+      const ul = el('ul');
+      labels.forEach((label, i) => {
+        const li = el('li', C.item + (i === 0 ? ' ' + C.active : ''));
+        li.appendChild(el('span', null, label));
+        if (i > 0) li.appendChild(el('span', C.close, '×'));
+        li.addEventListener('click', () => onClick(li, label));
+        ul.appendChild(li);
+      });
+      node.appendChild(ul);
+      return node;
+    };
+
+    // 点击大类中的项：移动激活样式，移除旧的细分面板，延迟追加新的细分面板
+    const selectCategory = (nav, dropdown, category, li, label) => {
+      activate(li);
+      const old = dropdown.querySelector("[data-replica='subdivision']");
+      if (old) old.remove();
+      later('panel', D.panel, () => {
+        const names = category.subdivisions.length ? category.subdivisions
+          : Array.from({length: R.subdivisions}, (_, n) => (label === '全部' ? nav.text : label) + (n + 1));
+        const panel = container('细分：', ['全部'].concat(names), (sub, subLabel) => {
+          activate(sub);
+          renderGrid(nav.text + '/' + label + '/' + subLabel);
+        });
+        panel.dataset.replica = 'subdivision';
+        dropdown.appendChild(panel);
+      });
+      renderGrid(nav.text + '/' + label);
+    };
+
+    const closeDropdown = () => {
+      if (openIndex < 0) return;
+      const dropdown = dropdowns[openIndex];
+      openIndex = -1;
+      clearTimeout(timers.dropdown);
+      clearTimeout(timers.panel);
+      dropdown.setAttribute('style', 'display: none');
+      dropdown.textContent = '';
+    };
+
+    const openDropdown = (ni) => {
+      if (openIndex === ni) return;
+      closeDropdown();
+      openIndex = ni;
+      const nav = R.navigation[ni];
+      navList.querySelectorAll(C.active_selector).forEach((other) => other.classList.remove(C.active));
+      navList.children[ni].classList.add(C.active);
+      later('dropdown', D.dropdown, () => {
+        const dropdown = dropdowns[ni];
+        nav.categories.forEach((category) => {
+          dropdown.appendChild(container(category.title, category.items,
+            (li, label) => selectCategory(nav, dropdown, category, li, label)));
+        });
+        dropdown.setAttribute('style', 'position: absolute');
+      });
+    };
+
+    document.addEventListener('keydown', (event) => {
+      if (event.key === 'Escape') later('close', D.close, closeDropdown);
+    });
+
+    // 主导航列表：页面加载后延迟渲染（对应前端框架挂载）
+    later('nav', D.nav, () => {
+      R.navigation.forEach((nav, ni) => {
+        const li = el('li', C.nav_item + (nav.is_active ? ' ' + C.active : ''));
+        li.setAttribute('data-rfd-draggable-id', nav.data_id);
+        const p = el('p', null, nav.text);
+        p.setAttribute('datatype', nav.data_type);
+        li.appendChild(p);
+        li.addEventListener('click', () => openDropdown(ni));
+        navList.appendChild(li);
+
+        const dropdown = el('div', C.dropdown);
+        dropdown.setAttribute('role', 'dialog');
+        dropdown.setAttribute('style', 'display: none');
+        header.appendChild(dropdown);
+        dropdowns.push(dropdown);
+      });
+    });
+    renderGrid('初始');
+  </script>
+</body>
+</html>
+"""
+
+
+def _texts(values: List[Union[str, Dict]]) -> List[str]:
+    """项列表可以是文本，也可以是带 text 字段的记录"""
+    return [value if isinstance(value, str) else value.get("text", "") for value in values or []]
+
+
+def _category(category: Dict, max_items: Optional[int]) -> Dict:
+    """
+    把导航数据中的大类转换为复刻模型
+
+    兼容两种格式：调试脚本的 first_level / second_level，以及最终版输出的 items / subcategories
+    """
+    items = _texts(category.get("items") or category.get("first_level")) or ["全部"]
+    if items[0] != "全部":
+        items.insert(0, "全部")
+    if max_items:
+        items = items[:max_items]
+    recorded = _texts(category.get("subcategories") or category.get("second_level"))
+    return {
+        "title": category["title"],
+        "items": items,
+        "subdivisions": [text for text in recorded if text and text != "全部"],
+    }
+
+
+def _filler_navigation(text: str, items: int) -> Dict:
+    """导航数据中缺少的主导航：生成一个只有一个大类的下拉菜单"""
+    return {
+        "text": text,
+        "categories": [{"title": "大类：", "items": ["全部"] + [f"{text}{n}" for n in range(1, items)]}],
+    }
+
+
+def load_replica_model(path: str = OUTPUT_CONFIG["navigation_data_file"], fill_targets: Optional[List[str]] = None,
+                       max_items: Optional[int] = None, max_navs: Optional[int] = None) -> List[Dict]:
+    """
+    读取导航数据并生成复刻模型
+
+    fill_targets 中导航数据没有的主导航会补上生成的下拉菜单（文件不存在时全部生成）
+    返回 [{"text", "data_id", "data_type", "is_active", "categories": [{"title", "items", "subdivisions"}]}]
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            navigation = json.load(f).get("main_navigation", [])
+    except (OSError, ValueError) as e:
+        logger.warning("⚠️  读取导航数据失败，使用生成的导航: %s", e)
+        navigation = []
+
+    known = {nav["text"] for nav in navigation}
+    for text in fill_targets or []:
+        if text not in known:
+            navigation.append(_filler_navigation(text, max_items or 8))
+    if max_navs:
+        navigation = navigation[:max_navs]
+
+    used_types = {str(nav["data_type"]) for nav in navigation if nav.get("data_type")}
+    next_type = 1
+    model = []
+    for index, nav in enumerate(navigation):
+        data_type = nav.get("data_type")
+        if not data_type:
+            while str(next_type) in used_types:
+                next_type += 1
+            data_type = str(next_type)
+            used_types.add(data_type)
+        model.append({
+            "text": nav["text"],
+            "data_id": nav.get("data_id") or f"nav-{index}",
+            "data_type": str(data_type),
+            "is_active": bool(nav.get("is_active")) if "is_active" in nav else index == 0,
+            "categories": [_category(category, max_items) for category in nav.get("categories", [])],
+        })
+    return model
+
+
+def scale_delays(delays: Optional[Dict[str, int]] = None, factor: float = 1.0) -> Dict[str, int]:
+    """按比例缩放渲染延迟（未给出的键取 DEFAULT_DELAYS）"""
+    merged = dict(DEFAULT_DELAYS, **(delays or {}))
+    return {name: int(ms * factor) for name, ms in merged.items()}
+
+
+def render_replica(model: List[Dict], delays: Optional[Dict[str, int]] = None,
+                   subdivisions: int = DEFAULT_SUBDIVISIONS, cards: int = DEFAULT_CARDS) -> str:
+    """生成复刻页面的HTML"""
+    replica = {
+        "navigation": model,
+        "delays": scale_delays(delays),
+        "classes": REPLICA_CLASSES,
+        "subdivisions": subdivisions,
+        "cards": cards,
+    }
+    payload = json.dumps(replica, ensure_ascii=False).replace("</", "<\\/")
+    return REPLICA_TEMPLATE.replace("__REPLICA__", payload)
+
+
+def write_replica(path: str, model: List[Dict], delays: Optional[Dict[str, int]] = None,
+                  subdivisions: int = DEFAULT_SUBDIVISIONS, cards: int = DEFAULT_CARDS) -> str:
+    """写出复刻页面，返回 file:// 地址"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_replica(model, delays, subdivisions, cards))
+    return "file://" + os.path.abspath(path)
+
+
+def main():
+    from liuyunku_final_v2 import TARGET_ORDER
+
+    parser = argparse.ArgumentParser(description="由导航数据生成溜云库在线素材页面的本地复刻")
+    parser.add_argument("--input", default=OUTPUT_CONFIG["navigation_data_file"], help="导航数据JSON")
+    parser.add_argument("--output", default="liuyunku_replica.html", help="输出的HTML文件")
+    parser.add_argument("--delay-scale", type=float, default=1.0, help="渲染延迟缩放比例（0 为立即渲染）")
+    parser.add_argument("--items", type=int, default=None, help="每个大类最多保留的项数")
+    parser.add_argument("--subdivisions", type=int, default=DEFAULT_SUBDIVISIONS, help="生成的细分项数")
+    args = parser.parse_args()
+    setup_logging({"file_output": False})
+
+    model = load_replica_model(args.input, fill_targets=TARGET_ORDER, max_items=args.items)
+    url = write_replica(args.output, model, scale_delays(factor=args.delay_scale), args.subdivisions)
+    logger.info("✅ 已生成复刻页面: %s（主导航 %s 个）", url, len(model))
+
+
+if __name__ == "__main__":
+    main()
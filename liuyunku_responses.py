@@ -0,0 +1,184 @@
+# 溜云库素材列表接口捕获：监听 page 的 request/response 事件，按导航路径保存素材列表JSON，按素材ID去重并统计各接口延迟
+import json
+import re
+import time
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlparse
+from playwright.sync_api import Page, Request, Response
+from liuyunku_config import BROWSER_CONFIG
+from liuyunku_spans import percentile
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+# 只捕获这些类型的请求
+CAPTURE_RESOURCE_TYPES = ("xhr", "fetch")
+
+
+def find_materials(payload, id_keys: List[str], depth: int = 4) -> List[Dict]:
+    """
+    在接口返回的JSON中找到素材列表：按广度优先找到第一个"元素为字典且带ID字段"的列表
+
+    没有找到时返回空列表
+    """
+    level = [payload]
+    for _ in range(depth):
+        next_level = []
+        for value in level:
+            if isinstance(value, list):
+                if value and all(isinstance(item, dict) for item in value) and \
+                        any(key in value[0] for key in id_keys):
+                    return value
+                next_level.extend(value)
+            elif isinstance(value, dict):
+                next_level.extend(value.values())
+        level = next_level
+    return []
+
+
+def material_id(material: Dict, id_keys: List[str]) -> Optional[str]:
+    for key in id_keys:
+        if material.get(key) is not None:
+            return str(material[key])
+    return None
+
+
+def _latency(response: Response) -> Optional[float]:
+    """请求发出到响应结束的耗时（秒），读取不到计时信息时为 None"""
+    try:
+        timing = response.request.timing
+        end = timing["responseEnd"] if timing["responseEnd"] >= 0 else timing["responseStart"]
+        return end / 1000 if end >= 0 else None
+    except Exception:
+        return None
+
+
+class ResponseCapture:
+    """
+    素材列表接口捕获
+
+    - set_path() 设置当前导航路径；请求发出时记下路径，响应按请求时的路径归属（不受后续点击影响）
+    - 事件处理函数只登记响应；drain() 在主流程中读取响应体、提取素材并写入JSONL，避免在事件回调中调用同步API
+    - 每行一个记录：
+        {"type": "listing", "ts", "path", "endpoint", "status", "latency", "ids", "new"}
+        {"type": "material", "ts", "id", "path", "endpoint", "material"}   每个素材ID只写一次
+    """
+
+    def __init__(self, page: Page, path: str, append: bool = False, patterns: Optional[List[str]] = None,
+                 id_keys: Optional[List[str]] = None):
+        self.page = page
+        self.path = path
+        self.patterns = [re.compile(p) for p in (patterns or BROWSER_CONFIG["material_api_patterns"])]
+        self.id_keys = id_keys or BROWSER_CONFIG["material_id_keys"]
+        self.current_path: Optional[Tuple[str, ...]] = None
+        self.request_paths: Dict[Request, Tuple[str, ...]] = {}
+        self.pending: List[Tuple[Tuple[str, ...], Response]] = []
+        self.seen_ids = set()
+        self.latencies: Dict[str, List[float]] = {}
+        self.stats = {"responses": 0, "materials": 0, "duplicates": 0, "errors": 0}
+        self.installed = False
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def _matches(self, request: Request) -> bool:
+        return request.resource_type in CAPTURE_RESOURCE_TYPES and any(p.search(request.url) for p in self.patterns)
+
+    def _on_request(self, request: Request):
+        if self.current_path is not None and self._matches(request):
+            self.request_paths[request] = self.current_path
+
+    def _on_response(self, response: Response):
+        request = response.request
+        if self._matches(request):
+            self.pending.append((self.request_paths.pop(request, self.current_path), response))
+
+    def install(self):
+        if not self.installed:
+            self.page.on("request", self._on_request)
+            self.page.on("response", self._on_response)
+            self.installed = True
+
+    def uninstall(self):
+        if self.installed:
+            self.page.remove_listener("request", self._on_request)
+            self.page.remove_listener("response", self._on_response)
+            self.installed = False
+
+    def set_path(self, *path: str):
+        """设置之后发出的请求所属的导航路径（主导航, 大类, 细分项）"""
+        self.current_path = tuple(path)
+
+    def _write(self, record: Dict):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def drain(self) -> int:
+        """处理已到达的响应，返回本次新增的素材数"""
+        added = 0
+        pending, self.pending = self.pending, []
+        for path, response in pending:
+            endpoint = urlparse(response.url).path
+            try:
+                payload = response.json()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.debug("      ⚠️  读取接口响应失败 %s: %s", endpoint, e)
+                continue
+
+            latency = _latency(response)
+            if latency is not None:
+                self.latencies.setdefault(endpoint, []).append(latency)
+            self.stats["responses"] += 1
+
+            ids, new = [], 0
+            ts = time.strftime("%Y-%m-%d %H:%M:%S")
+            for material in find_materials(payload, self.id_keys):
+                mid = material_id(material, self.id_keys)
+                if mid is None:
+                    continue
+                ids.append(mid)
+                if mid in self.seen_ids:
+                    self.stats["duplicates"] += 1
+                    continue
+                self.seen_ids.add(mid)
+                new += 1
+                self._write({"type": "material", "ts": ts, "id": mid, "path": list(path or ()),
+                             "endpoint": endpoint, "material": material})
+
+            self._write({"type": "listing", "ts": ts, "path": list(path or ()), "endpoint": endpoint,
+                         "status": response.status, "latency": latency, "ids": ids, "new": new})
+            self.stats["materials"] += new
+            added += new
+
+        if pending:
+            self.file.flush()
+        return added
+
+    def latency_summary(self) -> Dict[str, Dict]:
+        """按接口汇总请求次数和延迟的 p50/p95/max"""
+        return {
+            endpoint: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "max": max(values),
+            }
+            for endpoint, values in self.latencies.items()
+        }
+
+    def print_summary(self, indent: str = "  "):
+        stats = self.stats
+        logger.info("%s素材接口: 响应 %s 个, 素材 %s 个, 重复 %s 个, 读取失败 %s 个 → %s",
+                    indent, stats['responses'], stats['materials'], stats['duplicates'], stats['errors'], self.path)
+        for endpoint, stat in self.latency_summary().items():
+            logger.info("%s  %s: %s 次, p50 %.0fms, p95 %.0fms, 最长 %.0fms",
+                        indent, endpoint, stat['count'], stat['p50'] * 1000, stat['p95'] * 1000, stat['max'] * 1000)
+
+    def close(self):
+        try:
+            self.drain()
+        except Exception:
+            pass
+        self.uninstall()
+        try:
+            self.file.close()
+        except:
+            pass
@@ -0,0 +1,75 @@
+# 溜云库分类模式：只爬取分类结构时用 page.route 拦截图片、字体、媒体（可选素材列表API）请求
+import re
+from collections import Counter
+from typing import Optional
+from playwright.sync_api import Page, Route
+from liuyunku_config import BROWSER_CONFIG
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+# 拦截所有请求，由处理函数决定放行还是中止
+ROUTE_PATTERN = "**/*"
+
+
+class TaxonomyMode:
+    """
+    分类模式的请求拦截规则
+
+    - enable() 安装路由：resource_type 属于 BROWSER_CONFIG["taxonomy_block_types"] 的请求直接中止；
+      block_api 时 URL 匹配 BROWSER_CONFIG["material_api_patterns"] 的请求也中止
+    - 其余请求 fallback()，交给其他路由（如HAR回放）或正常发出
+    - disable() 移除路由；需要截图时必须先调用（已被中止的图片不会自动重新加载，之后的点击会重新请求）
+    stats 按 resource_type 记录中止和放行的请求数
+    """
+
+    def __init__(self, page: Page, block_api: Optional[bool] = None):
+        self.page = page
+        self.block_api = BROWSER_CONFIG["taxonomy_block_api"] if block_api is None else block_api
+        self.block_types = set(BROWSER_CONFIG["taxonomy_block_types"])
+        self.api_patterns = [re.compile(pattern) for pattern in BROWSER_CONFIG["material_api_patterns"]]
+        self.enabled = False
+        self.blocked = Counter()
+        self.passed = Counter()
+
+    def _blocks(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.block_types:
+            return True
+        return self.block_api and any(pattern.search(url) for pattern in self.api_patterns)
+
+    def _handle(self, route: Route):
+        request = route.request
+        if self._blocks(request.resource_type, request.url):
+            self.blocked[request.resource_type] += 1
+            route.abort("blockedbyclient")
+        else:
+            self.passed[request.resource_type] += 1
+            route.fallback()
+
+    def enable(self) -> bool:
+        """安装拦截路由（已安装时不重复安装）"""
+        if self.enabled:
+            return True
+        try:
+            self.page.route(ROUTE_PATTERN, self._handle)
+            self.enabled = True
+            logger.info("🚫 分类模式: 拦截 %s%s", ", ".join(sorted(self.block_types)),
+                        " 和素材列表API" if self.block_api else "")
+            return True
+        except Exception as e:
+            logger.warning("⚠️  安装请求拦截失败: %s", e)
+            return False
+
+    def disable(self):
+        """移除拦截路由"""
+        if not self.enabled:
+            return
+        try:
+            self.page.unroute(ROUTE_PATTERN, self._handle)
+        except Exception as e:
+            logger.warning("⚠️  移除请求拦截失败: %s", e)
+        self.enabled = False
+
+    def print_summary(self, indent: str = "  "):
+        blocked = sum(self.blocked.values())
+        logger.info("%s分类模式: 中止 %s 个请求 %s, 放行 %s 个", indent, blocked, dict(self.blocked), sum(self.passed.values()))
@@ -0,0 +1,176 @@
+# 溜云库截图写入池：截图以字节返回，由后台线程负责压缩、命名和落盘（fsync）
+import os
+import queue
+import re
+import threading
+import time
+from io import BytesIO
+from typing import List, Dict, Optional
+from liuyunku_config import OUTPUT_CONFIG
+from liuyunku_logging import get_logger
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = get_logger(__name__)
+
+# 文件名中不允许出现的字符
+_UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+def safe_filename(name: str) -> str:
+    """把导航路径拼成的名称转换为安全的文件名"""
+    return _UNSAFE_CHARS.sub("_", name).strip("_") or "screenshot"
+
+
+class ScreenshotWriterPool:
+    """
+    有界的后台截图写入池
+
+    submit() 在队列已满时阻塞（背压），阻塞时间计入统计；
+    工作线程负责PNG重新压缩（需要Pillow）、写入临时文件、fsync 并原子重命名
+    """
+
+    def __init__(self, directory: str = OUTPUT_CONFIG["screenshot_dir"], workers: int = 2,
+                 max_queue: int = 8, compress: bool = True):
+        self.directory = directory
+        self.compress = compress and Image is not None
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.names = set()
+        self.stats = {
+            "submitted": 0,
+            "written": 0,
+            "failed": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "max_depth": 0,
+            "depth_total": 0,
+            "backpressure_wait": 0.0,
+        }
+        self.latencies: List[float] = []
+
+        # 每次运行只创建一次目录
+        os.makedirs(directory, exist_ok=True)
+
+        self.threads = [
+            threading.Thread(target=self._worker, name=f"screenshot-writer-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def path_for(self, name: str, extension: str = "png", directory: Optional[str] = None) -> str:
+        """为名称生成唯一的截图路径（同名时追加序号）"""
+        directory = directory or self.directory
+        base = safe_filename(name)
+        with self.lock:
+            candidate = base
+            counter = 1
+            while (directory, candidate) in self.names:
+                counter += 1
+                candidate = f"{base}_{counter}"
+            self.names.add((directory, candidate))
+        return os.path.join(directory, f"{candidate}.{extension}")
+
+    def submit(self, name: str, data: bytes, directory: Optional[str] = None, extension: str = "png") -> str:
+        """提交截图字节，返回最终的文件路径；队列已满时阻塞（directory 需已存在）"""
+        path = self.path_for(name, extension=extension, directory=directory)
+
+        started = time.perf_counter()
+        self.queue.put((path, data, time.perf_counter()))
+        waited = time.perf_counter() - started
+        depth = self.queue.qsize()
+
+        with self.lock:
+            self.stats["submitted"] += 1
+            self.stats["bytes_in"] += len(data)
+            self.stats["depth_total"] += depth
+            self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+            self.stats["backpressure_wait"] += waited
+        return path
+
+    def _worker(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                self.queue.task_done()
+                break
+
+            path, data, submitted_at = job
+            try:
+                # JPEG/WebP 在截图时已经编码，只重新压缩PNG
+                output = self._compress(data) if self.compress and path.endswith(".png") else data
+                temp_path = path + ".tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(output)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, path)
+
+                with self.lock:
+                    self.stats["written"] += 1
+                    self.stats["bytes_out"] += len(output)
+                    self.latencies.append(time.perf_counter() - submitted_at)
+            except Exception as e:
+                logger.error("      ❌ 写入截图失败 %s: %s", path, e)
+                with self.lock:
+                    self.stats["failed"] += 1
+            finally:
+                self.queue.task_done()
+
+    def _compress(self, data: bytes) -> bytes:
+        """用Pillow重新压缩PNG，结果更大时保留原始数据"""
+        buffer = BytesIO()
+        with Image.open(BytesIO(data)) as image:
+            image.save(buffer, format="PNG", optimize=True)
+        compressed = buffer.getvalue()
+        return compressed if len(compressed) < len(data) else data
+
+    def flush(self):
+        """等待队列中的截图全部写完"""
+        self.queue.join()
+
+    def close(self):
+        """写完剩余截图并停止工作线程"""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def summary(self) -> Dict:
+        """写入统计：数量、字节、队列深度、背压等待和写入延迟"""
+        with self.lock:
+            stats = dict(self.stats)
+            latencies = sorted(self.latencies)
+
+        submitted = stats["submitted"] or 1
+        stats["avg_depth"] = stats.pop("depth_total") / submitted
+        if latencies:
+            stats["latency_avg"] = sum(latencies) / len(latencies)
+            stats["latency_p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            stats["latency_max"] = latencies[-1]
+        return stats
+
+    def print_summary(self, indent: str = "  "):
+        stats = self.summary()
+        logger.info("%s截图写入: %s/%s 张, 失败 %s 张, %.0fKB → %.0fKB",
+                    indent, stats['written'], stats['submitted'], stats['failed'], stats['bytes_in'] / 1024,
+                    stats['bytes_out'] / 1024)
+        logger.info("%s队列深度: 平均 %.1f, 最大 %s, 背压等待 %.2fs",
+                    indent, stats['avg_depth'], stats['max_depth'], stats['backpressure_wait'])
+        if "latency_avg" in stats:
+            logger.info("%s写入延迟: 平均 %.0fms, p95 %.0fms, 最大 %.0fms",
+                        indent, stats['latency_avg'] * 1000, stats['latency_p95'] * 1000, stats['latency_max'] * 1000)
+
+
+def open_pool(directory: Optional[str] = None) -> ScreenshotWriterPool:
+    """按 OUTPUT_CONFIG 创建截图写入池"""
+    return ScreenshotWriterPool(
+        directory=directory or OUTPUT_CONFIG["screenshot_dir"],
+        workers=OUTPUT_CONFIG["screenshot_writers"],
+        max_queue=OUTPUT_CONFIG["screenshot_queue_size"],
+        compress=OUTPUT_CONFIG["screenshot_compress"],
+    )
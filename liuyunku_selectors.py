@@ -0,0 +1,158 @@
+# 溜云库选择器注册表：由 SELECTOR_CONFIG 生成，CSS Modules 类名（如 maxClassList_active__9kpsY）只按前缀匹配，启动时一次evaluate校验
+import re
+from typing import List, Dict, Optional
+from playwright.sync_api import Page, ElementHandle
+from liuyunku_config import SELECTOR_CONFIG
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+# SELECTOR_CONFIG 中不是选择器的项（类名前缀）
+CLASS_PREFIXES = ("active_class",)
+
+# 只在某个容器内有意义的选择器（如 "li"、"span"），校验时拼在容器选择器之后
+SELECTOR_SCOPES = {
+    "main_nav_item": "main_nav_container",
+    "main_nav_text": "main_nav_item",
+    "subcategory_item": "category_container",
+    "subcategory_text": "subcategory_item",
+}
+
+# 启动时（主导航已加载、下拉菜单未打开）必须匹配到元素的选择器
+REQUIRED_AT_STARTUP = ("main_nav_container", "main_nav_item", "main_nav_text")
+
+# [class*='前缀'] 形式的CSS Modules选择器
+_CSS_MODULE_PATTERN = re.compile(r"\[class\*=['\"]([\w-]+)['\"]\]")
+
+# 一次evaluate统计每个选择器匹配的元素数（非法选择器为 -1），并找出每个前缀当前对应的完整类名
+VALIDATE_JS = """
+(probe) => {
+    const counts = {};
+    for (const [name, css] of Object.entries(probe.selectors)) {
+        try {
+            counts[name] = document.querySelectorAll(css).length;
+        } catch (e) {
+            counts[name] = -1;
+        }
+    }
+    const classes = {};
+    for (const prefix of probe.prefixes) {
+        const found = new Set();
+        document.querySelectorAll(`[class*='${prefix}']`).forEach(el => {
+            el.classList.forEach(c => { if (c.startsWith(prefix)) found.add(c); });
+        });
+        classes[prefix] = Array.from(found);
+    }
+    return {counts: counts, classes: classes};
+}
+"""
+
+# 在页面内读取一组细分项的文本、激活状态（类名前缀匹配）和关闭按钮，代替逐项 get_attribute / query_selector
+ITEM_STATES_JS = """
+(items, sel) => items.map(li => {
+    const textElem = li.querySelector(sel.item_text);
+    return {
+        text: textElem ? textElem.textContent : null,
+        is_active: Array.from(li.classList).some(c => c.startsWith(sel.active)),
+        has_close_btn: li.querySelector(sel.close) !== null,
+    };
+})
+"""
+
+
+def has_class_prefix(class_name: Optional[str], prefix: str) -> bool:
+    """class 属性中是否有以 prefix 开头的类名（CSS Modules 哈希后缀变化时仍能匹配）"""
+    return any(name.startswith(prefix) for name in (class_name or "").split())
+
+
+class SelectorRegistry:
+    """
+    选择器注册表
+
+    - registry["category_container"] 取选择器；registry.active 为激活样式的类名前缀
+    - validate() 在页面上一次evaluate校验全部选择器，结果缓存（每个页面只校验一次）
+    - item_states() 在页面内读取细分项状态，一个容器只需一次往返
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = dict(SELECTOR_CONFIG if config is None else config)
+        self.report: Optional[Dict] = None
+
+    def __getitem__(self, name: str) -> str:
+        return self.config[name]
+
+    @property
+    def active(self) -> str:
+        return self.config["active_class"]
+
+    def scoped(self, name: str) -> str:
+        """拼上所在容器后的完整选择器（"li" → "ul[...] li"）"""
+        scope = SELECTOR_SCOPES.get(name)
+        return f"{self.scoped(scope)} {self.config[name]}" if scope else self.config[name]
+
+    def prefixes(self) -> List[str]:
+        """全部CSS Modules类名前缀（选择器中的 [class*='...'] 以及 active_class）"""
+        found = [self.config[name] for name in CLASS_PREFIXES]
+        for name, value in self.config.items():
+            if name not in CLASS_PREFIXES:
+                found.extend(_CSS_MODULE_PATTERN.findall(value))
+        return list(dict.fromkeys(found))
+
+    def probe(self) -> Dict:
+        """传给 VALIDATE_JS 的参数"""
+        return {
+            "selectors": {name: self.scoped(name) for name in self.config if name not in CLASS_PREFIXES},
+            "prefixes": self.prefixes(),
+        }
+
+    def check(self, result: Dict) -> Dict:
+        """记录并输出 VALIDATE_JS 的结果"""
+        counts, classes = result["counts"], result["classes"]
+        missing = [name for name in REQUIRED_AT_STARTUP if counts.get(name, 0) <= 0]
+        for name, count in counts.items():
+            if count < 0:
+                logger.error("❌ 选择器 %s 无效: %s", name, self.scoped(name))
+            elif name in missing:
+                logger.error("❌ 选择器 %s 未匹配到元素: %s", name, self.scoped(name))
+            else:
+                logger.debug("  选择器 %s: %s 个元素", name, count)
+        for prefix, names in classes.items():
+            if names:
+                logger.debug("  类名前缀 %s → %s", prefix, ", ".join(names))
+            else:
+                logger.debug("  类名前缀 %s 暂未出现", prefix)
+
+        self.report = {"counts": counts, "classes": classes, "missing": missing}
+        matched = sum(1 for count in counts.values() if count > 0)
+        if missing:
+            logger.warning("⚠️  选择器校验: %s/%s 个命中，缺少 %s", matched, len(counts), ", ".join(missing))
+        else:
+            logger.info("✅ 选择器校验: %s/%s 个命中（下拉菜单内的选择器在打开后才出现）", matched, len(counts))
+        return self.report
+
+    def validate(self, page: Page) -> Dict:
+        """在当前页面上校验全部选择器（已校验过时直接返回上次的结果）"""
+        if self.report is not None:
+            return self.report
+        try:
+            return self.check(page.evaluate(VALIDATE_JS, self.probe()))
+        except Exception as e:
+            logger.warning("⚠️  选择器校验失败: %s", e)
+            return {}
+
+    async def validate_async(self, page) -> Dict:
+        """validate() 的异步版本"""
+        if self.report is not None:
+            return self.report
+        try:
+            return self.check(await page.evaluate(VALIDATE_JS, self.probe()))
+        except Exception as e:
+            logger.warning("⚠️  选择器校验失败: %s", e)
+            return {}
+
+    def state_selectors(self) -> Dict:
+        return {"item_text": self.config["subcategory_text"], "close": self.config["close_button"], "active": self.active}
+
+    def item_states(self, container: ElementHandle, item_selector: str = "ul li") -> List[Dict]:
+        """读取容器内全部细分项的 {text, is_active, has_close_btn}（text 为原始文本，没有文本元素时为 None）"""
+        return container.eval_on_selector_all(item_selector, ITEM_STATES_JS, self.state_selectors())
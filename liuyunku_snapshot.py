@@ -0,0 +1,260 @@
+# 溜云库下拉菜单快照：一次 page.evaluate 读取整个 HoverCard 下拉菜单（以及主导航列表）
+import hashlib
+from typing import List, Dict, Optional, Union
+from playwright.sync_api import Page, Locator
+from playwright.async_api import Page as AsyncPage
+from liuyunku_config import SELECTOR_CONFIG
+
+# 当前可见的下拉菜单
+VISIBLE_DROPDOWN = f"{SELECTOR_CONFIG['dropdown_menu']}:not([style*='display: none'])"
+
+# 传给页面脚本的选择器参数
+SNAPSHOT_SELECTORS = {
+    "dropdown": SELECTOR_CONFIG["dropdown_menu"],
+    "container": SELECTOR_CONFIG["category_container"],
+    "title": SELECTOR_CONFIG["category_title"],
+    "item": f"ul {SELECTOR_CONFIG['subcategory_item']}",
+    "item_text": SELECTOR_CONFIG["subcategory_text"],
+    "close": SELECTOR_CONFIG["close_button"],
+    "active": SELECTOR_CONFIG["active_class"],
+}
+
+NAV_SELECTORS = {
+    "container": SELECTOR_CONFIG["main_nav_container"],
+    "item": SELECTOR_CONFIG["main_nav_item"],
+    "text": SELECTOR_CONFIG["main_nav_text"],
+    "active": SELECTOR_CONFIG["active_class"],
+}
+
+NAV_SNAPSHOT_JS = """
+(sel) => {
+    const container = document.querySelector(sel.container);
+    if (!container) {
+        return null;
+    }
+    return Array.from(container.querySelectorAll(sel.item)).map((li, index) => {
+        const textElem = li.querySelector(sel.text);
+        return {
+            index: index,
+            text: textElem ? (textElem.textContent || '').trim() : '',
+            data_id: li.getAttribute('data-rfd-draggable-id'),
+            data_type: textElem ? textElem.getAttribute('datatype') : null,
+            is_active: Array.from(li.classList).some(c => c.startsWith(sel.active)),
+        };
+    });
+}
+"""
+
+# 容器标题：标题元素，没有时取容器内第一个 span（快照、细分面板检测和按路径等待共用，LocatorRegistry 按同样规则构造）
+CONTAINER_TITLE_JS = """
+(container, sel) => {
+    const titleElem = container.querySelector(sel.title) || container.querySelector('span');
+    return titleElem ? (titleElem.textContent || '').trim() : '';
+}
+"""
+
+# 从下拉菜单元素中提取所有容器及其项（供快照和细分面板监视器共用）
+EXTRACT_CONTAINERS_JS = """
+(dropdown, sel) => {
+    const containerTitle = CONTAINER_TITLE;
+    const text = (el) => el ? (el.textContent || '').trim() : '';
+    return Array.from(dropdown.querySelectorAll(sel.container)).map((container, ci) => {
+        const title = containerTitle(container, sel);
+        const items = Array.from(container.querySelectorAll(sel.item)).map((li, ii) => {
+            const textElem = li.querySelector(sel.item_text);
+            return {
+                index: ii,
+                text: text(textElem),
+                has_text: !!textElem,
+                is_active: Array.from(li.classList).some(c => c.startsWith(sel.active)),
+                has_close_btn: li.querySelector(sel.close) !== null,
+            };
+        });
+        return {
+            index: ci,
+            title: title,
+            is_subdivision: title.includes('细分'),
+            items: items,
+        };
+    });
+}
+""".replace("CONTAINER_TITLE", CONTAINER_TITLE_JS.strip())
+
+DROPDOWN_SNAPSHOT_JS = """
+(sel) => {
+    const extract = EXTRACT_CONTAINERS;
+    const dropdown = Array.from(document.querySelectorAll(sel.dropdown))
+        .find(d => !(d.getAttribute('style') || '').includes('display: none'));
+    if (!dropdown) {
+        return null;
+    }
+    const watch = window.__lykWatch;
+    return {containers: extract(dropdown, sel), generation: watch ? watch.generation : null};
+}
+""".replace("EXTRACT_CONTAINERS", EXTRACT_CONTAINERS_JS.strip())
+
+
+def snapshot_dropdown(page: Page) -> Optional[Dict]:
+    """
+    读取当前可见下拉菜单的完整结构（单次RPC）
+
+    返回 {"containers": [{"index", "title", "is_subdivision", "items": [...]}], "generation"}，
+    generation 为读取时的DOM变更代数（未安装观察器时为 None）；未找到可见下拉菜单时返回 None
+    """
+    return page.evaluate(DROPDOWN_SNAPSHOT_JS, SNAPSHOT_SELECTORS)
+
+
+async def snapshot_dropdown_async(page: AsyncPage) -> Optional[Dict]:
+    """snapshot_dropdown 的 asyncio 版本"""
+    return await page.evaluate(DROPDOWN_SNAPSHOT_JS, SNAPSHOT_SELECTORS)
+
+
+def snapshot_navigation(page: Page) -> Optional[List[Dict]]:
+    """
+    读取主导航列表的所有项（单次RPC）
+
+    返回 [{"index", "text", "data_id", "data_type", "is_active"}]，未找到导航列表时返回 None
+    """
+    return page.evaluate(NAV_SNAPSHOT_JS, NAV_SELECTORS)
+
+
+async def snapshot_navigation_async(page: AsyncPage) -> Optional[List[Dict]]:
+    """snapshot_navigation 的 asyncio 版本"""
+    return await page.evaluate(NAV_SNAPSHOT_JS, NAV_SELECTORS)
+
+
+def build_nav_index(records: Optional[List[Dict]]) -> Dict:
+    """
+    为主导航记录建立索引：文本、datatype、data-rfd-draggable-id → 记录
+
+    同一键出现多次时保留第一个（与原先按DOM顺序扫描的结果一致），没有文本的项不入索引
+    """
+    index = {"records": [], "by_text": {}, "by_type": {}, "by_id": {}}
+    for record in records or []:
+        if not record["text"]:
+            continue
+        index["records"].append(record)
+        index["by_text"].setdefault(record["text"], record)
+        if record["data_type"]:
+            index["by_type"].setdefault(record["data_type"], record)
+        if record["data_id"]:
+            index["by_id"].setdefault(record["data_id"], record)
+    return index
+
+
+def lookup_nav(index: Dict, text: Optional[str] = None, data_type: Optional[str] = None,
+               data_id: Optional[str] = None) -> Optional[Dict]:
+    """按 data_id、datatype 或文本查找主导航（按此优先级），未找到时返回 None"""
+    if data_id is not None and data_id in index["by_id"]:
+        return index["by_id"][data_id]
+    if data_type is not None and data_type in index["by_type"]:
+        return index["by_type"][data_type]
+    if text is not None:
+        return index["by_text"].get(text)
+    return None
+
+
+def resolve_nav_targets(index: Dict, targets: List[Union[str, Dict]]) -> Dict:
+    """
+    按目标顺序解析主导航
+
+    目标可以是文本，也可以是 {"text", "data_type", "data_id"} 形式的字典
+    返回 {"found": [记录...], "missing": [{"target", "reason"}], "available": [页面上所有导航文本]}
+    """
+    result = {"found": [], "missing": [], "available": [record["text"] for record in index["records"]]}
+    for target in targets:
+        keys = target if isinstance(target, dict) else {"text": target}
+        record = lookup_nav(index, keys.get("text"), keys.get("data_type"), keys.get("data_id"))
+        if record is None:
+            result["missing"].append({"target": target, "reason": "not_found"})
+        elif record in result["found"]:
+            result["missing"].append({"target": target, "reason": "duplicate"})
+        else:
+            result["found"].append(record)
+    return result
+
+
+def nav_locator(page: Page, index: int) -> Locator:
+    """按DOM序号构造主导航项的 Locator（不产生RPC，点击时才解析）"""
+    return page.locator(NAV_SELECTORS["container"]).first.locator(NAV_SELECTORS["item"]).nth(index)
+
+
+def with_nav_locators(page: Page, record: Dict) -> Dict:
+    """为主导航记录补充 element / text_element（Locator），与原先的 ElementHandle 字段同名"""
+    element = nav_locator(page, record["index"])
+    return dict(record, element=element, text_element=element.locator(NAV_SELECTORS["text"]).first)
+
+
+def get_categories(snapshot: Optional[Dict]) -> List[Dict]:
+    """从快照中取出所有大类（跳过细分容器和无标题容器）"""
+    if not snapshot:
+        return []
+
+    categories = []
+    for container in snapshot["containers"]:
+        if not container["title"] or container["is_subdivision"]:
+            continue
+        categories.append({
+            "title": container["title"],
+            "container_index": container["index"],
+            "items": container["items"],
+        })
+    return categories
+
+
+def to_subcategories(container: Dict, skip_first: bool = False) -> List[Dict]:
+    """把快照容器中的项转换为细分项记录，index 为容器内的 DOM 序号"""
+    items = container["items"]
+    subcategories = []
+    for item in items:
+        if not item["has_text"] or not item["text"]:
+            continue
+        # 跳过第一个项（通常是"全部"）
+        if skip_first and item["index"] == 0 and len(items) > 1:
+            continue
+        subcategories.append({
+            "text": item["text"],
+            "index": item["index"],
+            "is_active": item["is_active"],
+            "has_close_btn": item["has_close_btn"],
+            "container_index": container["index"],
+        })
+    return subcategories
+
+
+def find_subdivision_items(snapshot: Optional[Dict], start_index: int = 0) -> List[Dict]:
+    """从序号不小于 start_index 的容器中找到第一个细分容器并返回其细分项"""
+    if not snapshot:
+        return []
+
+    for container in snapshot["containers"][start_index:]:
+        if container["is_subdivision"]:
+            return to_subcategories(container)
+    return []
+
+
+def item_locator(page: Page, container_index: int, item_index: int) -> Locator:
+    """按容器序号和项序号构造可点击项的 Locator（不产生RPC，点击时才解析）"""
+    return (
+        page.locator(VISIBLE_DROPDOWN).first
+        .locator(SNAPSHOT_SELECTORS["container"]).nth(container_index)
+        .locator(SNAPSHOT_SELECTORS["item"]).nth(item_index)
+    )
+
+
+def category_fingerprint(title: str, item_texts: List[str]) -> str:
+    """大类指纹：标题 + 按顺序排列的项文本"""
+    payload = "\x1f".join([title] + list(item_texts))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def combine_fingerprints(fingerprints: List[str]) -> str:
+    """按顺序组合多个指纹"""
+    return hashlib.sha1("\x1f".join(fingerprints).encode("utf-8")).hexdigest()[:16]
+
+
+def dropdown_fingerprint(categories: List[Dict]) -> str:
+    """下拉菜单指纹：所有大类指纹按顺序组合"""
+    return combine_fingerprints([
+        category_fingerprint(cat["title"], [item["text"] for item in cat["items"]]) for cat in categories
+    ])
@@ -0,0 +1,125 @@
+# 溜云库阶段计时：每个阶段（连接窗口、连接CDP、读取导航、打开下拉菜单、下钻、点击、等待、截图）记录为一个span，写成JSONL并汇总分位数
+import json
+import math
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Optional
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """最近秩分位数（values 为空时返回 0）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _stats(values: List[float]) -> Dict:
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "max": max(values) if values else 0.0,
+    }
+
+
+class SpanRecorder:
+    """
+    阶段计时记录器
+
+    每个span一行JSON：{"ts", "stage", "nav", "seconds", "ok", ...附加字段}
+    path 为 None 时只保存在内存中；nav 为当前处理的主导航，由调用方在进入主导航时设置
+    """
+
+    def __init__(self, path: Optional[str] = None, append: bool = False):
+        self.path = path
+        self.nav: Optional[str] = None
+        self.records: List[Dict] = []
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8') if path else None
+
+    def record(self, stage: str, seconds: float, ok: bool = True, **fields) -> Dict:
+        """记录一个已完成的阶段"""
+        record = {
+            "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "stage": stage,
+            "nav": self.nav,
+            "seconds": seconds,
+            "ok": ok,
+        }
+        record.update(fields)
+        self.records.append(record)
+        if self.file:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.file.flush()
+        return record
+
+    @contextmanager
+    def span(self, stage: str, **fields):
+        """
+        计时一个代码块
+
+        产出的字典可在块内修改：ok 设为 False 表示阶段失败，其余键作为附加字段写入；块内抛出异常时 ok 为 False
+        """
+        span = {"ok": True}
+        span.update(fields)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception:
+            span["ok"] = False
+            raise
+        finally:
+            ok = bool(span.pop("ok"))
+            self.record(stage, time.perf_counter() - start, ok, **span)
+
+    def stage_summary(self) -> Dict[str, Dict]:
+        """按阶段汇总次数、总时长、p50/p95/max 和失败次数"""
+        return self._summarize(lambda record: record["stage"])
+
+    def nav_summary(self) -> Dict[str, Dict[str, Dict]]:
+        """按主导航、再按阶段汇总（不属于任何主导航的阶段不计入）"""
+        navs: Dict[str, Dict[str, Dict]] = {}
+        for nav in dict.fromkeys(record["nav"] for record in self.records if record["nav"]):
+            navs[nav] = self._summarize(lambda record: record["stage"], nav=nav)
+        return navs
+
+    def _summarize(self, key, nav: Optional[str] = None) -> Dict[str, Dict]:
+        grouped: Dict[str, List[Dict]] = {}
+        for record in self.records:
+            if nav is None or record["nav"] == nav:
+                grouped.setdefault(key(record), []).append(record)
+        summary = {}
+        for name, records in grouped.items():
+            stat = _stats([record["seconds"] for record in records])
+            stat["failures"] = sum(1 for record in records if not record["ok"])
+            summary[name] = stat
+        return summary
+
+    def print_report(self, indent: str = "  "):
+        """打印各阶段以及每个主导航的 p50/p95/max"""
+        if not self.records:
+            return
+
+        def line(name: str, stat: Dict, prefix: str) -> str:
+            failures = f", 失败 {stat['failures']} 次" if stat["failures"] else ""
+            return (f"{prefix}{name:<20} {stat['count']:>4} 次  共 {stat['total']:.1f}s  "
+                    f"p50 {stat['p50']:.2f}s  p95 {stat['p95']:.2f}s  最长 {stat['max']:.2f}s{failures}")
+
+        for name, stat in self.stage_summary().items():
+            logger.info("%s", line(name, stat, indent))
+        for nav, stages in self.nav_summary().items():
+            logger.info("%s📂 %s", indent, nav)
+            for name, stat in stages.items():
+                logger.info("%s", line(name, stat, indent + "  "))
+
+    def close(self):
+        try:
+            if self.file:
+                self.file.close()
+        except:
+            pass
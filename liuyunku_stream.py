@@ -0,0 +1,130 @@
+# 溜云库流式输出：每访问一个细分项写一行JSON，按需重建嵌套的导航结构
+import json
+import time
+from typing import Dict, Iterator, Optional
+
+
+class NavigationStreamWriter:
+    """
+    流式JSONL写入器
+
+    每行一个细分项访问记录：
+        {"ts", "path": [主导航, 大类, 细分项], "nav": {...}, "category": {...},
+         "flags": {"is_active", "has_close_btn", "ok", "duplicate", "likely_unchanged"},
+         "timings": {...}, "screenshot", "screenshot_hash"}
+    每行写入后立即 flush，下游可以 tail -f 实时读取
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.count = 0
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+        if append and not self._ends_with_newline():
+            # 上次运行在写入中途中断：先结束不完整的行，避免第一条新记录与它拼在同一行而无法解析
+            self.file.write("\n")
+            self.file.flush()
+
+    def _ends_with_newline(self) -> bool:
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, 2)
+                if f.tell() == 0:
+                    return True
+                f.seek(-1, 2)
+                return f.read(1) == b"\n"
+        except OSError:
+            return True
+
+    def write_visit(self, nav_data: Dict, category_data: Dict, sub_data: Dict, visit: Optional[Dict] = None):
+        """写入一条细分项访问记录"""
+        visit = visit or {}
+        record = {
+            "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "path": [nav_data["text"], category_data["title"], sub_data["text"]],
+            "nav": {k: v for k, v in nav_data.items() if k != "categories"},
+            "category": {k: v for k, v in category_data.items() if k not in ("subcategories", "items")},
+            "flags": {
+                "is_active": sub_data["is_active"],
+                "has_close_btn": sub_data["has_close_btn"],
+                "ok": visit.get("ok", True),
+                "duplicate": visit.get("duplicate"),
+                "likely_unchanged": visit.get("likely_unchanged", False),
+            },
+            "timings": visit.get("timings", {}),
+            "screenshot": visit.get("screenshot"),
+            "screenshot_hash": visit.get("screenshot_hash"),
+        }
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        try:
+            self.file.close()
+        except:
+            pass
+
+
+def read_stream(path: str) -> Iterator[Dict]:
+    """逐行读取流式记录，跳过不完整的行（例如正在写入的最后一行）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def rebuild_navigation(path: str) -> Dict:
+    """
+    由流式记录重建 main_navigation → categories → subcategories 的嵌套结构
+
+    同一细分项（按路径）有多条记录时（例如 --resume 重试了失败的细分项）只保留一条：
+    后面的记录覆盖前面的，但失败的记录不会覆盖成功的记录；位置取第一次出现的位置
+    """
+    navigation_data = {
+        "timestamp": None,
+        "main_navigation": []
+    }
+    navs: Dict[str, Dict] = {}
+    categories: Dict[tuple, Dict] = {}
+    visits: Dict[tuple, Dict] = {}  # 路径 → {"index": 在 subcategories 中的位置, "ok": 是否成功}
+
+    for record in read_stream(path):
+        nav_text, category_title, _ = record["path"]
+        navigation_data["timestamp"] = navigation_data["timestamp"] or record["ts"]
+
+        nav = navs.get(nav_text)
+        if nav is None:
+            nav = dict(record["nav"], categories=[])
+            navs[nav_text] = nav
+            navigation_data["main_navigation"].append(nav)
+
+        category = categories.get((nav_text, category_title))
+        if category is None:
+            category = dict(record["category"], subcategories=[])
+            categories[(nav_text, category_title)] = category
+            nav["categories"].append(category)
+
+        sub_data = {
+            "text": record["path"][2],
+            "is_active": record["flags"]["is_active"],
+            "has_close_btn": record["flags"]["has_close_btn"],
+        }
+        if record.get("screenshot_hash"):
+            sub_data["screenshot_hash"] = record["screenshot_hash"]
+
+        key = tuple(record["path"])
+        ok = record["flags"].get("ok", True)
+        previous = visits.get(key)
+        if previous is None:
+            visits[key] = {"index": len(category["subcategories"]), "ok": ok}
+            category["subcategories"].append(sub_data)
+        elif ok or not previous["ok"]:
+            category["subcategories"][previous["index"]] = sub_data
+            previous["ok"] = ok
+
+    return navigation_data
@@ -0,0 +1,165 @@
+# 溜云库目标页面选择：对所有上下文中的页面按URL/标题和导航列表是否存在打分，选出爬取目标并保留页面池
+import asyncio
+from typing import List, Dict, Optional
+from liuyunku_config import BROWSER_CONFIG, SELECTOR_CONFIG
+from liuyunku_cdp import list_targets
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+# 一次evaluate读取标题、导航列表是否存在和加载状态
+PAGE_PROBE_JS = """
+(sel) => ({
+    title: document.title,
+    has_nav: !!document.querySelector(sel),
+    ready: document.readyState,
+})
+"""
+
+# 不可能是溜云库页面的URL前缀
+SKIP_URL_PREFIXES = ("devtools://", "chrome://", "chrome-extension://", "chrome-error://")
+
+# 分数：存在导航列表 > URL匹配 > 标题匹配
+NAV_SCORE = 4
+URL_SCORE = 2
+TITLE_SCORE = 1
+BEST_SCORE = NAV_SCORE + URL_SCORE + TITLE_SCORE
+
+
+def score_page(url: str, title: str, has_nav: bool) -> int:
+    score = NAV_SCORE if has_nav else 0
+    if any(keyword in url for keyword in BROWSER_CONFIG["target_url_keywords"]):
+        score += URL_SCORE
+    if any(keyword in (title or "") for keyword in BROWSER_CONFIG["target_title_keywords"]):
+        score += TITLE_SCORE
+    return score
+
+
+def _candidate(page, context_index: int, page_index: int, probe: Optional[Dict], error: Optional[str] = None) -> Dict:
+    probe = probe or {"title": "", "has_nav": False, "ready": None}
+    return {
+        "page": page,
+        "context_index": context_index,
+        "page_index": page_index,
+        "url": page.url,
+        "title": probe["title"],
+        "has_nav": probe["has_nav"],
+        "ready": probe["ready"],
+        "score": score_page(page.url, probe["title"], probe["has_nav"]),
+        "error": error,
+    }
+
+
+def _pages(browser) -> List[tuple]:
+    """所有上下文中的页面（page.url 为本地属性，不产生RPC），跳过内部页面"""
+    return [
+        (ci, pi, page)
+        for ci, context in enumerate(browser.contexts)
+        for pi, page in enumerate(context.pages)
+        if not page.url.startswith(SKIP_URL_PREFIXES)
+    ]
+
+
+def _sort(candidates: List[Dict]) -> List[Dict]:
+    return sorted(candidates, key=lambda c: (-c["score"], c["context_index"], c["page_index"]))
+
+
+def _target_titles(pages: List[tuple], targets: Optional[List[Dict]]) -> List[str]:
+    """按URL把 /json/list 中的标题对应到页面（同一URL的多个页面按出现顺序对应）"""
+    titles: Dict[str, List[str]] = {}
+    for target in targets or []:
+        titles.setdefault(target.get("url", ""), []).append(target.get("title", ""))
+    return [titles[page.url].pop(0) if titles.get(page.url) else "" for _, _, page in pages]
+
+
+def rank_pages(browser, stop_early: bool = True, cdp_url: Optional[str] = None) -> List[Dict]:
+    """
+    对所有页面打分并按分数从高到低排序
+
+    提供 cdp_url 时先用一次 /json/list 请求取得所有页面的URL和标题，同时为全部页面按URL/标题预打分；
+    同步API的页面调用不能并发，导航列表检测按预打分从高到低逐个evaluate，
+    stop_early 时找到满分页面后不再检测其余页面（其余页面的分数按URL和标题计算）
+    """
+    pages = _pages(browser)
+    titles = _target_titles(pages, list_targets(cdp_url) if cdp_url else None)
+    prefetched = [
+        (ci, pi, page, {"title": title, "has_nav": False, "ready": None})
+        for (ci, pi, page), title in zip(pages, titles)
+    ]
+    prefetched.sort(key=lambda item: -score_page(item[2].url, item[3]["title"], False))
+
+    candidates = []
+    found_best = False
+    for ci, pi, page, known in prefetched:
+        if stop_early and found_best:
+            candidates.append(_candidate(page, ci, pi, known))
+            continue
+        try:
+            candidate = _candidate(page, ci, pi, page.evaluate(PAGE_PROBE_JS, SELECTOR_CONFIG["main_nav_container"]))
+        except Exception as e:
+            candidate = _candidate(page, ci, pi, known, str(e))
+        found_best = candidate["score"] == BEST_SCORE
+        candidates.append(candidate)
+    return _sort(candidates)
+
+
+async def rank_pages_async(browser) -> List[Dict]:
+    """rank_pages 的 asyncio 版本：所有页面并发探测"""
+    pages = _pages(browser)
+
+    async def probe(ci: int, pi: int, page) -> Dict:
+        try:
+            return _candidate(page, ci, pi, await page.evaluate(PAGE_PROBE_JS, SELECTOR_CONFIG["main_nav_container"]))
+        except Exception as e:
+            return _candidate(page, ci, pi, None, str(e))
+
+    return _sort(await asyncio.gather(*(probe(ci, pi, page) for ci, pi, page in pages)))
+
+
+def target_id(page) -> Optional[str]:
+    """页面的CDP targetId（同一页面在不同CDP连接中的 Page 对象不同，targetId 相同）"""
+    try:
+        session = page.context.new_cdp_session(page)
+        try:
+            return session.send("Target.getTargetInfo")["targetInfo"]["targetId"]
+        finally:
+            session.detach()
+    except Exception:
+        return None
+
+
+class PagePool:
+    """
+    按分数排序的候选页面池
+
+    acquire() 依次分配尚未使用的页面（优先有导航列表的页面），供主爬虫和并行工作线程复用已打开的页面
+    """
+
+    def __init__(self, candidates: List[Dict]):
+        self.candidates = candidates
+        self.in_use = set()
+
+    @property
+    def best(self) -> Optional[Dict]:
+        return self.candidates[0] if self.candidates else None
+
+    def nav_pages(self) -> List[Dict]:
+        return [c for c in self.candidates if c["has_nav"]]
+
+    def acquire(self, require_nav: bool = False):
+        """取出下一个未使用的页面，没有可用页面时返回 None"""
+        for candidate in self.candidates:
+            if id(candidate["page"]) in self.in_use or (require_nav and not candidate["has_nav"]):
+                continue
+            self.in_use.add(id(candidate["page"]))
+            return candidate["page"]
+        return None
+
+    def release(self, page):
+        self.in_use.discard(id(page))
+
+    def print_summary(self, indent: str = "  "):
+        for candidate in self.candidates:
+            logger.info("%s%s 分 %s %s - %s",
+                        indent, candidate['score'], '📋' if candidate['has_nav'] else '  ',
+                        candidate['title'] or '(未探测)', candidate['url'])
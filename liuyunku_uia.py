@@ -0,0 +1,165 @@
+# 溜云库UIA控件查找：按 automation id / 标题 / 控件类型定位一次，缓存包装对象并廉价地重新校验
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional, Callable
+from liuyunku_config import APP_CONFIG
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class UiaBackend(ABC):
+    """
+    UIA查找接口
+
+    criteria 为 {"control_type", "title_re", "auto_id"}（值为 None 的键忽略），title_re 从开头匹配
+    """
+
+    @abstractmethod
+    def find(self, root, criteria: Dict):
+        """在 root 之下查找第一个满足条件的控件，未找到时返回 None"""
+
+    @abstractmethod
+    def is_valid(self, element) -> bool:
+        """缓存的控件是否仍然有效（只读取少量属性，不遍历控件树）"""
+
+
+class PywinautoUiaBackend(UiaBackend):
+    """基于 pywinauto child_window 的查找：条件交给UIA按属性筛选，不在Python中逐个读取 window_text"""
+
+    def find(self, root, criteria: Dict):
+        conditions = {key: value for key, value in criteria.items() if value is not None}
+        try:
+            return root.child_window(found_index=0, **conditions).wrapper_object()
+        except Exception:
+            return None
+
+    def is_valid(self, element) -> bool:
+        try:
+            return element.is_visible()
+        except Exception:
+            return False
+
+
+class FakeElement:
+    """内存中的假UIA控件"""
+
+    def __init__(self, control_type: str, title: str = "", auto_id: str = "", children: Optional[List] = None,
+                 on_click: Optional[Callable] = None):
+        self.control_type = control_type
+        self.title = title
+        self.auto_id = auto_id
+        self.children = children or []
+        self.on_click = on_click
+        self.visible = True
+        self.attached = True  # 从控件树中移除后为 False（对应真实UIA中失效的元素）
+
+    def window_text(self) -> str:
+        return self.title
+
+    def is_visible(self) -> bool:
+        return self.visible
+
+    def click_input(self):
+        if self.on_click:
+            self.on_click(self)
+
+    def descendants(self, control_type: Optional[str] = None) -> List:
+        result = []
+        for child in self.children:
+            if control_type is None or child.control_type == control_type:
+                result.append(child)
+            result.extend(child.descendants(control_type=control_type))
+        return result
+
+
+class FakeUiaBackend(UiaBackend):
+    """在假控件树上查找，visited 记录遍历过的控件数"""
+
+    def __init__(self):
+        self.visited = 0
+
+    def _match(self, element, criteria: Dict) -> bool:
+        if criteria.get("control_type") and getattr(element, "control_type", None) != criteria["control_type"]:
+            return False
+        if criteria.get("auto_id") and getattr(element, "auto_id", None) != criteria["auto_id"]:
+            return False
+        if criteria.get("title_re") and not re.match(criteria["title_re"], element.window_text()):
+            return False
+        return True
+
+    def find(self, root, criteria: Dict):
+        stack = list(reversed(root.children))
+        while stack:
+            element = stack.pop()
+            self.visited += 1
+            if element.visible and self._match(element, criteria):
+                return element
+            stack.extend(reversed(element.children))
+        return None
+
+    def is_valid(self, element) -> bool:
+        return element.attached and element.visible
+
+
+class UiaLocator:
+    """
+    按名称查找 APP_CONFIG["uia_targets"] 中定义的控件
+
+    第一次查找后缓存包装对象；之后只调用 backend.is_valid 校验，失效时重新查找
+    每次查找的耗时和是否命中缓存记录在 records 中
+    """
+
+    def __init__(self, backend: UiaBackend, root, targets: Optional[Dict[str, Dict]] = None):
+        self.backend = backend
+        self.root = root
+        self.targets = targets or APP_CONFIG["uia_targets"]
+        self.cache: Dict[str, object] = {}
+        self.records: List[Dict] = []
+
+    def find(self, name: str, use_cache: bool = True):
+        """取得控件，未找到时返回 None"""
+        start = time.perf_counter()
+        element = self.cache.get(name) if use_cache else None
+        cached = element is not None and self.backend.is_valid(element)
+
+        if not cached:
+            element = self.backend.find(self.root, self.targets[name])
+            if element is not None:
+                self.cache[name] = element
+            else:
+                self.cache.pop(name, None)
+
+        self.records.append({
+            "name": name,
+            "cached": cached,
+            "found": element is not None,
+            "seconds": time.perf_counter() - start,
+        })
+        return element
+
+    def exists(self, name: str) -> bool:
+        return self.find(name) is not None
+
+    def invalidate(self, name: Optional[str] = None):
+        if name is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(name, None)
+
+    def summary(self) -> Dict[str, Dict]:
+        """按控件汇总查找次数、缓存命中次数和耗时"""
+        stats: Dict[str, Dict] = {}
+        for record in self.records:
+            stat = stats.setdefault(record["name"], {"count": 0, "cached": 0, "total": 0.0, "max": 0.0})
+            stat["count"] += 1
+            stat["cached"] += record["cached"]
+            stat["total"] += record["seconds"]
+            stat["max"] = max(stat["max"], record["seconds"])
+        return stats
+
+    def print_summary(self, indent: str = "  "):
+        for name, stat in self.summary().items():
+            logger.info("%sUIA %s: %s 次, 缓存命中 %s 次, 共 %.0fms, 最长 %.0fms",
+                        indent, name, stat['count'], stat['cached'], stat['total'] * 1000, stat['max'] * 1000)
@@ -0,0 +1,312 @@
+# 溜云库事件驱动等待：MutationObserver + wait_for_function 谓词，替代固定 time.sleep
+import json
+import time
+from typing import List, Dict, Optional
+from playwright.sync_api import Page, ElementHandle
+from playwright.async_api import Page as AsyncPage
+from liuyunku_snapshot import SNAPSHOT_SELECTORS, CONTAINER_TITLE_JS
+from liuyunku_config import SELECTOR_CONFIG, BROWSER_CONFIG
+from liuyunku_logging import get_logger
+
+logger = get_logger(__name__)
+
+# 结果区就绪检测使用的选择器
+RESULT_SELECTORS = {
+    "result": SELECTOR_CONFIG["result_container"],
+    "card": SELECTOR_CONFIG["result_card"],
+}
+
+# 在页面中安装 MutationObserver，记录DOM变更代数、最后变更时间、结果区最后变更时间、最后一次点击及其后的首次变更时间
+INSTALL_OBSERVER_JS = """
+(resultSel) => {
+    if (window.__lykWatch) {
+        return window.__lykWatch.generation;
+    }
+    const watch = {generation: 0, lastMutation: performance.now(), lastResultMutation: 0,
+                   clickGeneration: 0, clickTime: 0, clickMutation: 0};
+    const inResult = (node) => {
+        const element = node && node.nodeType === 1 ? node : node && node.parentElement;
+        return !!(resultSel && element && element.closest(resultSel));
+    };
+    new MutationObserver((mutations) => {
+        watch.generation += 1;
+        watch.lastMutation = performance.now();
+        if (watch.generation === watch.clickGeneration + 1) {
+            watch.clickMutation = watch.lastMutation;
+        }
+        if (mutations.some(m => inResult(m.target))) {
+            watch.lastResultMutation = watch.lastMutation;
+        }
+    }).observe(document, {
+        childList: true, subtree: true, attributes: true, attributeFilter: ['class', 'style', 'aria-busy'],
+    });
+    document.addEventListener('click', () => {
+        watch.clickGeneration = watch.generation;
+        watch.clickTime = performance.now();
+    }, true);
+    window.__lykWatch = watch;
+    return watch.generation;
+}
+"""
+
+# 可见下拉菜单出现
+DROPDOWN_VISIBLE_JS = """
+(sel) => Array.from(document.querySelectorAll(sel.dropdown))
+    .some(d => !(d.getAttribute('style') || '').includes('display: none') && d.getClientRects().length > 0)
+"""
+
+# 可见下拉菜单消失
+DROPDOWN_HIDDEN_JS = """
+(sel) => !Array.from(document.querySelectorAll(sel.dropdown))
+    .some(d => !(d.getAttribute('style') || '').includes('display: none') && d.getClientRects().length > 0)
+"""
+
+# 新的"细分"容器出现 → 'panel'；点击后DOM开始变更已超过 grace 毫秒仍没有面板 → 'no_panel'
+# （不按DOM静止判断：较慢的细分面板可能在点击自身的激活样式变更之后才渲染）
+SUBDIVISION_PANEL_JS = """
+({sel, before, grace, pageWide}) => {
+    const containerTitle = CONTAINER_TITLE;
+    const dropdown = Array.from(document.querySelectorAll(sel.dropdown))
+        .find(d => !(d.getAttribute('style') || '').includes('display: none'));
+    const root = pageWide ? document : dropdown;
+    if (!root) {
+        return false;
+    }
+    const containers = root.querySelectorAll(sel.container);
+    for (let i = before; i < containers.length; i++) {
+        if (containerTitle(containers[i], sel).includes('细分')) {
+            return 'panel';
+        }
+    }
+    const watch = window.__lykWatch;
+    if (watch && watch.generation > watch.clickGeneration && performance.now() - watch.clickMutation >= grace) {
+        return 'no_panel';
+    }
+    return false;
+}
+""".replace("CONTAINER_TITLE", CONTAINER_TITLE_JS.strip())
+
+# 激活样式移动到指定项（按容器序号 + 项序号定位）
+ACTIVE_ITEM_JS = """
+({sel, containerIndex, itemIndex}) => {
+    const dropdown = Array.from(document.querySelectorAll(sel.dropdown))
+        .find(d => !(d.getAttribute('style') || '').includes('display: none'));
+    if (!dropdown) {
+        return false;
+    }
+    const container = dropdown.querySelectorAll(sel.container)[containerIndex];
+    const item = container ? container.querySelectorAll(sel.item)[itemIndex] : null;
+    return !!item && Array.from(item.classList).some(c => c.startsWith(sel.active));
+}
+"""
+
+# 激活样式移动到指定项（按容器标题 + 项文本 + 同名项序号定位，不依赖DOM序号）
+ACTIVE_PATH_JS = """
+({sel, title, text, occurrence}) => {
+    const containerTitle = CONTAINER_TITLE;
+    const dropdown = Array.from(document.querySelectorAll(sel.dropdown))
+        .find(d => !(d.getAttribute('style') || '').includes('display: none'));
+    if (!dropdown) {
+        return false;
+    }
+    const trimmed = (el) => el ? (el.textContent || '').trim() : '';
+    const container = Array.from(dropdown.querySelectorAll(sel.container))
+        .find(c => containerTitle(c, sel) === title);
+    if (!container) {
+        return false;
+    }
+    const items = Array.from(container.querySelectorAll(sel.item))
+        .filter(li => trimmed(li.querySelector(sel.item_text)) === text);
+    const item = items[occurrence];
+    return !!item && Array.from(item.classList).some(c => c.startsWith(sel.active));
+}
+""".replace("CONTAINER_TITLE", CONTAINER_TITLE_JS.strip())
+
+# 激活样式移动到指定元素
+ACTIVE_ELEMENT_JS = """
+([element, active]) => Array.from(element.classList).some(c => c.startsWith(active))
+"""
+
+# 结果区就绪：卡片存在、卡片中的图片全部解码完成、结果区静止 quiet 毫秒
+#   ready     最后一次点击后结果区发生过变更（含 aria-busy 切换），且已满足上述条件
+#   unchanged 点击后 unchanged 毫秒内结果区没有变更，但已有解码完成的卡片（结果与点击前相同，
+#             只有确认激活样式已移动到被点击项时才可信，见 PageWaiter.wait_for_result_ready）
+#   empty     点击后结果区已静止 unchanged 毫秒且没有卡片（空结果）
+RESULT_READY_JS = """
+({sel, quiet, unchanged}) => {
+    const watch = window.__lykWatch;
+    const grid = document.querySelector(sel.result);
+    if (!watch || !grid || grid.getAttribute('aria-busy') === 'true') {
+        return false;
+    }
+    const now = performance.now();
+    const changed = watch.lastResultMutation > watch.clickTime;
+    const lastChange = changed ? watch.lastResultMutation : watch.clickTime;
+    if (now - lastChange < quiet) {
+        return false;
+    }
+    const cards = grid.querySelectorAll(sel.card);
+    if (!cards.length) {
+        return now - lastChange >= unchanged ? 'empty' : false;
+    }
+    const images = grid.querySelectorAll(`${sel.card} img, img${sel.card}`);
+    for (const img of images) {
+        if (!img.complete || img.naturalWidth === 0) {
+            return false;
+        }
+    }
+    if (changed) {
+        return 'ready';
+    }
+    return now - watch.clickTime >= unchanged ? 'unchanged' : false;
+}
+"""
+
+class PageWaiter:
+    """
+    基于页面事件的等待器
+
+    每个谓词都有超时，并返回实际等待时长；所有等待记录保存在 records 中
+    """
+
+    def __init__(self, page: Page, poll_interval: int = 50):
+        self.page = page
+        self.poll_interval = poll_interval
+        self.records: List[Dict] = []
+
+    def install(self) -> bool:
+        """安装 MutationObserver（页面刷新后通过 init script 自动重新安装）"""
+        try:
+            self.page.add_init_script(f"({INSTALL_OBSERVER_JS})({json.dumps(RESULT_SELECTORS['result'])})")
+            self.page.evaluate(INSTALL_OBSERVER_JS, RESULT_SELECTORS["result"])
+            return True
+        except Exception as e:
+            logger.warning("⚠️  安装MutationObserver失败: %s", e)
+            return False
+
+    def _wait(self, name: str, expression: str, arg=None, timeout: int = 5000, with_reason: bool = False) -> Dict:
+        """执行 wait_for_function 并记录等待时长（with_reason 时额外读取谓词返回值）"""
+        start = time.perf_counter()
+        reason = None
+        try:
+            handle = self.page.wait_for_function(expression, arg=arg, timeout=timeout, polling=self.poll_interval)
+            if with_reason:
+                reason = handle.json_value()
+            ok = True
+        except Exception:
+            ok = False
+
+        result = {
+            "name": name,
+            "ok": ok,
+            "reason": reason if isinstance(reason, str) else None,
+            "waited": time.perf_counter() - start,
+            "timeout": timeout / 1000,
+        }
+        self.records.append(result)
+        return result
+
+    def wait_for_dropdown(self, timeout: int = 5000) -> Dict:
+        """等待下拉菜单可见"""
+        return self._wait("dropdown_visible", DROPDOWN_VISIBLE_JS, SNAPSHOT_SELECTORS, timeout)
+
+    def wait_for_dropdown_closed(self, timeout: int = 3000) -> Dict:
+        """等待下拉菜单关闭"""
+        return self._wait("dropdown_hidden", DROPDOWN_HIDDEN_JS, SNAPSHOT_SELECTORS, timeout)
+
+    def wait_for_subdivision_panel(self, before_count: int, timeout: int = 5000, page_wide: bool = False,
+                                   grace_ms: Optional[int] = None) -> Dict:
+        """
+        等待新的"细分"容器出现（before_count 为点击前的容器数量）
+
+        reason 为 panel / no_panel（点击后变更已超过 grace_ms 仍没有面板，由调用方按原容器内的项处理）
+        """
+        grace_ms = BROWSER_CONFIG["panel_grace_ms"] if grace_ms is None else grace_ms
+        arg = {"sel": SNAPSHOT_SELECTORS, "before": before_count, "grace": grace_ms, "pageWide": page_wide}
+        return self._wait("subdivision_panel", SUBDIVISION_PANEL_JS, arg, timeout, with_reason=True)
+
+    def wait_for_active_item(self, container_index: int, item_index: int, timeout: int = 3000) -> Dict:
+        """等待激活样式移动到下拉菜单中的指定项"""
+        arg = {"sel": SNAPSHOT_SELECTORS, "containerIndex": container_index, "itemIndex": item_index}
+        return self._wait("active_item", ACTIVE_ITEM_JS, arg, timeout)
+
+    def wait_for_active_path(self, title: str, text: str, occurrence: int = 0, timeout: int = 3000) -> Dict:
+        """等待激活样式移动到指定项（按容器标题和项文本定位，与 LocatorRegistry 的路径一致）"""
+        arg = {"sel": SNAPSHOT_SELECTORS, "title": title, "text": text, "occurrence": occurrence}
+        return self._wait("active_item", ACTIVE_PATH_JS, arg, timeout)
+
+    def wait_for_active_element(self, element: ElementHandle, timeout: int = 3000) -> Dict:
+        """等待激活样式移动到指定元素"""
+        return self._wait("active_item", ACTIVE_ELEMENT_JS, [element, SNAPSHOT_SELECTORS["active"]], timeout)
+
+    def wait_for_result_ready(self, quiet_ms: Optional[int] = None, unchanged_ms: Optional[int] = None,
+                              timeout: Optional[int] = None) -> Dict:
+        """
+        等待素材结果区就绪（替代 networkidle：长轮询或统计上报会让网络永远不空闲）
+
+        卡片存在、图片已解码、结果区静止 quiet_ms 毫秒即完成；reason 为 ready / unchanged / empty
+        unchanged 表示结果区在 unchanged_ms 内没有变更、沿用点击前的卡片，调用方必须先确认激活样式已移动到
+        被点击项（否则可能是上一个细分项的结果）；参数默认取 BROWSER_CONFIG 的 result_* 配置
+        """
+        arg = {
+            "sel": RESULT_SELECTORS,
+            "quiet": BROWSER_CONFIG["result_quiet_ms"] if quiet_ms is None else quiet_ms,
+            "unchanged": BROWSER_CONFIG["result_unchanged_ms"] if unchanged_ms is None else unchanged_ms,
+        }
+        timeout = BROWSER_CONFIG["result_ready_timeout"] if timeout is None else timeout
+        return self._wait("result_ready", RESULT_READY_JS, arg, timeout, with_reason=True)
+
+    def summary(self) -> Dict[str, Dict]:
+        """按谓词汇总等待次数、总时长、最长时长和超时次数"""
+        stats: Dict[str, Dict] = {}
+        for record in self.records:
+            stat = stats.setdefault(record["name"], {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+            stat["count"] += 1
+            stat["total"] += record["waited"]
+            stat["max"] = max(stat["max"], record["waited"])
+            if not record["ok"]:
+                stat["timeouts"] += 1
+        return stats
+
+
+class AsyncPageWaiter(PageWaiter):
+    """
+    PageWaiter 的 asyncio 版本，谓词与记录格式完全相同
+
+    wait_for_* 方法继承自 PageWaiter，返回需要 await 的协程
+    """
+
+    def __init__(self, page: AsyncPage, poll_interval: int = 50):
+        super().__init__(page, poll_interval)
+
+    async def install(self) -> bool:
+        """安装 MutationObserver（页面刷新后通过 init script 自动重新安装）"""
+        try:
+            await self.page.add_init_script(f"({INSTALL_OBSERVER_JS})({json.dumps(RESULT_SELECTORS['result'])})")
+            await self.page.evaluate(INSTALL_OBSERVER_JS, RESULT_SELECTORS["result"])
+            return True
+        except Exception as e:
+            logger.warning("⚠️  安装MutationObserver失败: %s", e)
+            return False
+
+    async def _wait(self, name: str, expression: str, arg=None, timeout: int = 5000, with_reason: bool = False) -> Dict:
+        """执行 wait_for_function 并记录等待时长（with_reason 时额外读取谓词返回值）"""
+        start = time.perf_counter()
+        reason = None
+        try:
+            handle = await self.page.wait_for_function(expression, arg=arg, timeout=timeout, polling=self.poll_interval)
+            if with_reason:
+                reason = await handle.json_value()
+            ok = True
+        except Exception:
+            ok = False
+
+        result = {
+            "name": name,
+            "ok": ok,
+            "reason": reason if isinstance(reason, str) else None,
+            "waited": time.perf_counter() - start,
+            "timeout": timeout / 1000,
+        }
+        self.records.append(result)
+        return result
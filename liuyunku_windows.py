@@ -0,0 +1,284 @@
+# 溜云库窗口发现：窗口管理接口（pywinauto实现 + 内存中的假桌面）与进程/窗口/CDP端口的连接缓存
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional
+from liuyunku_config import APP_CONFIG
+from liuyunku_logging import get_logger
+
+try:
+    import psutil
+    from pywinauto import Application, Desktop
+except ImportError:
+    psutil = None
+    Application = None
+    Desktop = None
+
+logger = get_logger(__name__)
+
+
+class WindowManager(ABC):
+    """
+    窗口管理接口
+
+    窗口对象需要提供 window_text()、is_visible()、process_id()、handle 属性，
+    以及后续UIA操作用到的 set_focus()、descendants()
+    """
+
+    @abstractmethod
+    def find_process(self, name: str) -> Optional[int]:
+        """枚举所有进程，返回第一个同名进程的PID"""
+
+    @abstractmethod
+    def process_alive(self, pid: int, name: str) -> bool:
+        """PID 对应的进程是否仍在运行且名称相同（不枚举进程）"""
+
+    @abstractmethod
+    def start(self, exe_path: str) -> int:
+        """启动程序，返回PID"""
+
+    @abstractmethod
+    def windows(self) -> List:
+        """枚举桌面上的所有顶层窗口"""
+
+    @abstractmethod
+    def window_from_handle(self, handle: int):
+        """按窗口句柄直接取得窗口（不枚举），句柄无效时返回 None"""
+
+
+class PywinautoWindowManager(WindowManager):
+    """基于 psutil + pywinauto（UIA）的窗口管理，仅在 Windows 上可用"""
+
+    def __init__(self):
+        if Desktop is None:
+            raise RuntimeError("需要安装 pywinauto 和 psutil（仅支持 Windows）")
+        self.desktop = Desktop(backend="uia")
+        self.app = None
+
+    def find_process(self, name: str) -> Optional[int]:
+        for proc in psutil.process_iter(['pid', 'name']):
+            if proc.info['name'] == name:
+                return proc.info['pid']
+        return None
+
+    def process_alive(self, pid: int, name: str) -> bool:
+        try:
+            return psutil.pid_exists(pid) and psutil.Process(pid).name() == name
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def start(self, exe_path: str) -> int:
+        self.app = Application(backend="uia").start(exe_path)
+        return self.app.process
+
+    def windows(self) -> List:
+        return self.desktop.windows()
+
+    def window_from_handle(self, handle: int):
+        try:
+            return self.desktop.window(handle=handle).wrapper_object()
+        except Exception:
+            return None
+
+
+class FakeWindow:
+    """假窗口：只实现连接和UIA查找用到的方法"""
+
+    def __init__(self, handle: int, pid: int, title: str, visible: bool = True, children: Optional[List] = None):
+        self.handle = handle
+        self.pid = pid
+        self.title = title
+        self.visible = visible
+        self.children = children or []
+        self.focused = False
+
+    def window_text(self) -> str:
+        return self.title
+
+    def is_visible(self) -> bool:
+        return self.visible
+
+    def process_id(self) -> int:
+        return self.pid
+
+    def set_focus(self):
+        self.focused = True
+
+    def descendants(self, control_type: Optional[str] = None) -> List:
+        result = []
+        for child in self.children:
+            if control_type is None or getattr(child, "control_type", None) == control_type:
+                result.append(child)
+            if hasattr(child, "descendants"):
+                result.extend(child.descendants(control_type=control_type))
+        return result
+
+
+class FakeDesktop(WindowManager):
+    """
+    内存中的假桌面，用于在非Windows环境下演示和测量连接流程
+
+    calls 记录每种操作的调用次数；enumeration_delay 模拟一次完整枚举的耗时
+    """
+
+    def __init__(self, enumeration_delay: float = 0.0, start_delay: float = 0.0):
+        self.processes: Dict[int, str] = {}
+        self.window_list: List[FakeWindow] = []
+        self.enumeration_delay = enumeration_delay
+        self.start_delay = start_delay
+        self.next_pid = 1000
+        self.next_handle = 0x10000
+        self.calls = {"find_process": 0, "process_alive": 0, "start": 0, "windows": 0, "window_from_handle": 0}
+
+    def add_process(self, name: str, title: Optional[str] = None, visible: bool = True) -> FakeWindow:
+        """添加一个进程（title 不为空时同时添加其主窗口）"""
+        pid = self.next_pid
+        self.next_pid += 1
+        self.processes[pid] = name
+        window = None
+        if title is not None:
+            window = FakeWindow(self.next_handle, pid, title, visible)
+            self.next_handle += 1
+            self.window_list.append(window)
+        return window
+
+    def kill(self, pid: int):
+        self.processes.pop(pid, None)
+        self.window_list = [w for w in self.window_list if w.pid != pid]
+
+    def find_process(self, name: str) -> Optional[int]:
+        self.calls["find_process"] += 1
+        time.sleep(self.enumeration_delay)
+        for pid, proc_name in self.processes.items():
+            if proc_name == name:
+                return pid
+        return None
+
+    def process_alive(self, pid: int, name: str) -> bool:
+        self.calls["process_alive"] += 1
+        return self.processes.get(pid) == name
+
+    def start(self, exe_path: str) -> int:
+        self.calls["start"] += 1
+        time.sleep(self.start_delay)
+        window = self.add_process(os.path.basename(exe_path.replace("\\", "/")), APP_CONFIG["window_title_keyword"])
+        return window.pid
+
+    def windows(self) -> List:
+        self.calls["windows"] += 1
+        time.sleep(self.enumeration_delay)
+        return list(self.window_list)
+
+    def window_from_handle(self, handle: int):
+        self.calls["window_from_handle"] += 1
+        for window in self.window_list:
+            if window.handle == handle:
+                return window
+        return None
+
+
+class AttachCache:
+    """上次连接成功的 PID、窗口句柄和CDP端口，保存为JSON文件"""
+
+    def __init__(self, path: str = APP_CONFIG["attach_cache_file"]):
+        self.path = path
+        self.data: Dict = {}
+        self.load()
+
+    def load(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+        return self.data
+
+    def get(self, key: str):
+        return self.data.get(key)
+
+    def update(self, **values):
+        """更新并立即写回文件"""
+        self.data.update(values, saved_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logger.warning("⚠️  保存连接缓存失败: %s", e)
+
+    def invalidate(self, *keys: str):
+        """清除指定字段（不指定时全部清除）"""
+        if keys:
+            for key in keys:
+                self.data.pop(key, None)
+        else:
+            self.data = {}
+        self.update()
+
+
+class WindowAttacher:
+    """
+    连接溜云库主窗口
+
+    先用缓存的 PID + 窗口句柄做廉价校验（进程存在、句柄有效、可见、标题匹配、属于该进程），
+    校验失败时才枚举进程和桌面窗口；每次连接的方式和耗时记录在 last_attach 中
+    """
+
+    def __init__(self, manager: WindowManager, cache: AttachCache,
+                 process_name: str = "LiuYunKu.exe", title_keyword: str = APP_CONFIG["window_title_keyword"],
+                 poll_interval: float = 0.5):
+        self.manager = manager
+        self.cache = cache
+        self.process_name = process_name
+        self.title_keyword = title_keyword
+        self.poll_interval = poll_interval
+        self.last_attach: Dict = {}
+
+    def _matches(self, window, pid: Optional[int] = None) -> bool:
+        try:
+            if not window.is_visible() or self.title_keyword not in window.window_text():
+                return False
+            return pid is None or window.process_id() == pid
+        except Exception:
+            return False
+
+    def attach_cached(self):
+        """按缓存校验并返回主窗口，缓存无效时返回 None"""
+        pid, handle = self.cache.get("pid"), self.cache.get("hwnd")
+        if not pid or not handle:
+            return None
+        if not self.manager.process_alive(pid, self.process_name):
+            return None
+        window = self.manager.window_from_handle(handle)
+        return window if window is not None and self._matches(window, pid) else None
+
+    def find_window(self, timeout: float = 30, pid: Optional[int] = None):
+        """枚举桌面窗口直到找到主窗口（pid 不为空时只接受该进程的窗口）"""
+        start_time = time.time()
+        while time.time() - start_time < timeout:
+            for window in self.manager.windows():
+                if self._matches(window, pid):
+                    return window
+            time.sleep(self.poll_interval)
+        return None
+
+    def attach(self, exe_path: str, timeout: float = 30):
+        """连接主窗口：缓存 → 已运行进程 → 启动新进程；成功后更新缓存"""
+        started = time.perf_counter()
+        method = "cache"
+        window = self.attach_cached()
+
+        if window is None:
+            pid = self.manager.find_process(self.process_name)
+            if pid is not None:
+                method = "enumerate"
+                logger.warning("⚠️  检测到溜云库已在运行，尝试连接...")
+            else:
+                method = "start"
+                pid = self.manager.start(exe_path)
+            window = self.find_window(timeout, pid)
+
+        self.last_attach = {"method": method, "seconds": time.perf_counter() - started, "ok": window is not None}
+        if window is not None:
+            self.cache.update(pid=window.process_id(), hwnd=window.handle, exe_path=exe_path)
+        return window